@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Artifact Store
+==============
+
+Quota-aware front end for every file the API writes (downloads/ and screenshots/):
+- Byte accounting per session and per user (via the file registry)
+- Per-session and per-user quotas with least-recently-used eviction on write
+- Free-space guard: evicts LRU files before a write would leave the volume
+  below its reserve, and retries a write once after ENOSPC
+- Usage summary for /health
+"""
+
+import os
+import time
+import errno
+import shutil
+from typing import Optional, Dict, Any, Union
+
+from file_registry import FileRegistry, FileRecord
+from retention import RetentionManager
+
+
+class ArtifactStore:
+    """
+    Registers artifacts and keeps sessions, users and the volume within their limits.
+    """
+
+    def __init__(self, registry: FileRegistry, retention: RetentionManager,
+                 session_quota_bytes: int = 0, user_quota_bytes: int = 0,
+                 min_free_bytes: int = 256 * 1024 * 1024, protect_seconds: int = 300):
+        """
+        Initialize artifact store
+
+        Args:
+            registry (FileRegistry): Artifact index
+            retention (RetentionManager): Performs deletions (its quota_bytes is the global quota)
+            session_quota_bytes (int): Maximum bytes per browser session (0 = unlimited)
+            user_quota_bytes (int): Maximum bytes per user (0 = unlimited)
+            min_free_bytes (int): Free space to keep on the volume
+            protect_seconds (int): Files used this recently are never evicted, neither for
+                quotas nor for free space (they likely belong to requests still running)
+        """
+        self.registry = registry
+        self.retention = retention
+        self.session_quota_bytes = session_quota_bytes
+        self.user_quota_bytes = user_quota_bytes
+        self.min_free_bytes = min_free_bytes
+        self.protect_seconds = protect_seconds
+        self.evictions = 0
+
+    def set_session_owner(self, session_id: str, user: str) -> None:
+        """Attribute a session's files to a user (for per-user quotas)"""
+        self.registry.set_session_owner(session_id, user)
+
+    def register(self, path: str, session_id: str = None, category: str = None) -> Optional[FileRecord]:
+        """
+        Record a written file and enforce quotas (the new file itself is never evicted).
+
+        Returns:
+            FileRecord, or None if the file is missing or outside the managed directories
+        """
+        record = self.registry.register(path, session_id=session_id, category=category)
+        if record is not None:
+            self._enforce_quotas(record)
+        return record
+
+    def _protected_keys(self) -> set:
+        """Keys of artifacts registered or downloaded within protect_seconds"""
+        recent = time.time() - self.protect_seconds
+        return {r.key for r in self.registry.records() if r.last_access >= recent}
+
+    def _evict(self, quota: int, record: FileRecord, **scope) -> None:
+        if self.registry.total_bytes(**scope) <= quota:
+            return
+        protected = self._protected_keys() | {record.key}
+        evicted, _ = self.retention.evict_to(int(quota * self.retention.quota_target), only_if_over=quota,
+                                             exclude=protected, **scope)
+        self.evictions += evicted
+        if self.registry.total_bytes(**scope) > quota:
+            scope_name = ", ".join(f"{k}={v}" for k, v in scope.items()) or "total"
+            print(f"⚠️ Quota still exceeded ({scope_name}) - remaining files are in use")
+
+    def _enforce_quotas(self, record: FileRecord) -> None:
+        try:
+            if self.session_quota_bytes and record.session_id:
+                self._evict(self.session_quota_bytes, record, session_id=record.session_id)
+            if self.user_quota_bytes and record.user:
+                self._evict(self.user_quota_bytes, record, user=record.user)
+            if self.retention.quota_bytes:
+                self._evict(self.retention.quota_bytes, record)
+        except Exception as e:
+            print(f"⚠️ Quota enforcement failed: {e}")
+
+    def free_bytes(self, path: str = None) -> Optional[int]:
+        """Free space on the volume holding path (default: first managed directory)"""
+        try:
+            return shutil.disk_usage(path or self.registry.roots[0]).free
+        except OSError:
+            return None
+
+    def ensure_space(self, needed_bytes: int = 0, path: str = None) -> bool:
+        """
+        Make sure a write of needed_bytes leaves min_free_bytes on the volume, evicting
+        least recently used artifacts if necessary.
+
+        Returns:
+            bool: True if enough space is (now) available
+        """
+        directory = os.path.dirname(path) if path else None
+        free = self.free_bytes(directory if directory and os.path.isdir(directory) else None)
+        if free is None:
+            return True
+        deficit = needed_bytes + self.min_free_bytes - free
+        if deficit <= 0:
+            return True
+        print(f"⚠️ Low disk space ({free / (1024 * 1024):.0f} MB free) - evicting old artifacts")
+        evicted, _ = self.retention.evict_to(max(0, self.registry.total_bytes() - deficit),
+                                             exclude=self._protected_keys())
+        self.evictions += evicted
+        free = self.free_bytes(directory if directory and os.path.isdir(directory) else None)
+        return free is None or free - needed_bytes >= self.min_free_bytes
+
+    def write_bytes(self, path: str, data: Union[bytes, str], session_id: str = None,
+                    category: str = None) -> Optional[FileRecord]:
+        """
+        Atomically write a file (temp file + rename) and register it.
+
+        Space is checked first; if the disk still fills up mid-write, artifacts are evicted
+        and the write is retried once.
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self.ensure_space(len(data), path)
+        tmp_path = f"{path}.tmp"
+        for attempt in range(2):
+            try:
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+                break
+            except OSError as e:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                if e.errno != errno.ENOSPC or attempt:
+                    raise
+                print("⚠️ Disk full while writing - evicting old artifacts and retrying")
+                self.ensure_space(2 * len(data), path)
+        return self.register(path, session_id=session_id, category=category)
+
+    def usage(self) -> Dict[str, Any]:
+        """Storage usage and limits (for /health)"""
+        stats = self.registry.stats()
+        free = self.free_bytes()
+        return {
+            "files": stats.pop("files"),
+            "bytes": stats.pop("bytes"),
+            "by_category": stats,
+            "top": self.registry.top_owners(5),
+            "free_bytes": free,
+            "quotas": {
+                "total_bytes": self.retention.quota_bytes or None,
+                "session_bytes": self.session_quota_bytes or None,
+                "user_bytes": self.user_quota_bytes or None,
+                "min_free_bytes": self.min_free_bytes,
+            },
+            "quota_evictions": self.evictions,
+        }
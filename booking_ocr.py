@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Booking Number OCR
+==================
+
+Single-pass OCR helpers for booking number extraction with:
+- Tesseract availability probed once and cached
+- One image_to_data pass per image; every strategy reuses the word boxes
+- Content-hash keyed LRU cache so identical re-captured images are not re-OCRed
+- OCR and color analysis run in a media worker process when a pool is given
+- Shared booking number patterns
+"""
+
+import io
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
+
+from step_metrics import metrics
+
+
+# Booking numbers: letters and digits, typically 8-12 characters
+BOOKING_PATTERNS = [
+    re.compile(r'[A-Z]{2,4}[A-Z0-9]{6,10}'),  # Pattern like RICFEM857500
+    re.compile(r'[A-Z0-9]{8,12}'),            # General alphanumeric
+    re.compile(r'[A-Z]{3,6}[0-9]{4,8}'),      # Letters followed by numbers
+]
+
+_probe_lock = threading.Lock()
+_probe_result: Optional[Tuple[bool, Optional[str]]] = None
+
+
+def tesseract_available(refresh: bool = False) -> Tuple[bool, Optional[str]]:
+    """
+    Check (once) whether pytesseract and the tesseract binary are usable.
+
+    Args:
+        refresh: Probe again instead of returning the cached answer
+
+    Returns:
+        (available, error message or None)
+    """
+    global _probe_result
+    with _probe_lock:
+        if _probe_result is None or refresh:
+            try:
+                import pytesseract
+                version = pytesseract.get_tesseract_version()
+                _probe_result = (True, None)
+                print(f"✅ Tesseract OCR available (version {version})")
+            except Exception as e:
+                _probe_result = (False, str(e))
+        return _probe_result
+
+
+def image_digest(image_bytes: bytes) -> str:
+    """Content hash of an encoded image"""
+    return hashlib.sha1(image_bytes).hexdigest()
+
+
+class OcrResultCache:
+    """
+    Thread-safe LRU cache of OCR results keyed by image content hash.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        """
+        Initialize OCR cache
+
+        Args:
+            max_entries (int): Images remembered before the least recently used is dropped
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        """Entry count plus hit/miss counters"""
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# Shared cache used by the API
+ocr_cache = OcrResultCache()
+
+
+def analyze_image_bytes(image_bytes: bytes) -> Dict[str, Any]:
+    """
+    Run Tesseract once over an encoded image and measure how blue each word is.
+
+    Module-level so it can run in a media worker process.
+
+    Returns:
+        Dict with width, height and words: list of
+        {text, left, top, width, height, block, par, line, blue_ratio}
+    """
+    import numpy as np
+    import cv2
+    import pytesseract
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+    img_cv = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+
+    data = pytesseract.image_to_data(img_cv, output_type=pytesseract.Output.DICT)
+
+    # Blue text mask (booking numbers are often rendered as blue links)
+    hsv = cv2.cvtColor(img_cv, cv2.COLOR_BGR2HSV)
+    blue_mask = cv2.inRange(hsv, np.array([100, 50, 50]), np.array([130, 255, 255]))
+
+    words = []
+    for i, text in enumerate(data['text']):
+        text = (text or '').strip()
+        if not text:
+            continue
+        left, top = data['left'][i], data['top'][i]
+        width, height = data['width'][i], data['height'][i]
+        box = blue_mask[top:top + height, left:left + width]
+        words.append({
+            "text": text,
+            "left": left,
+            "top": top,
+            "width": width,
+            "height": height,
+            "block": data['block_num'][i],
+            "par": data['par_num'][i],
+            "line": data['line_num'][i],
+            "blue_ratio": float(np.count_nonzero(box)) / box.size if box.size else 0.0,
+        })
+
+    return {"width": img_cv.shape[1], "height": img_cv.shape[0], "words": words}
+
+
+def ocr_image(image_bytes: bytes, pool=None, cache: Optional[OcrResultCache] = ocr_cache) -> Dict[str, Any]:
+    """
+    OCR an encoded image once, using the cache and (optionally) a worker pool.
+
+    Args:
+        image_bytes: PNG/JPEG bytes
+        pool: MediaWorkerPool to run the analysis in (None runs it on this thread)
+        cache: Result cache (None disables caching)
+
+    Returns:
+        Result of analyze_image_bytes
+    """
+    key = image_digest(image_bytes) if cache is not None else None
+    if key:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    with metrics.span("ocr_image_to_data"):
+        if pool is not None:
+            result = pool.submit(analyze_image_bytes, image_bytes).result()
+        else:
+            result = analyze_image_bytes(image_bytes)
+
+    if key:
+        cache.put(key, result)
+    return result
+
+
+def words_to_text(words: List[Dict[str, Any]]) -> str:
+    """Rebuild text from word boxes, one output line per Tesseract line"""
+    lines: "OrderedDict[tuple, list]" = OrderedDict()
+    for word in words:
+        lines.setdefault((word["block"], word["par"], word["line"]), []).append(word["text"])
+    return "\n".join(" ".join(parts) for parts in lines.values())
+
+
+def find_booking_number(text: str) -> Optional[str]:
+    """First booking-number-like token in the text (at least 8 characters)"""
+    for pattern in BOOKING_PATTERNS:
+        for match in pattern.findall(text):
+            if len(match) >= 8:
+                return match
+    return None
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Container Snapshot Store
+========================
+
+Keeps the last scraped container list per account so repeat polls can get
+only what changed:
+- Snapshots indexed by container ID
+- Field-level diff (added / removed / changed rows)
+- Small per-account history so clients can diff against a recent snapshot
+"""
+
+import uuid
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+
+@dataclass
+class ContainerSnapshot:
+    """One scrape of an account's containers grid"""
+    snapshot_id: str
+    account_key: str
+    created_at: datetime
+    rows: Dict[str, Dict[str, str]] = field(default_factory=dict)  # container ID -> row
+
+
+def diff_container_rows(old_rows: Dict[str, Dict[str, str]], new_rows: Dict[str, Dict[str, str]],
+                        columns: List[str]) -> Dict[str, Any]:
+    """
+    Compare two snapshots field by field.
+
+    Args:
+        old_rows: Previous snapshot rows (container ID -> row)
+        new_rows: Current snapshot rows (container ID -> row)
+        columns: Columns to compare
+
+    Returns:
+        Dict with added (rows), removed (container IDs), changed (container ID, row, field changes)
+        and unchanged_count
+    """
+    added = [row for cid, row in new_rows.items() if cid not in old_rows]
+    removed = [cid for cid in old_rows if cid not in new_rows]
+    changed = []
+    unchanged_count = 0
+
+    for cid, row in new_rows.items():
+        old = old_rows.get(cid)
+        if old is None:
+            continue
+        changes = {}
+        for col in columns:
+            old_value = old.get(col, '')
+            new_value = row.get(col, '')
+            if old_value != new_value:
+                changes[col] = {"old": old_value, "new": new_value}
+        if changes:
+            changed.append({"container_id": cid, "changes": changes, "row": row})
+        else:
+            unchanged_count += 1
+
+    return {
+        "added": added,
+        "removed": removed,
+        "changed": changed,
+        "unchanged_count": unchanged_count
+    }
+
+
+class SnapshotStore:
+    """
+    Thread-safe in-memory snapshot history per account.
+    """
+
+    def __init__(self, history_per_account: int = 3):
+        """
+        Initialize snapshot store
+
+        Args:
+            history_per_account (int): Snapshots kept per account (oldest dropped first)
+        """
+        self.history_per_account = history_per_account
+        self._snapshots: Dict[str, List[ContainerSnapshot]] = {}
+        self._lock = threading.Lock()
+
+    def save(self, account_key: str, rows: Dict[str, Dict[str, str]]) -> ContainerSnapshot:
+        """Store a new snapshot for the account and return it"""
+        snapshot = ContainerSnapshot(
+            snapshot_id=f"snap_{uuid.uuid4().hex[:16]}",
+            account_key=account_key,
+            created_at=datetime.now(),
+            rows=rows
+        )
+        with self._lock:
+            history = self._snapshots.setdefault(account_key, [])
+            history.append(snapshot)
+            del history[:-self.history_per_account]
+        return snapshot
+
+    def get(self, account_key: str, snapshot_id: str) -> Optional[ContainerSnapshot]:
+        """Find a snapshot by ID (only within the same account)"""
+        with self._lock:
+            for snapshot in self._snapshots.get(account_key, []):
+                if snapshot.snapshot_id == snapshot_id:
+                    return snapshot
+        return None
+
+    def latest(self, account_key: str) -> Optional[ContainerSnapshot]:
+        """Most recent snapshot for the account"""
+        with self._lock:
+            history = self._snapshots.get(account_key)
+            return history[-1] if history else None
+
+    def count(self) -> int:
+        """Total snapshots held"""
+        with self._lock:
+            return sum(len(history) for history in self._snapshots.values())
+
+
+class KnownIdFilter:
+    """
+    Set of container IDs a client already has, for watermark early-stop scrolling.
+
+    Accepts either a plain list of IDs or a Bloom filter digest so large
+    histories do not have to be sent in full. Digest format:
+        {"m": <bit count>, "k": <hash count>, "bits": <base64 bit array, LSB first>}
+    Bit positions are (h1 + i * h2) % m for i in range(k), where h1 and h2 are
+    the first and second 8 bytes (big-endian) of sha256(container_id).
+    """
+
+    def __init__(self, ids=None, bloom: Optional[Dict[str, Any]] = None):
+        """
+        Raises:
+            ValueError: If ids is not a list of IDs or the Bloom digest is malformed
+        """
+        if isinstance(ids, (str, bytes, dict)) or (ids is not None and not hasattr(ids, '__iter__')):
+            raise ValueError("known_ids must be a list of container IDs")
+        self._ids = set(ids or [])
+        self._bits = None
+        self._m = 0
+        self._k = 0
+        if bloom:
+            self._bits, self._m, self._k = self._parse_bloom(bloom)
+
+    @staticmethod
+    def _parse_bloom(bloom) -> tuple:
+        import base64
+        import binascii
+        if not isinstance(bloom, dict):
+            raise ValueError("known_ids_bloom must be an object with m, k and bits")
+        missing = [key for key in ("m", "k", "bits") if key not in bloom]
+        if missing:
+            raise ValueError(f"known_ids_bloom is missing: {', '.join(missing)}")
+        try:
+            m = int(bloom["m"])
+            k = int(bloom["k"])
+        except (TypeError, ValueError):
+            raise ValueError("known_ids_bloom m and k must be integers")
+        if m <= 0 or k <= 0:
+            raise ValueError("known_ids_bloom m and k must be positive")
+        try:
+            bits = base64.b64decode(bloom["bits"], validate=True)
+        except (TypeError, ValueError, binascii.Error):
+            raise ValueError("known_ids_bloom bits must be base64")
+        if len(bits) * 8 < m:
+            raise ValueError(f"known_ids_bloom bits hold {len(bits) * 8} bits, m is {m}")
+        return bits, m, k
+
+    def __bool__(self) -> bool:
+        return bool(self._ids) or self._bits is not None
+
+    def _bloom_contains(self, container_id: str) -> bool:
+        import hashlib
+        digest = hashlib.sha256(container_id.encode()).digest()
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:16], 'big')
+        for i in range(self._k):
+            pos = (h1 + i * h2) % self._m
+            if not self._bits[pos // 8] & (1 << (pos % 8)):
+                return False
+        return True
+
+    def __contains__(self, container_id: str) -> bool:
+        if container_id in self._ids:
+            return True
+        if self._bits is not None and self._m:
+            return self._bloom_contains(container_id)
+        return False
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Debug Bundle Builder
+====================
+
+One ZIP builder for every endpoint's debug/failure bundle:
+- Already-compressed files (PNG, JPEG, XLSX, ZIP, GZ) stored with ZIP_STORED;
+  text and logs deflated
+- Entries appended while the operation runs (screenshots go in as soon as
+  they are annotated, straight from memory), so closing is the only tail cost
+- Written under a ".part" name and renamed into place when finalized
+- stream_bundle() yields the ZIP in chunks for HTTP responses (no temp file)
+"""
+
+import os
+import zipfile
+import threading
+from typing import Iterable, Iterator, Tuple, Union
+
+
+# Extensions whose content is already compressed; deflating them again only burns CPU
+STORED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp', '.zip', '.xlsx', '.gz', '.parquet'}
+
+# Files never bundled (in-progress writes)
+SKIPPED_SUFFIXES = ('.tmp', '.part')
+
+
+def compress_type_for(name: str) -> int:
+    """ZIP_STORED for already-compressed formats, ZIP_DEFLATED otherwise"""
+    return zipfile.ZIP_STORED if os.path.splitext(name)[1].lower() in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+
+
+def _arcname(*parts: str) -> str:
+    """Join archive path parts with forward slashes (ZIP convention on every OS)"""
+    return "/".join(p.replace(os.sep, "/").strip("/") for p in parts if p)
+
+
+def iter_directory(directory: str, prefix: str) -> Iterator[Tuple[str, str]]:
+    """(file path, archive name) for every file below a directory, archive names under prefix"""
+    if not directory or not os.path.isdir(directory):
+        return
+    for root, _, files in os.walk(directory):
+        for f in sorted(files):
+            if f.endswith(SKIPPED_SUFFIXES):
+                continue
+            fp = os.path.join(root, f)
+            yield fp, _arcname(prefix, os.path.relpath(fp, directory))
+
+
+class DebugBundle:
+    """
+    Incrementally built ZIP file (thread-safe appends).
+    """
+
+    def __init__(self, path: str, root: str = ""):
+        """
+        Initialize debug bundle
+
+        Args:
+            path (str): Working file path (renamed by finalize())
+            root (str): Top-level folder for every entry inside the ZIP ("" = none)
+        """
+        self.path = path
+        self.root = root
+        self._zf = zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED)
+        self._names = set()
+        self._lock = threading.Lock()
+
+    @property
+    def closed(self) -> bool:
+        return self._zf is None
+
+    def _add(self, arcname: str, write) -> bool:
+        name = _arcname(self.root, arcname)
+        with self._lock:
+            if self._zf is None or name in self._names:
+                return False
+            write(self._zf, name)
+            self._names.add(name)
+            return True
+
+    def add_file(self, file_path: str, arcname: str) -> bool:
+        """Append a file from disk (skipped if the name is already in the bundle)"""
+        return self._add(arcname, lambda zf, name: zf.write(file_path, name, compress_type=compress_type_for(name)))
+
+    def add_bytes(self, arcname: str, data: Union[bytes, str]) -> bool:
+        """Append in-memory content (skipped if the name is already in the bundle)"""
+        return self._add(arcname, lambda zf, name: zf.writestr(name, data, compress_type=compress_type_for(name)))
+
+    def add_directory(self, directory: str, prefix: str) -> int:
+        """Append every file below a directory under prefix; returns the number added"""
+        added = 0
+        for fp, arcname in iter_directory(directory, prefix):
+            try:
+                if self.add_file(fp, arcname):
+                    added += 1
+            except Exception as e:
+                print(f"⚠️ Could not add {fp} to bundle: {e}")
+        return added
+
+    def close(self) -> None:
+        with self._lock:
+            if self._zf is not None:
+                self._zf.close()
+                self._zf = None
+
+    def finalize(self, final_path: str) -> str:
+        """Close the ZIP and move it to its final name; returns final_path"""
+        self.close()
+        if final_path != self.path:
+            os.replace(self.path, final_path)
+            self.path = final_path
+        return final_path
+
+    def discard(self) -> None:
+        """Close and delete an unfinished bundle"""
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class _ChunkSink:
+    """Write-only file object collecting ZIP output until the generator yields it"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> Iterator[bytes]:
+        chunks, self._chunks = self._chunks, []
+        if chunks:
+            yield b"".join(chunks)
+
+
+def stream_bundle(entries: Iterable[Tuple[str, Union[str, bytes]]]) -> Iterator[bytes]:
+    """
+    Build a ZIP on the fly and yield it in chunks (one or more per entry).
+
+    Args:
+        entries: (archive name, file path or bytes) pairs; may be a lazy iterator
+
+    Yields:
+        ZIP file bytes, suitable for a streamed HTTP response
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for arcname, source in entries:
+            try:
+                if isinstance(source, (bytes, bytearray)):
+                    zf.writestr(arcname, bytes(source), compress_type=compress_type_for(arcname))
+                else:
+                    zf.write(source, arcname, compress_type=compress_type_for(arcname))
+            except Exception as e:
+                print(f"⚠️ Could not stream {arcname}: {e}")
+            yield from sink.drain()
+    yield from sink.drain()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Diagnostics Dumps
+=================
+
+Optional debug text dumps (raw copied grid text, parsing reports):
+- Levels: off (production default, nothing written), basic (small parsing
+  report), full (also the raw page text and a download folder listing)
+- Level from server config, overridable per request ("diagnostics" field)
+- Written on a background thread so the request never waits on disk I/O
+- Gzip-streamed in chunks (".gz"), written under ".tmp" and renamed into place
+- Bounded backlog: dumps are dropped, not queued, when the writer falls behind
+"""
+
+import os
+import gzip
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional
+
+
+OFF, BASIC, FULL = 0, 1, 2
+LEVELS = {"off": OFF, "basic": BASIC, "full": FULL}
+
+CHUNK_CHARS = 1024 * 1024  # Text written per gzip chunk
+
+
+def parse_level(value, default: int = OFF) -> int:
+    """
+    Diagnostics level from a request or environment value.
+
+    Accepts "off"/"basic"/"full", 0-2, or a boolean (True = full).
+    Unknown values fall back to default.
+    """
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return FULL if value else OFF
+    if isinstance(value, int):
+        return max(OFF, min(FULL, value))
+    text = str(value).strip().lower()
+    if text in LEVELS:
+        return LEVELS[text]
+    if text.isdigit():
+        return max(OFF, min(FULL, int(text)))
+    if text in ("true", "yes", "on"):
+        return FULL
+    if text in ("false", "no", "none"):
+        return OFF
+    return default
+
+
+def level_name(level: int) -> str:
+    """"off", "basic" or "full" """
+    for name, value in LEVELS.items():
+        if value == level:
+            return name
+    return "off"
+
+
+def iter_chunks(text: str, size: int = CHUNK_CHARS) -> Iterator[str]:
+    """Slice a large string into chunks for streamed writing"""
+    for start in range(0, len(text), size):
+        yield text[start:start + size]
+
+
+class DiagnosticsWriter:
+    """
+    Single background thread writing diagnostic dumps.
+    """
+
+    def __init__(self, compress: bool = True, max_pending: int = 8):
+        """
+        Initialize diagnostics writer
+
+        Args:
+            compress (bool): Gzip dumps (".gz" is appended to the file name)
+            max_pending (int): Dumps queued or being written before new ones are dropped
+        """
+        self.compress = compress
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="diagnostics")
+            return self._executor
+
+    def target_path(self, path: str) -> str:
+        """File name the dump for path is written to"""
+        return f"{path}.gz" if self.compress and not path.endswith(".gz") else path
+
+    def submit(self, path: str, chunks: Callable[[], Iterable[str]],
+               on_written: Callable[[str], None] = None) -> Optional[Future]:
+        """
+        Write a text dump in the background.
+
+        Args:
+            path: Destination (".gz" appended when compressing)
+            chunks: Called on the writer thread; returns the text in pieces
+            on_written: Called with the final path once the file is in place
+
+        Returns:
+            Future resolving to the final path (None if writing failed),
+            or None if the dump was dropped because the writer is backed up
+        """
+        if not self._slots.acquire(blocking=False):
+            self.dropped += 1
+            print(f"⚠️ Diagnostics writer busy, skipping {os.path.basename(path)}")
+            return None
+        try:
+            future = self._get_executor().submit(self._write, self.target_path(path), chunks, on_written)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    @staticmethod
+    def _write(path: str, chunks: Callable[[], Iterable[str]],
+               on_written: Callable[[str], None] = None) -> Optional[str]:
+        tmp_path = f"{path}.tmp"
+        try:
+            if path.endswith(".gz"):
+                f = gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=6)
+            else:
+                f = open(tmp_path, 'w', encoding='utf-8')
+            with f:
+                for chunk in chunks():
+                    f.write(chunk)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"⚠️ Could not write diagnostics file {os.path.basename(path)}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return None
+        if on_written is not None:
+            try:
+                on_written(path)
+            except Exception as e:
+                print(f"⚠️ Diagnostics callback failed for {os.path.basename(path)}: {e}")
+        return path
@@ -12,17 +12,21 @@ Flask API for E-Modal business operations with persistent browser sessions:
 
 import os
 import time
+import errno
+import functools
 import tempfile
 import threading
 import re
 from datetime import datetime, timedelta
-from flask import Flask, request, jsonify, send_file
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+import io
+from flask import Flask, request, jsonify, send_file, has_request_context
 from dataclasses import dataclass
 from typing import Optional, Dict, Any
 import logging
 import shutil
-from PIL import Image, ImageDraw, ImageFont
-import zipfile
 
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -34,6 +38,19 @@ from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
 from emodal_login_handler import EModalLoginHandler
 from recaptcha_handler import RecaptchaHandler
+from job_manager import JobManager, report_progress, set_progress_listener
+from container_snapshots import SnapshotStore, KnownIdFilter, diff_container_rows
+from step_metrics import metrics
+import booking_ocr
+import screenshot_annotator
+from media_workers import MediaWorkerPool
+from debug_bundle import DebugBundle, iter_directory, stream_bundle
+from file_registry import FileRegistry
+from retention import RetentionManager
+from artifact_store import ArtifactStore
+import diagnostics
+import export_writers
+from row_stream import RowStream, StreamingRowSink, set_current_stream
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -41,24 +58,81 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
-# Global session storage
-active_sessions = {}
+# Global session storage (see SessionRegistry below)
 session_timeout = 1800  # 30 minutes (not used for keep-alive sessions)
-MAX_CONCURRENT_SESSIONS = 10  # Maximum Chrome windows allowed
+MAX_CONCURRENT_SESSIONS = int(os.environ.get('EMODAL_MAX_SESSIONS', '10'))  # Maximum Chrome windows allowed
 
 # Persistent sessions with keep-alive and credential mapping
-persistent_sessions = {}  # Maps credentials hash to session_id
 session_refresh_interval = 120  # 2 minutes - refresh session to keep it alive (increased frequency for 401 detection)
 
 # Appointment sessions with extended timeout for multi-phase operations
-appointment_sessions = {}
 appointment_session_timeout = 600  # 10 minutes for error recovery
 
+# How long a request waits for another request using the same browser session
+session_lock_timeout = 900  # 15 minutes (bulk operations can run long)
+
+# Warm pool of launched-but-unauthenticated browsers (login page already loaded)
+WARM_POOL_SIZE = int(os.environ.get('EMODAL_WARM_POOL_SIZE', '2'))
+warm_driver_max_age = 900  # 15 minutes - recycle idle warm browsers before the login page goes stale
+warm_driver_handoff_timeout = 600  # 10 minutes - longest login a handed-out warm browser is counted for
+
+# Background jobs for long-running endpoints ("async": true in the request body)
+JOB_WORKERS = int(os.environ.get('EMODAL_JOB_WORKERS', str(MAX_CONCURRENT_SESSIONS)))
+job_manager = JobManager(max_workers=JOB_WORKERS, job_ttl=3600)  # Finished jobs kept 1 hour
+
+# Last scraped container lists per account (for /get_containers delta sync)
+container_snapshots = SnapshotStore(history_per_account=3)
+
+# Process pool for CPU-bound image work (screenshot annotation, OCR); 0 = run inline
+MEDIA_WORKERS = int(os.environ.get('EMODAL_MEDIA_WORKERS', str(min(4, os.cpu_count() or 1))))
+media_pool = MediaWorkerPool(max_workers=MEDIA_WORKERS, max_pending=32,
+                             initializer=screenshot_annotator.preload_assets)
+# Disk writes, quota eviction and bundle appends for finished screenshots; kept off the
+# process pool's result thread so one slow disk cannot stall every other annotation
+screenshot_io = ThreadPoolExecutor(max_workers=2, thread_name_prefix="screenshot-io")
+
 DOWNLOADS_DIR = os.path.join(os.getcwd(), "downloads")
 os.makedirs(DOWNLOADS_DIR, exist_ok=True)
 SCREENSHOTS_DIR = os.path.join(os.getcwd(), "screenshots")
 os.makedirs(SCREENSHOTS_DIR, exist_ok=True)
 
+# File retention: hours per artifact category (24h default), optional total storage quota
+RETENTION_HOURS = {
+    category: float(os.environ.get(f'EMODAL_RETENTION_HOURS_{category.upper()}', '24'))
+    for category in ("export", "bundle", "screenshot", "debug", "download")
+}
+STORAGE_QUOTA_MB = int(os.environ.get('EMODAL_STORAGE_QUOTA_MB', '0'))  # 0 = no quota
+FILE_CLEANUP_INTERVAL = 300  # Expired files are deleted every 5 minutes (cheap: index-driven)
+FILE_RECONCILE_INTERVAL = 24 * 3600  # Full directory walk once a day for files written outside the registry
+
+# Every produced artifact (Excel, ZIP, screenshots, debug text) for O(1) /files lookups and retention
+file_registry = FileRegistry(
+    [DOWNLOADS_DIR, SCREENSHOTS_DIR],
+    category_ttls={category: int(hours * 3600) for category, hours in RETENTION_HOURS.items()}
+)
+retention_manager = RetentionManager(file_registry, quota_bytes=STORAGE_QUOTA_MB * 1024 * 1024)
+
+# Per-session / per-user storage quotas (LRU eviction on write) and free-space reserve
+SESSION_QUOTA_MB = int(os.environ.get('EMODAL_SESSION_QUOTA_MB', '0'))  # 0 = unlimited
+USER_QUOTA_MB = int(os.environ.get('EMODAL_USER_QUOTA_MB', '0'))  # 0 = unlimited
+MIN_FREE_DISK_MB = int(os.environ.get('EMODAL_MIN_FREE_DISK_MB', '256'))
+artifact_store = ArtifactStore(
+    file_registry, retention_manager,
+    session_quota_bytes=SESSION_QUOTA_MB * 1024 * 1024,
+    user_quota_bytes=USER_QUOTA_MB * 1024 * 1024,
+    min_free_bytes=MIN_FREE_DISK_MB * 1024 * 1024
+)
+_files_indexed = threading.Event()  # Set once files from before this process have been indexed
+
+# Debug text dumps (copied_text / parsing_debug): off in production, overridable per request
+# ("diagnostics": off|basic|full; "debug": true implies full) up to EMODAL_DIAGNOSTICS_MAX
+DIAGNOSTICS_LEVEL = diagnostics.parse_level(os.environ.get('EMODAL_DIAGNOSTICS'), diagnostics.OFF)
+DIAGNOSTICS_MAX = diagnostics.parse_level(os.environ.get('EMODAL_DIAGNOSTICS_MAX'), diagnostics.FULL)
+diagnostics_writer = diagnostics.DiagnosticsWriter(compress=os.environ.get('EMODAL_DIAGNOSTICS_GZIP', '1') == '1')
+
+# Let a fronting web server (nginx X-Accel / Apache X-Sendfile) stream /files
+app.config['USE_X_SENDFILE'] = os.environ.get('EMODAL_X_SENDFILE', '0') == '1'
+
 
 @dataclass
 class BrowserSession:
@@ -72,6 +146,7 @@ class BrowserSession:
     credentials_hash: str = None  # Hash of username+password for matching
     last_refresh: datetime = None  # Last time session was refreshed
     in_use: bool = False  # Flag to prevent refresh during active operations
+    profile_dir: str = None  # Temporary Chrome profile owned by this session (worker sessions)
     
     def is_expired(self) -> bool:
         """Check if session has expired"""
@@ -90,8 +165,9 @@ class BrowserSession:
         return (datetime.now() - self.last_refresh).seconds > session_refresh_interval
     
     def update_last_used(self):
-        """Update last used timestamp"""
+        """Update last used timestamp (and move the session to the MRU end of the registry)"""
         self.last_used = datetime.now()
+        session_registry.touch(self.session_id)
     
     def update_last_refresh(self):
         """Update last refresh timestamp"""
@@ -126,6 +202,299 @@ class AppointmentSession:
         self.last_used = datetime.now()
 
 
+class SessionRegistry:
+    """
+    Thread-safe store for browser and appointment sessions.
+    
+    All lookups and mutations of the session maps go through one registry lock,
+    and every browser session gets its own lock so concurrent requests for the
+    same session queue instead of driving the same Chrome window at once.
+    
+    Browser sessions are kept in least-recently-used order (oldest first), so
+    finding an eviction victim does not scan every session.
+    """
+    
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.active = OrderedDict()  # session_id -> BrowserSession, LRU first
+        self.persistent = {}  # credentials hash -> session_id
+        self.appointments = {}  # appointment session_id -> AppointmentSession
+        self._lock = threading.RLock()
+        self._session_locks = {}  # session_id -> threading.Lock
+        self._eviction_hooks = []  # callables (session, reason)
+    
+    def get(self, session_id: str) -> Optional[BrowserSession]:
+        """Get a browser session by ID"""
+        with self._lock:
+            return self.active.get(session_id)
+    
+    def get_by_credentials(self, cred_hash: str) -> Optional[BrowserSession]:
+        """Get the persistent browser session for a credentials hash"""
+        with self._lock:
+            session_id = self.persistent.get(cred_hash)
+            return self.active.get(session_id) if session_id else None
+    
+    def add(self, session: BrowserSession):
+        """Register a browser session (and its credentials mapping) atomically"""
+        with self._lock:
+            self.active[session.session_id] = session
+            self._session_locks.setdefault(session.session_id, threading.Lock())
+            if session.credentials_hash:
+                self.persistent[session.credentials_hash] = session.session_id
+    
+    def remove(self, session_id: str, quit_driver: bool = False) -> Optional[BrowserSession]:
+        """
+        Remove a browser session and its credentials mapping atomically.
+        
+        Args:
+            session_id: Session to remove
+            quit_driver: Also close the browser
+        
+        Returns:
+            The removed session, or None if it was not registered
+        """
+        with self._lock:
+            session = self.active.pop(session_id, None)
+            if session is None:
+                return None
+            if session.credentials_hash and self.persistent.get(session.credentials_hash) == session_id:
+                del self.persistent[session.credentials_hash]
+            # A held session lock is dropped on its last release so queued requests can drain
+            lock = self._session_locks.get(session_id)
+            if lock is not None and not lock.locked():
+                del self._session_locks[session_id]
+        
+        if quit_driver:
+            try:
+                session.driver.quit()
+            except:
+                pass
+        return session
+    
+    def touch(self, session_id: str):
+        """Mark a session as most recently used"""
+        with self._lock:
+            if session_id in self.active:
+                self.active.move_to_end(session_id)
+    
+    def has_capacity(self) -> bool:
+        """Check if another browser session fits under the capacity"""
+        with self._lock:
+            return len(self.active) < self.capacity
+    
+    def add_eviction_hook(self, hook):
+        """
+        Register a callback run after a session is evicted.
+        
+        Args:
+            hook: Callable taking (session, reason)
+        """
+        self._eviction_hooks.append(hook)
+    
+    def get_lru(self) -> Optional[BrowserSession]:
+        """Least recently used session that no request is currently using"""
+        with self._lock:
+            for session_id, session in self.active.items():
+                if session.in_use or self.is_locked(session_id):
+                    continue
+                return session
+        return None
+    
+    def evict_lru(self, reason: str = "capacity") -> Optional[BrowserSession]:
+        """
+        Remove the least recently used idle session and close its browser.
+        
+        Sessions that are in use (or held by a request) are never evicted.
+        
+        Returns:
+            The evicted session, or None if every session is busy
+        """
+        victim = None
+        with self._lock:
+            for session_id, session in self.active.items():
+                if session.in_use:
+                    continue
+                # Hold the session lock so no request grabs it mid-eviction
+                if not self.try_acquire(session_id):
+                    continue
+                victim = session
+                break
+            if victim:
+                self.remove(victim.session_id)
+                self.release(victim.session_id)
+        
+        if victim is None:
+            return None
+        
+        try:
+            victim.driver.quit()
+        except Exception as e:
+            logger.warning(f"  ⚠️ Error closing browser: {e}")
+        
+        for hook in self._eviction_hooks:
+            try:
+                hook(victim, reason)
+            except Exception as e:
+                logger.warning(f"Eviction hook failed: {e}")
+        return victim
+    
+    def items(self) -> list:
+        """Snapshot of (session_id, BrowserSession) pairs (LRU first), safe to iterate while others mutate"""
+        with self._lock:
+            return list(self.active.items())
+    
+    def count(self) -> int:
+        """Number of active browser sessions"""
+        with self._lock:
+            return len(self.active)
+    
+    def clear(self):
+        """Forget all sessions (emergency recovery)"""
+        with self._lock:
+            self.active.clear()
+            self.persistent.clear()
+            self.appointments.clear()
+    
+    def acquire(self, session_id: str, timeout: float = None) -> bool:
+        """
+        Take the per-session lock, waiting for other requests using the session.
+        
+        Returns:
+            True if acquired, False on timeout or if the session no longer exists
+        """
+        with self._lock:
+            lock = self._session_locks.get(session_id)
+        if lock is None:
+            return False
+        if timeout is None:
+            acquired = lock.acquire()
+        else:
+            acquired = lock.acquire(timeout=timeout)
+        
+        # Session may have been evicted while we waited
+        if acquired and self.get(session_id) is None:
+            self._drop_session_lock(session_id, lock)
+            lock.release()
+            return False
+        return acquired
+    
+    def _drop_session_lock(self, session_id: str, lock) -> None:
+        """Forget the lock of a removed session (a re-added session keeps its new lock)"""
+        with self._lock:
+            if session_id not in self.active and self._session_locks.get(session_id) is lock:
+                del self._session_locks[session_id]
+    
+    def try_acquire(self, session_id: str) -> bool:
+        """Take the per-session lock only if nobody is using the session"""
+        with self._lock:
+            lock = self._session_locks.get(session_id)
+        return lock.acquire(blocking=False) if lock else False
+    
+    def release(self, session_id: str):
+        """Release the per-session lock"""
+        with self._lock:
+            lock = self._session_locks.get(session_id)
+            if lock:
+                self._drop_session_lock(session_id, lock)
+        if lock and lock.locked():
+            try:
+                lock.release()
+            except RuntimeError:
+                pass
+    
+    def is_locked(self, session_id: str) -> bool:
+        """Check if a request currently holds the session"""
+        with self._lock:
+            lock = self._session_locks.get(session_id)
+        return bool(lock and lock.locked())
+    
+    def add_appointment(self, appt_session: AppointmentSession):
+        """Register an appointment workflow session"""
+        with self._lock:
+            self.appointments[appt_session.session_id] = appt_session
+    
+    def get_appointment(self, session_id: str) -> Optional[AppointmentSession]:
+        """Get an appointment workflow session by ID"""
+        with self._lock:
+            return self.appointments.get(session_id)
+    
+    def remove_appointment(self, session_id: str) -> Optional[AppointmentSession]:
+        """Remove an appointment workflow session"""
+        with self._lock:
+            return self.appointments.pop(session_id, None)
+    
+    def appointment_items(self) -> list:
+        """Snapshot of (session_id, AppointmentSession) pairs"""
+        with self._lock:
+            return list(self.appointments.items())
+
+
+session_registry = SessionRegistry(capacity=MAX_CONCURRENT_SESSIONS)
+
+# Eviction counters by reason (reported in /health)
+session_eviction_counts = {}
+
+
+def _count_eviction(session: BrowserSession, reason: str):
+    session_eviction_counts[reason] = session_eviction_counts.get(reason, 0) + 1
+
+
+session_registry.add_eviction_hook(_count_eviction)
+
+# Read-only views kept for existing code (mutate through session_registry)
+active_sessions = session_registry.active
+persistent_sessions = session_registry.persistent  # Maps credentials hash to session_id
+appointment_sessions = session_registry.appointments
+
+
+def acquire_session_for_request(session_id: str) -> bool:
+    """
+    Hold a browser session for the current Flask request.
+    
+    Waits (queues) while another request is using the same session. The lock
+    is released automatically in release_request_sessions() at teardown.
+    """
+    from flask import g, has_request_context
+    
+    if has_request_context():
+        held = g.setdefault('held_sessions', set())
+        if session_id in held:
+            return True
+    
+    if not session_registry.acquire(session_id, timeout=session_lock_timeout):
+        return False
+    
+    if has_request_context():
+        g.held_sessions.add(session_id)
+    return True
+
+
+def try_acquire_session_for_request(session_id: str) -> bool:
+    """
+    Hold a browser session for the current Flask request only if no other request is using it.
+    
+    Like acquire_session_for_request() but never waits; released at teardown.
+    """
+    from flask import g, has_request_context
+    
+    if has_request_context():
+        held = g.setdefault('held_sessions', set())
+        if session_id in held:
+            return True
+    
+    if not session_registry.try_acquire(session_id):
+        return False
+    
+    # Session may have been removed between lookup and lock
+    if session_registry.get(session_id) is None:
+        session_registry.release(session_id)
+        return False
+    
+    if has_request_context():
+        g.held_sessions.add(session_id)
+    return True
+
+
 def get_credentials_hash(username: str, password: str) -> str:
     """Generate a hash for credentials to use as a lookup key"""
     import hashlib
@@ -137,97 +506,57 @@ def find_session_by_credentials(username: str, password: str) -> Optional[Browse
     cred_hash = get_credentials_hash(username, password)
     
     # Check persistent sessions map
-    if cred_hash in persistent_sessions:
-        session_id = persistent_sessions[cred_hash]
-        if session_id in active_sessions:
-            session = active_sessions[session_id]
-            
-            # Check if session is expired
-            if session.is_expired():
-                logger.info(f"Session {session_id} is expired, cleaning up...")
-                del persistent_sessions[cred_hash]
-                if session_id in active_sessions:
-                    try:
-                        active_sessions[session_id].driver.quit()
-                    except:
-                        pass
-                    del active_sessions[session_id]
-                return None
-            
-            # Check if session is still alive
-            if not is_session_alive(session):
-                logger.warning(f"Session {session_id} is dead (browser crashed), cleaning up...")
-                del persistent_sessions[cred_hash]
-                if session_id in active_sessions:
-                    del active_sessions[session_id]
-                return None
-            
-            # Session is valid and alive
-            if session.keep_alive:
-                logger.info(f"Found existing persistent session: {session_id} for user: {username}")
-                return session
-            else:
-                # Not a keep-alive session, clean up
-                del persistent_sessions[cred_hash]
-                if session_id in active_sessions:
-                    try:
-                        active_sessions[session_id].driver.quit()
-                    except:
-                        pass
-                    del active_sessions[session_id]
+    session = session_registry.get_by_credentials(cred_hash)
+    if session:
+        session_id = session.session_id
+        
+        # Check if session is expired
+        if session.is_expired():
+            logger.info(f"Session {session_id} is expired, cleaning up...")
+            session_registry.remove(session_id, quit_driver=True)
+            return None
+        
+        # Session is busy with another request - it is alive, the caller will queue on its lock
+        if session_registry.is_locked(session_id):
+            logger.info(f"Found existing persistent session (busy): {session_id} for user: {username}")
+            return session
+        
+        # Check if session is still alive
+        if not is_session_alive(session):
+            logger.warning(f"Session {session_id} is dead (browser crashed), cleaning up...")
+            session_registry.remove(session_id)
+            return None
+        
+        # Session is valid and alive
+        if session.keep_alive:
+            logger.info(f"Found existing persistent session: {session_id} for user: {username}")
+            return session
+        else:
+            # Not a keep-alive session, clean up
+            session_registry.remove(session_id, quit_driver=True)
     
     return None
 
 
 def get_lru_session() -> Optional[BrowserSession]:
-    """Get the Least Recently Used session for eviction"""
-    if not active_sessions:
-        return None
-    
-    # Find session with oldest last_used timestamp
-    lru_session = None
-    oldest_time = None
-    
-    for session_id, session in active_sessions.items():
-        if oldest_time is None or session.last_used < oldest_time:
-            oldest_time = session.last_used
-            lru_session = session
-    
-    return lru_session
+    """Get the Least Recently Used idle session for eviction"""
+    return session_registry.get_lru()
 
 
 def evict_lru_session() -> bool:
     """
-    Evict the Least Recently Used session to make room for a new one.
+    Evict the Least Recently Used idle session to make room for a new one.
     Returns True if a session was evicted, False otherwise.
     """
-    lru_session = get_lru_session()
-    
-    if not lru_session:
-        logger.warning("No LRU session found for eviction")
-        return False
-    
     try:
-        logger.info(f"🗑️ Evicting LRU session: {lru_session.session_id} (user: {lru_session.username}, last_used: {lru_session.last_used})")
+        lru_session = session_registry.evict_lru()
         
-        # Close the browser
-        try:
-            lru_session.driver.quit()
-            logger.info(f"  ✅ Browser closed for session: {lru_session.session_id}")
-        except Exception as e:
-            logger.warning(f"  ⚠️ Error closing browser: {e}")
-        
-        # Remove from persistent_sessions mapping
-        if lru_session.credentials_hash and lru_session.credentials_hash in persistent_sessions:
-            del persistent_sessions[lru_session.credentials_hash]
-            logger.info(f"  ✅ Removed from persistent_sessions")
-        
-        # Remove from active_sessions
-        if lru_session.session_id in active_sessions:
-            del active_sessions[lru_session.session_id]
-            logger.info(f"  ✅ Removed from active_sessions")
+        if not lru_session:
+            logger.warning("No idle LRU session found for eviction (all sessions in use)")
+            return False
         
-        logger.info(f"✅ LRU session evicted successfully. Active sessions: {len(active_sessions)}/{MAX_CONCURRENT_SESSIONS}")
+        logger.info(f"🗑️ Evicted LRU session: {lru_session.session_id} (user: {lru_session.username}, last_used: {lru_session.last_used})")
+        logger.info(f"✅ LRU session evicted successfully. Active sessions: {session_registry.count()}/{session_registry.capacity}")
         return True
         
     except Exception as e:
@@ -238,17 +567,20 @@ def evict_lru_session() -> bool:
 def ensure_session_capacity() -> bool:
     """
     Ensure there's capacity for a new session.
-    If at limit (10 sessions), evict LRU session.
+    If at limit (MAX_CONCURRENT_SESSIONS), evict idle LRU sessions until one slot is free.
     Returns True if capacity is available, False otherwise.
     """
-    current_count = len(active_sessions)
+    current_count = session_registry.count()
     
-    if current_count < MAX_CONCURRENT_SESSIONS:
-        logger.info(f"✅ Session capacity available: {current_count}/{MAX_CONCURRENT_SESSIONS}")
+    if session_registry.has_capacity():
+        logger.info(f"✅ Session capacity available: {current_count}/{session_registry.capacity}")
         return True
     
-    logger.warning(f"⚠️ Session limit reached: {current_count}/{MAX_CONCURRENT_SESSIONS}. Evicting LRU session...")
-    return evict_lru_session()
+    logger.warning(f"⚠️ Session limit reached: {current_count}/{session_registry.capacity}. Evicting LRU session...")
+    while not session_registry.has_capacity():
+        if not evict_lru_session():
+            return False
+    return True
 
 
 def kill_orphaned_chrome_processes():
@@ -261,7 +593,7 @@ def kill_orphaned_chrome_processes():
     try:
         # Get PIDs of active session drivers
         active_pids = set()
-        for session_id, session in active_sessions.items():
+        for session_id, session in session_registry.items():
             try:
                 if hasattr(session.driver, 'service') and hasattr(session.driver.service, 'process'):
                     active_pids.add(session.driver.service.process.pid)
@@ -269,6 +601,9 @@ def kill_orphaned_chrome_processes():
             except Exception as e:
                 logger.debug(f"Could not get PID for session {session_id}: {e}")
         
+        # Warm pool browsers are not sessions yet but must survive cleanup
+        active_pids.update(warm_driver_pool.pids())
+        
         logger.info(f"Active ChromeDriver PIDs: {active_pids}")
         
         # Find and kill orphaned processes
@@ -354,8 +689,8 @@ def kill_all_chrome_instances():
         logger.warning(f"🚨 Emergency recovery killed {killed_count} processes")
         
         # Clear all active sessions
-        active_sessions.clear()
-        persistent_sessions.clear()
+        warm_driver_pool.clear()
+        session_registry.clear()
         logger.info("🗑️ Cleared all session data")
         
         return killed_count
@@ -395,6 +730,213 @@ def is_session_alive(session: BrowserSession) -> bool:
         return False
 
 
+@dataclass
+class WarmDriver:
+    """Pre-launched browser sitting on the E-Modal login page"""
+    handler: EModalLoginHandler
+    profile_dir: str
+    created_at: datetime
+    
+    def is_stale(self) -> bool:
+        """Check if the warm browser has been idle too long"""
+        return (datetime.now() - self.created_at).seconds > warm_driver_max_age
+    
+    def discard(self):
+        """Close the browser and remove its temp profile"""
+        try:
+            if self.handler.driver:
+                self.handler.driver.quit()
+        except:
+            pass
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+
+class WarmDriverPool:
+    """
+    Keeps up to `size` browsers launched with the login page loaded so that
+    new sessions skip Chrome start-up. Refills in a background thread and
+    never lets warm + active browsers exceed MAX_CONCURRENT_SESSIONS.
+    
+    Browsers handed out by acquire() still count against the capacity while
+    they log in, until their session is registered or the browser is closed.
+    """
+    
+    def __init__(self, size: int):
+        self.size = size
+        self._drivers = []
+        self._lock = threading.Lock()
+        self._refill_event = threading.Event()
+        self._launching = 0
+        self._handed_out = {}  # id(driver) -> (driver, handed out at) while logging in
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._drivers)
+    
+    def _logging_in(self) -> int:
+        """Browsers taken from the pool that are not registered sessions yet (prunes finished hand-offs)"""
+        with self._lock:
+            handed_out = list(self._handed_out.items())
+        if not handed_out:
+            return 0
+        registered = {id(session.driver) for _, session in session_registry.items()}
+        now = time.time()
+        finished = []
+        for key, (driver, handed_at) in handed_out:
+            if key in registered or now - handed_at > warm_driver_handoff_timeout:
+                finished.append(key)
+                continue
+            try:
+                exited = driver.service.process.poll() is not None
+            except Exception:
+                exited = True  # No process handle: closed
+            if exited:
+                finished.append(key)
+        with self._lock:
+            for key in finished:
+                self._handed_out.pop(key, None)
+            return len(self._handed_out)
+    
+    def _free_slots(self) -> int:
+        """Number of browsers the pool may still launch right now"""
+        logging_in = self._logging_in()
+        with self._lock:
+            pooled = len(self._drivers) + self._launching
+        capacity_left = MAX_CONCURRENT_SESSIONS - session_registry.count() - logging_in - pooled
+        return max(0, min(self.size - pooled, capacity_left))
+    
+    def acquire(self) -> Optional[WarmDriver]:
+        """Take a healthy warm browser from the pool, or None if the pool is empty"""
+        while True:
+            with self._lock:
+                if not self._drivers:
+                    break
+                warm = self._drivers.pop(0)
+            
+            try:
+                alive = bool(warm.handler.driver.current_url)
+            except Exception:
+                alive = False
+            
+            if alive and not warm.is_stale():
+                with self._lock:
+                    self._handed_out[id(warm.handler.driver)] = (warm.handler.driver, time.time())
+                logger.info(f"♨️ Using warm browser (pool now {len(self)}/{self.size})")
+                self._refill_event.set()
+                return warm
+            
+            logger.info("🗑️ Discarding dead/stale warm browser")
+            warm.discard()
+        
+        self._refill_event.set()
+        return None
+    
+    def pids(self) -> set:
+        """ChromeDriver PIDs owned by the pool or still logging in (so orphan cleanup leaves them alone)"""
+        pids = set()
+        with self._lock:
+            drivers = [warm.handler.driver for warm in self._drivers]
+            drivers += [driver for driver, _ in self._handed_out.values()]
+        for driver in drivers:
+            try:
+                pids.add(driver.service.process.pid)
+            except Exception:
+                pass
+        return pids
+    
+    def clear(self):
+        """Close every pooled browser"""
+        with self._lock:
+            drivers = self._drivers
+            self._drivers = []
+        for warm in drivers:
+            warm.discard()
+    
+    def _launch_one(self) -> bool:
+        """Launch one browser and add it to the pool"""
+        profile_dir = tempfile.mkdtemp(prefix="emodal_warm_")
+        handler = EModalLoginHandler(
+            captcha_api_key="",  # Set when the browser is handed to a user
+            use_vpn_profile=False,
+            auto_close=False,
+            user_data_dir=profile_dir
+        )
+        warm = WarmDriver(handler=handler, profile_dir=profile_dir, created_at=datetime.now())
+        
+        result = handler.prewarm()
+        if not result.success:
+            logger.warning(f"⚠️ Warm browser launch failed: {result.error_message}")
+            warm.discard()
+            return False
+        
+        with self._lock:
+            self._drivers.append(warm)
+        logger.info(f"♨️ Warm browser ready (pool {len(self)}/{self.size})")
+        return True
+    
+    def _recycle_stale(self):
+        """Drop warm browsers that have been idle too long"""
+        with self._lock:
+            stale = [w for w in self._drivers if w.is_stale()]
+            self._drivers = [w for w in self._drivers if not w.is_stale()]
+        for warm in stale:
+            warm.discard()
+    
+    def run(self):
+        """Background refill loop"""
+        while True:
+            try:
+                self._recycle_stale()
+                
+                while self._free_slots() > 0:
+                    with self._lock:
+                        self._launching += 1
+                    try:
+                        launched = self._launch_one()
+                    finally:
+                        with self._lock:
+                            self._launching -= 1
+                    if not launched:
+                        break
+            except Exception as e:
+                logger.error(f"Error in warm pool refill: {e}")
+            
+            self._refill_event.wait(timeout=60)
+            self._refill_event.clear()
+
+
+warm_driver_pool = WarmDriverPool(WARM_POOL_SIZE)
+
+
+def create_login_handler(captcha_api_key: str, session_id: str) -> tuple:
+    """
+    Get a login handler for a new session, preferring a warm pooled browser.
+    
+    Args:
+        captcha_api_key: 2captcha API key for the user
+        session_id: New session ID (used to name a fresh temp profile)
+    
+    Returns:
+        Tuple of (handler, temp_profile_dir)
+    """
+    warm = warm_driver_pool.acquire()
+    if warm:
+        warm.handler.set_captcha_api_key(captcha_api_key)
+        return (warm.handler, warm.profile_dir)
+    
+    # Pool empty - launch a browser inline with a unique temp profile
+    temp_profile_dir = tempfile.mkdtemp(prefix=f"emodal_session_{session_id}_")
+    logger.info(f"Created temp profile: {temp_profile_dir}")
+    
+    handler = EModalLoginHandler(
+        captcha_api_key=captcha_api_key,
+        use_vpn_profile=False,  # Don't use default profile (causes conflicts)
+        auto_close=False,  # Keep browser open for persistent session
+        user_data_dir=temp_profile_dir
+    )
+    return (handler, temp_profile_dir)
+
+
 def get_or_create_browser_session(data: dict, request_id: str) -> tuple:
     """
     Get existing session by session_id OR create new persistent session.
@@ -413,22 +955,27 @@ def get_or_create_browser_session(data: dict, request_id: str) -> tuple:
     if session_id:
         logger.info(f"[{request_id}] Using provided session_id: {session_id}")
         
-        if session_id in active_sessions:
-            browser_session = active_sessions[session_id]
-            
+        browser_session = session_registry.get(session_id)
+        
+        # Queue behind any other request driving this browser
+        if browser_session and not acquire_session_for_request(session_id):
+            logger.warning(f"[{request_id}] ⚠️ Session {session_id} busy or closed while waiting")
+            browser_session = session_registry.get(session_id)
+            if browser_session:
+                error_response = jsonify({
+                    "success": False,
+                    "error": f"Session {session_id} is busy with another request"
+                }), 409
+                return (None, None, None, None, error_response)
+        
+        if browser_session:
             # Check if session is still alive
             if not is_session_alive(browser_session):
                 logger.warning(f"[{request_id}] ⚠️ Session {session_id} is dead (browser closed or crashed)")
                 logger.info(f"[{request_id}] Removing dead session and creating new one...")
                 
                 # Clean up dead session
-                try:
-                    del active_sessions[session_id]
-                    # Remove from persistent sessions if present
-                    if browser_session.credentials_hash in persistent_sessions:
-                        del persistent_sessions[browser_session.credentials_hash]
-                except:
-                    pass
+                session_registry.remove(session_id)
                 
                 # Fall through to create new session
             else:
@@ -441,19 +988,7 @@ def get_or_create_browser_session(data: dict, request_id: str) -> tuple:
                     logger.error(f"[{request_id}]    Terminating unhealthy session and creating new one...")
                     
                     # Clean up expired session and terminate driver
-                    try:
-                        # Terminate the browser session
-                        browser_session.driver.quit()
-                    except:
-                        pass
-                    
-                    try:
-                        del active_sessions[session_id]
-                        # Remove from persistent sessions if present
-                        if browser_session.credentials_hash in persistent_sessions:
-                            del persistent_sessions[browser_session.credentials_hash]
-                    except:
-                        pass
+                    session_registry.remove(session_id, quit_driver=True)
                     
                     # Fall through to create new session
                 else:
@@ -483,6 +1018,13 @@ def get_or_create_browser_session(data: dict, request_id: str) -> tuple:
     # Check if session already exists for these credentials
     existing_session = find_session_by_credentials(username, password)
     
+    if existing_session and not acquire_session_for_request(existing_session.session_id):
+        error_response = jsonify({
+            "success": False,
+            "error": f"Session {existing_session.session_id} is busy with another request"
+        }), 409
+        return (None, None, None, None, error_response)
+    
     if existing_session:
         existing_session.update_last_used()
         existing_session.mark_in_use()  # Mark as in use to prevent refresh during operation
@@ -501,17 +1043,9 @@ def get_or_create_browser_session(data: dict, request_id: str) -> tuple:
     new_session_id = f"session_{int(time.time())}_{hash(username)}"
     cred_hash = get_credentials_hash(username, password)
     
-    # Create unique temp profile directory for this session
-    temp_profile_dir = tempfile.mkdtemp(prefix=f"emodal_session_{new_session_id}_")
-    logger.info(f"[{request_id}] Created temp profile: {temp_profile_dir}")
-    
-    # Authenticate with unique profile
-    handler = EModalLoginHandler(
-        captcha_api_key=captcha_api_key,
-        use_vpn_profile=False,  # Don't use default profile (causes conflicts)
-        auto_close=False,  # Keep browser open for persistent session
-        user_data_dir=temp_profile_dir
-    )
+    # Authenticate with unique profile (warm pooled browser when available)
+    handler, temp_profile_dir = create_login_handler(captcha_api_key, new_session_id)
+    logger.info(f"[{request_id}] Using browser profile: {temp_profile_dir}")
     
     login_result = handler.login(username, password)
     if not login_result.success:
@@ -588,8 +1122,8 @@ def get_or_create_browser_session(data: dict, request_id: str) -> tuple:
                             last_refresh=datetime.now()
                         )
                         
-                        active_sessions[new_session_id] = browser_session
-                        persistent_sessions[cred_hash] = new_session_id
+                        session_registry.add(browser_session)
+                        acquire_session_for_request(new_session_id)
                         
                         logger.info(f"[{request_id}] ✅ Session {new_session_id} created successfully (manual)")
                         browser_session.mark_in_use()  # Mark as in use
@@ -665,13 +1199,13 @@ def get_or_create_browser_session(data: dict, request_id: str) -> tuple:
         last_refresh=datetime.now()
     )
     
-    active_sessions[new_session_id] = browser_session
-    persistent_sessions[cred_hash] = new_session_id
+    session_registry.add(browser_session)
+    acquire_session_for_request(new_session_id)
     
     browser_session.mark_in_use()  # Mark as in use to prevent refresh during operation
     
     logger.info(f"[{request_id}] ✅ Created new persistent session: {new_session_id} for user: {username}")
-    logger.info(f"[{request_id}] 📊 Active sessions: {len(active_sessions)}/{MAX_CONCURRENT_SESSIONS}")
+    logger.info(f"[{request_id}] 📊 Active sessions: {session_registry.count()}/{MAX_CONCURRENT_SESSIONS}")
     
     return (handler.driver, username, new_session_id, True)
 
@@ -989,20 +1523,21 @@ def periodic_session_refresh():
         try:
             time.sleep(20)  # Check every 20 seconds (increased frequency)
             
-            for session_id, session in list(active_sessions.items()):
+            for session_id, session in session_registry.items():
                 if session.keep_alive and session.needs_refresh():
-                    logger.info(f"🔄 Refreshing session: {session_id}")
-                    if not refresh_session(session):
+                    # Never navigate a browser that a request is driving
+                    if not session_registry.try_acquire(session_id):
+                        continue
+                    try:
+                        logger.info(f"🔄 Refreshing session: {session_id}")
+                        refreshed = refresh_session(session)
+                    finally:
+                        session_registry.release(session_id)
+                    if not refreshed:
                         # Error state detected (401/403/404/500) - session is dead, terminate it
                         logger.error(f"❌ Session unhealthy (error detected): {session_id}")
                         logger.error(f"   Terminating unhealthy session; a new one will be created on next request")
-                        if session.credentials_hash and session.credentials_hash in persistent_sessions:
-                            del persistent_sessions[session.credentials_hash]
-                        try:
-                            session.driver.quit()
-                        except:
-                            pass
-                        del active_sessions[session_id]
+                        session_registry.remove(session_id, quit_driver=True)
                         logger.info(f"✅ Unhealthy session terminated: {session_id}")
         except Exception as e:
             logger.error(f"Error in periodic session refresh: {e}")
@@ -1011,18 +1546,412 @@ def periodic_session_refresh():
 def cleanup_expired_appointment_sessions():
     """Clean up expired appointment sessions"""
     expired = []
-    for session_id, appt_session in appointment_sessions.items():
+    for session_id, appt_session in session_registry.appointment_items():
         if appt_session.is_expired():
             expired.append(session_id)
     
     for session_id in expired:
-        appt_session = appointment_sessions[session_id]
+        appt_session = session_registry.remove_appointment(session_id)
+        if appt_session is None:
+            continue
         try:
             appt_session.browser_session.driver.quit()
             print(f"🔒 Cleaned up expired appointment session: {session_id}")
         except:
             pass
-        del appointment_sessions[session_id]
+
+
+# Containers grid columns, in page order
+CONTAINER_COLUMNS = [
+    'Container #', 'Trade Type', 'Status', 'Holds', 
+    'Pregate Ticket#', 'Emodal Pregate Status', 'Gate Status',
+    'Origin', 'Destination', 'Current Loc', 'Line', 
+    'Vessel Name', 'Vessel Code', 'Voyage', 'Size Type', 
+    'Fees', 'LFD/GTD', 'Tags'
+]
+
+CONTAINER_ID_LINE_RE = re.compile(r'^([A-Z]{4}\d{6,7}[A-Z]?)\s*$')
+CONTAINER_ID_FIELD_RE = re.compile(r'^([A-Z]{4}\d{6,7}[A-Z]?)$')
+GRID_ICON_TEXTS = ['keyboard_arrow_right', 'info', 'more_vert', 'expand_more', 'expand_less']
+
+
+class _LineWindow:
+    """Lookahead window over a line iterator (only buffers the lines a row needs)"""
+    
+    def __init__(self, lines):
+        self._lines = iter(lines)
+        self._buffer = deque()
+    
+    def peek(self, count: int) -> list:
+        """Next `count` lines (fewer at end of input) without consuming them"""
+        while len(self._buffer) < count:
+            try:
+                self._buffer.append(next(self._lines).rstrip('\r\n'))
+            except StopIteration:
+                break
+        return list(itertools.islice(self._buffer, 0, count))
+    
+    def advance(self, count: int = 1):
+        """Consume `count` lines"""
+        for _ in range(count):
+            if self._buffer:
+                self._buffer.popleft()
+            else:
+                try:
+                    next(self._lines)
+                except StopIteration:
+                    return
+
+
+def iter_container_rows(lines, columns: list = None):
+    """
+    Stream container rows out of the copied containers-grid text.
+    
+    Handles both copy formats: tab-separated (one row per line, trailing
+    Fees/LFD/Tags on the next lines) and newline-separated (one field per line).
+    Header lines never match a container ID, so no header skipping is needed.
+    
+    Args:
+        lines: Iterable of text lines (e.g. io.StringIO(page_text))
+        columns: Column names (defaults to CONTAINER_COLUMNS)
+    
+    Yields:
+        Dict mapping every column name -> value ('' when absent, the same row shape as
+        extract_container_rows_dom), with the check letter stripped from 'Container #'
+    """
+    columns = columns or CONTAINER_COLUMNS
+    window = _LineWindow(lines)
+    
+    while True:
+        current = window.peek(1)
+        if not current:
+            return
+        line = current[0].strip()
+        
+        if '\t' in line:
+            # Tab-separated format: all fields on one line, minus icon text
+            fields = []
+            for field in line.split('\t'):
+                field = field.strip()
+                if not field or field in GRID_ICON_TEXTS:
+                    continue
+                for icon in GRID_ICON_TEXTS:
+                    field = field.replace(icon, '').strip()
+                if field:
+                    fields.append(field)
+            
+            if fields and CONTAINER_ID_FIELD_RE.match(fields[0]):
+                row_data = {'Container #': re.sub(r'[A-Z]$', '', fields[0])}
+                for idx, field in enumerate(fields[1:len(columns)], 1):
+                    row_data[columns[idx]] = field
+                
+                # Collect Fees, LFD/GTD, Tags from next 3 lines if not in current line
+                if len(row_data) < len(columns):
+                    for next_line in window.peek(4)[1:]:
+                        next_line = next_line.strip()
+                        if next_line and len(row_data) < len(columns):
+                            row_data[columns[len(row_data)]] = next_line
+                
+                if len(row_data) >= 10:
+                    yield {col: row_data.get(col, '') for col in columns}
+                
+                window.advance(1)
+                continue
+        
+        # Newline-separated format: each field on its own line
+        match = CONTAINER_ID_LINE_RE.match(line)
+        if match:
+            row_data = {'Container #': re.sub(r'[A-Z]$', '', match.group(1))}
+            
+            # Collect next 17 fields (18 columns total including container ID)
+            field_idx = 1
+            for field_line in window.peek(25)[1:]:
+                field_line = field_line.strip()
+                if field_line and field_idx < len(columns):
+                    row_data[columns[field_idx]] = field_line
+                    field_idx += 1
+                    if field_idx >= len(columns):
+                        break
+            
+            # Only yield if we have all or most fields
+            if len(row_data) >= 10:
+                yield {col: row_data.get(col, '') for col in columns}
+                window.advance(field_idx)  # Skip processed lines
+                continue
+        
+        window.advance(1)
+
+
+@metrics.timed("excel_write")
+def write_containers_excel(rows, excel_path: str, columns: list = None) -> int:
+    """
+    Write container rows to a formatted Excel sheet (openpyxl write-only mode).
+    
+    Args:
+        rows: Iterable of row dicts (e.g. from iter_container_rows)
+        excel_path: Destination .xlsx path
+        columns: Column order (defaults to CONTAINER_COLUMNS)
+    
+    Returns:
+        Number of data rows written
+    """
+    return export_writers.write_xlsx(rows, excel_path, columns or CONTAINER_COLUMNS)
+
+
+@metrics.timed("export_write")
+def write_containers_export(rows, export_path: str, columns: list = None, export_format: str = None) -> int:
+    """
+    Write container rows as xlsx, csv, jsonl or parquet, streaming them as they arrive.
+    
+    Args:
+        rows: Iterable of row dicts (e.g. from iter_container_rows)
+        export_path: Destination path
+        columns: Column order (defaults to CONTAINER_COLUMNS)
+        export_format: "xlsx", "csv", "jsonl" or "parquet" (default: from the file extension)
+    
+    Returns:
+        Number of data rows written
+    """
+    columns = columns or CONTAINER_COLUMNS
+    export_format = export_writers.normalize_format(export_format) if export_format else \
+        export_writers.format_for_path(export_path)
+    if export_format == "xlsx":
+        return write_containers_excel(rows, export_path, columns)
+    return export_writers.write_rows(rows, export_path, columns, export_format)
+
+
+def parsing_debug_report(total_containers: int, page_text: str, sample_rows: list):
+    """Lines of the parsing_debug.txt diagnostics dump (sample rows, or the raw text head if nothing parsed)"""
+    yield "="*70 + "\n"
+    yield "PARSING DEBUG RESULTS\n"
+    yield "="*70 + "\n"
+    yield f"Total containers parsed: {total_containers}\n"
+    yield f"Total characters: {len(page_text)}\n"
+    yield "="*70 + "\n\n"
+    
+    if sample_rows:
+        yield "SAMPLE CONTAINERS (first 3):\n\n"
+        for i, container in enumerate(sample_rows, 1):
+            yield f"{i}. {container.get('Container #', 'N/A')}\n"
+            for key, value in container.items():
+                yield f"   {key}: {value}\n"
+            yield "\n"
+    else:
+        yield "NO CONTAINERS PARSED!\n\n"
+        yield "First 50 lines of extracted text:\n"
+        yield "-"*70 + "\n"
+        for i, line in enumerate(itertools.islice(io.StringIO(page_text), 50), 1):
+            yield f"{i:3d}: {repr(line.rstrip(chr(10)))}\n"
+
+
+def request_diagnostics_level(data: dict, debug_mode: bool = False) -> int:
+    """
+    Diagnostics level for a request: the "diagnostics" field, else full when "debug"
+    is set, else the server default - never above EMODAL_DIAGNOSTICS_MAX.
+    """
+    default = diagnostics.FULL if debug_mode else DIAGNOSTICS_LEVEL
+    return min(diagnostics.parse_level((data or {}).get('diagnostics'), default), DIAGNOSTICS_MAX)
+
+
+# Installs (once per page) a pending-request counter on XHR/fetch and reports
+# whether the page is idle: document loaded, Angular stable, no request in flight
+# and no request activity for arguments[0] milliseconds.
+NETWORK_IDLE_JS = """
+    if (!window.__emodalNet) {
+        var net = window.__emodalNet = {pending: 0, last: Date.now()};
+        var done = function() { net.pending = Math.max(0, net.pending - 1); net.last = Date.now(); };
+        var send = XMLHttpRequest.prototype.send;
+        XMLHttpRequest.prototype.send = function() {
+            net.pending++; net.last = Date.now();
+            this.addEventListener('loadend', done);
+            return send.apply(this, arguments);
+        };
+        if (window.fetch) {
+            var originalFetch = window.fetch;
+            window.fetch = function() {
+                net.pending++; net.last = Date.now();
+                return originalFetch.apply(this, arguments).finally(done);
+            };
+        }
+    }
+    var ngStable = true;
+    try {
+        if (window.getAllAngularTestabilities) {
+            ngStable = window.getAllAngularTestabilities().every(function(t) { return t.isStable(); });
+        }
+    } catch (e) {}
+    var n = window.__emodalNet;
+    return document.readyState === 'complete' && ngStable && n.pending === 0 && (Date.now() - n.last) >= arguments[0];
+"""
+
+# Resolves true once the DOM under the root has had no mutations for quiet_ms,
+# or false when max_ms elapses first.
+DOM_QUIET_JS = """
+    var quietMs = arguments[0], maxMs = arguments[1], done = arguments[arguments.length - 1];
+    var root = (arguments[2] && document.querySelector(arguments[2])) || document.body || document.documentElement;
+    var start = Date.now(), last = Date.now();
+    var observer = new MutationObserver(function() { last = Date.now(); });
+    observer.observe(root, {childList: true, subtree: true, characterData: true});
+    (function check() {
+        var now = Date.now();
+        if (now - last >= quietMs) { observer.disconnect(); done(true); return; }
+        if (now - start >= maxMs) { observer.disconnect(); done(false); return; }
+        setTimeout(check, 50);
+    })();
+"""
+
+# Infinite-scroll nudge in one async call: `steps` increments of `step_px` with scroll and
+# wheel events, `gap_ms` apart (lets the directive's scroll throttle see each one), then a
+# jump to the bottom. Scrolls the window when the element is null.
+SCROLL_STEPS_JS = """
+    var el = arguments[0], steps = arguments[1], stepPx = arguments[2], gapMs = arguments[3];
+    var done = arguments[arguments.length - 1];
+    var target = el || window;
+    var fire = function(delta) {
+        target.dispatchEvent(new Event('scroll', {bubbles: true}));
+        if (delta) { target.dispatchEvent(new WheelEvent('wheel', {deltaY: delta, bubbles: true})); }
+        if (el) { void el.offsetHeight; }
+    };
+    var i = 0;
+    (function step() {
+        if (i < steps) {
+            if (el) { el.scrollTop = el.scrollTop + stepPx; } else { window.scrollBy(0, stepPx); }
+            fire(stepPx);
+            i++;
+            setTimeout(step, gapMs);
+            return;
+        }
+        if (el) { el.scrollTop = el.scrollHeight; } else { window.scrollTo(0, document.body.scrollHeight); }
+        fire(0);
+        done(true);
+    })();
+"""
+
+# One-call timeline snapshot: for every milestone row, the first two label texts
+# (name, date) and the divider classes. Returns null if there is no timeline.
+TIMELINE_ROWS_JS = """
+    var container = document.querySelector('app-containerflow') || document.querySelector("div[class*='timeline-container']");
+    if (!container) { return null; }
+    var rows = container.querySelectorAll("div[fxlayout='row']");
+    var out = [];
+    for (var i = 0; i < rows.length; i++) {
+        var labels = rows[i].querySelectorAll("span[class*='location-details-label']");
+        var divider = rows[i].querySelector("div[class*='timeline-divider']");
+        out.push({
+            label_count: labels.length,
+            name: labels.length >= 2 ? (labels[0].innerText || '').trim() : '',
+            date: labels.length >= 2 ? (labels[1].innerText || '').trim() : '',
+            divider_class: divider ? (divider.getAttribute('class') || '') : null
+        });
+    }
+    return out;
+"""
+
+# Divider classes next to the Pregate label (arguments[0]) in one call: its own
+# row first, then the previous and next rows. Returns null if there is none.
+PREGATE_DIVIDER_JS = """
+    var label = arguments[0];
+    var rowSel = "div[fxlayout*='row']";
+    var dividerSel = "div[class*='timeline-divider']";
+    var row = label.parentElement ? label.parentElement.closest(rowSel) : null;
+    if (!row) { return null; }
+    var sibling = function(el, step) {
+        for (var n = el[step]; n; n = n[step]) {
+            if (n.matches('div') && n.matches(rowSel)) { return n; }
+        }
+        return null;
+    };
+    var candidates = [row, sibling(row, 'previousElementSibling'), sibling(row, 'nextElementSibling')];
+    for (var i = 0; i < candidates.length; i++) {
+        var divider = candidates[i] ? candidates[i].querySelector(dividerSel) : null;
+        if (divider) { return divider.getAttribute('class') || ''; }
+    }
+    return null;
+"""
+
+# One-call Pregate analysis: divider classes in order, the Pregate row's divider
+# index and date, and dates of the later milestones (arguments[0]).
+TIMELINE_ANALYSIS_JS = """
+    var laterNames = arguments[0];
+    var container = document.querySelector("div[class*='timeline-container']") || document.querySelector('app-containerflow');
+    if (!container) { return null; }
+    var dividerSel = "div[class*='timeline-divider']";
+    var dateSel = "span[class*='location-details-label'][class*='p-top-5']";
+    var dividers = Array.prototype.slice.call(container.querySelectorAll(dividerSel));
+    var norm = function(el) { return (el.textContent || '').replace(/\\s+/g, ' ').trim(); };
+    var ownText = function(el) {
+        for (var n = el.firstChild; n; n = n.nextSibling) {
+            if (n.nodeType === 3) { return n.nodeValue; }
+        }
+        return '';
+    };
+    var fxRow = function(el) { return el.parentElement ? el.parentElement.closest("div[class*='fxlayout']") : null; };
+    var all = function(sel) { return Array.prototype.slice.call(document.querySelectorAll(sel)); };
+
+    // Pregate row: same precedence as the old XPath selectors
+    var strategies = [
+        ['exact span', function() { return all('span').filter(function(e) { return norm(e) === 'Pregate'; }); }],
+        ['contains span', function() { return all('span').filter(function(e) { return ownText(e).indexOf('Pregate') >= 0; }); }],
+        ['exact span (lowercase)', function() { return all('span').filter(function(e) { return norm(e) === 'pregate'; }); }],
+        ['contains span (lowercase)', function() { return all('span').filter(function(e) { return ownText(e).indexOf('pregate') >= 0; }); }],
+        ['exact any', function() { return all('*').filter(function(e) { return norm(e) === 'Pregate'; }); }],
+        ['contains any', function() { return all('*').filter(function(e) { return ownText(e).indexOf('Pregate') >= 0; }); }]
+    ];
+    var row = null, method = null;
+    for (var i = 0; i < strategies.length && !row; i++) {
+        var found = strategies[i][1]();
+        if (found.length) {
+            row = fxRow(found[0]);
+            if (row) { method = strategies[i][0]; }
+        }
+    }
+    var labels = all("span[class*='location-details-label']").map(function(e) { return (e.innerText || '').trim(); });
+    if (!row) {
+        var spans = all("span[class*='location-details-label']");
+        for (var j = 0; j < spans.length && !row; j++) {
+            if ((spans[j].innerText || '').toLowerCase().indexOf('pregate') < 0) { continue; }
+            var p = spans[j].parentElement;
+            row = fxRow(spans[j])
+                || (p ? p.closest("div[class*='row']") : null)
+                || (p ? p.closest('div') : null)
+                || p;
+            if (row) { method = 'label fallback'; }
+        }
+    }
+    if (!row) { return {found: false, labels: labels, dividers: dividers.map(function(d) { return d.getAttribute('class') || ''; })}; }
+
+    var divider = row.querySelector(dividerSel) || (row.parentElement ? row.parentElement.querySelector(dividerSel) : null);
+    var dividerMethod = divider ? 'row' : null;
+    if (!divider && dividers.length) {
+        var top = row.getBoundingClientRect().top, best = Infinity;
+        dividers.forEach(function(d) {
+            var distance = Math.abs(d.getBoundingClientRect().top - top);
+            if (distance < best) { best = distance; divider = d; }
+        });
+        dividerMethod = 'closest (' + best.toFixed(1) + 'px)';
+    }
+    var dateSpan = row.querySelector(dateSel);
+
+    var later = {};
+    laterNames.forEach(function(name) {
+        var span = all('span').filter(function(e) { return norm(e) === name; })[0];
+        var laterRow = span ? fxRow(span) : null;
+        var laterDate = laterRow ? laterRow.querySelector(dateSel) : null;
+        if (laterDate) { later[name] = (laterDate.innerText || '').trim(); }
+    });
+
+    return {
+        found: true,
+        method: method,
+        labels: labels,
+        dividers: dividers.map(function(d) { return d.getAttribute('class') || ''; }),
+        pregate_index: divider ? dividers.indexOf(divider) : -1,
+        divider_found: !!divider,
+        divider_method: dividerMethod,
+        pregate_date: dateSpan ? (dateSpan.innerText || '').trim() : null,
+        later_dates: later
+    };
+"""
 
 
 class EModalBusinessOperations:
@@ -1035,8 +1964,21 @@ class EModalBusinessOperations:
         self.screens_enabled = False
         self.screens_label = ""
         self.screens: list[str] = []
+        # Screenshot path -> Event set once its background annotation has been written
+        self._pending_screens: Dict[str, threading.Event] = {}
+        self._screens_lock = threading.Lock()
+        # Debug ZIP filled while the operation runs (see start_debug_bundle / create_debug_bundle)
+        self.debug_bundle: Optional[DebugBundle] = None
+        # Debug text dumps written by this operation (see diagnostics module)
+        self.diagnostics = DIAGNOSTICS_LEVEL
+        self._diagnostic_writes: list = []
         # Per-session screenshots folder
         self.screens_dir = os.path.join(SCREENSHOTS_DIR, self.session.session_id)
+        owner = getattr(session, 'username', None)
+        if not owner:
+            registered = session_registry.get(self.session.session_id)
+            owner = getattr(registered, 'username', None)
+        artifact_store.set_session_owner(self.session.session_id, owner)
         try:
             os.makedirs(self.screens_dir, exist_ok=True)
         except Exception:
@@ -1048,6 +1990,9 @@ class EModalBusinessOperations:
         self.label_show_container = True
         self.label_show_datetime = True
         self.label_show_vm_email = False  # Disabled by default
+        
+        # Timing of every event-driven wait (see _wait_until / wait_timing_summary)
+        self.wait_timings = deque(maxlen=1000)
     
     def _wait_for_app_ready(self, timeout_seconds: int = 25) -> None:
         """Wait until SPA main app finishes initial loading."""
@@ -1080,6 +2025,187 @@ class EModalBusinessOperations:
         if last_err:
             print(f"⚠️ App readiness wait ended with last error: {last_err}")
 
+    def _record_wait(self, name: str, kind: str, started: float, budget: float, satisfied: bool) -> None:
+        """Store how long a wait took and whether its condition was met before the budget ran out"""
+        elapsed = time.time() - started
+        self.wait_timings.append({
+            "name": name,
+            "kind": kind,
+            "seconds": round(elapsed, 3),
+            "budget": budget,
+            "satisfied": satisfied
+        })
+        logger.debug(f"[WAIT] {name} ({kind}): {elapsed:.2f}s of {budget}s, satisfied={satisfied}")
+
+    def _wait_until(self, name: str, condition, timeout: float, poll: float = 0.1):
+        """
+        Wait for an arbitrary condition instead of sleeping a fixed time.
+
+        Args:
+            name: Label used in wait_timings
+            condition: Callable taking the driver (WebDriverWait style)
+            timeout: Maximum seconds to wait (the old fixed sleep is a good upper bound)
+            poll: Polling interval in seconds
+
+        Returns:
+            The condition's truthy value, or None if the timeout expired
+        """
+        started = time.time()
+        result = None
+        if timeout > 0:
+            try:
+                result = WebDriverWait(self.driver, timeout, poll_frequency=poll).until(condition)
+            except TimeoutException:
+                result = None
+            except Exception as e:
+                logger.debug(f"[WAIT] {name} condition error: {e}")
+                result = None
+        self._record_wait(name, "condition", started, timeout, bool(result))
+        return result
+
+    def _wait_for_element(self, name: str, locator: tuple, timeout: float = 10, visible: bool = False):
+        """
+        Wait for an element to be present (or visible).
+
+        Args:
+            name: Label used in wait_timings
+            locator: (By, selector) tuple
+            timeout: Maximum seconds to wait
+            visible: Require visibility, not just presence
+
+        Returns:
+            The element, or None if it did not appear in time
+        """
+        condition = EC.visibility_of_element_located(locator) if visible else EC.presence_of_element_located(locator)
+        return self._wait_until(name, condition, timeout)
+
+    def _wait_for_network_idle(self, name: str, timeout: float = 10, idle_ms: int = 300) -> bool:
+        """
+        Wait until the page has no XHR/fetch in flight and Angular reports stable.
+
+        Args:
+            name: Label used in wait_timings
+            timeout: Maximum seconds to wait
+            idle_ms: Required time without request activity
+
+        Returns:
+            bool: True if the page went idle before the timeout
+        """
+        started = time.time()
+        idle = False
+        if timeout > 0:
+            try:
+                idle = bool(WebDriverWait(self.driver, timeout, poll_frequency=0.1).until(
+                    lambda d: d.execute_script(NETWORK_IDLE_JS, idle_ms)
+                ))
+            except Exception:
+                idle = False
+        self._record_wait(name, "network_idle", started, timeout, idle)
+        return idle
+
+    def _wait_for_dom_quiet(self, name: str, quiet_ms: int = 300, timeout: float = 5,
+                            root_selector: Optional[str] = None) -> bool:
+        """
+        Wait until the DOM stops changing (MutationObserver quiet period).
+
+        Args:
+            name: Label used in wait_timings
+            quiet_ms: Milliseconds without mutations that count as settled
+            timeout: Maximum seconds to wait
+            root_selector: Optional CSS selector limiting the observed subtree
+
+        Returns:
+            bool: True if the DOM went quiet before the timeout
+        """
+        started = time.time()
+        quiet = False
+        if timeout > 0:
+            try:
+                self.driver.set_script_timeout(timeout + 5)
+                quiet = bool(self.driver.execute_async_script(DOM_QUIET_JS, quiet_ms, int(timeout * 1000), root_selector))
+            except Exception as e:
+                logger.debug(f"[WAIT] {name} DOM observer error: {e}")
+                quiet = False
+            finally:
+                try:
+                    self.driver.set_script_timeout(30)
+                except Exception:
+                    pass
+        self._record_wait(name, "dom_quiet", started, timeout, quiet)
+        return quiet
+
+    def _settle(self, name: str, max_wait: float, quiet_ms: int = 300, root_selector: Optional[str] = None) -> bool:
+        """
+        Wait for network idle and then a DOM quiet period, never longer than max_wait in total.
+
+        Drop-in replacement for fixed "let the page settle" sleeps: returns as soon as the
+        page is actually settled, and at worst takes as long as the sleep it replaces.
+
+        Returns:
+            bool: True if both conditions were met within the budget
+        """
+        deadline = time.time() + max_wait
+        idle = self._wait_for_network_idle(f"{name}.network", timeout=max_wait, idle_ms=min(quiet_ms, 500))
+        quiet = self._wait_for_dom_quiet(f"{name}.dom", quiet_ms=quiet_ms,
+                                         timeout=max(0.0, deadline - time.time()), root_selector=root_selector)
+        return idle and quiet
+
+    def _wait_for_options(self, name: str, timeout: float = 1.0):
+        """
+        Wait for a mat-select / autocomplete panel to show its options, then for the list to settle.
+
+        Returns:
+            The first visible option, or None if none appeared within the timeout
+        """
+        started = time.time()
+        option = self._wait_for_element(name, (By.XPATH, "//mat-option"), timeout=timeout, visible=True)
+        remaining = timeout - (time.time() - started)
+        if option is not None and remaining > 0:
+            self._wait_for_dom_quiet(f"{name}.list", quiet_ms=200, timeout=remaining,
+                                     root_selector=".cdk-overlay-container")
+        return option
+
+    def _wait_for_selection(self, name: str, timeout: float = 1.0) -> bool:
+        """
+        Wait for an options panel to close after a selection (or a blank-area click), then for
+        any request the selection triggered (dependent fields) - within timeout in total.
+
+        Returns:
+            bool: True if the panel closed and the page went idle within the budget
+        """
+        deadline = time.time() + timeout
+        closed = bool(self._wait_until(name, EC.invisibility_of_element_located((By.XPATH, "//mat-option")), timeout))
+        idle = self._wait_for_network_idle(f"{name}.network", timeout=max(0.0, deadline - time.time()), idle_ms=200)
+        return closed and idle
+
+    def _wait_for_value(self, name: str, element, expected: str, timeout: float = 0.5) -> bool:
+        """Wait until an input reflects typed text (Angular may reformat it, so containment counts)"""
+        expected = (expected or "").strip().lower()
+        return bool(self._wait_until(
+            name, lambda d: expected in (element.get_attribute('value') or '').strip().lower(), timeout
+        ))
+
+    def _wait_for_focus(self, name: str, element, timeout: float = 0.3) -> bool:
+        """Wait until an element has keyboard focus after a click"""
+        return bool(self._wait_until(name, lambda d: d.switch_to.active_element == element, timeout))
+
+    def wait_timing_summary(self) -> Dict[str, Any]:
+        """
+        Aggregate recorded waits by name.
+
+        Returns:
+            Dict of name -> count, total_seconds, max_seconds, timeouts
+        """
+        summary = {}
+        for entry in list(self.wait_timings):
+            item = summary.setdefault(entry["name"], {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0, "timeouts": 0})
+            item["count"] += 1
+            item["total_seconds"] = round(item["total_seconds"] + entry["seconds"], 3)
+            item["max_seconds"] = max(item["max_seconds"], entry["seconds"])
+            if not entry["satisfied"]:
+                item["timeouts"] += 1
+        return summary
+
     def set_screenshot_labels(self, username=True, platform=True, container=True, datetime=True, vm_email=False):
         """
         Easy way to control which screenshot label elements are shown.
@@ -1099,269 +2225,232 @@ class EModalBusinessOperations:
         print(f"📸 Screenshot labels updated: username={username}, platform={platform}, container={container}, datetime={datetime}, vm_email={vm_email}")
 
     def _load_url_bar(self, target_width):
-        """Load the existing url_bar_appointment.png and resize it to target width"""
+        """Load url_bar_appointment.png resized to the target width"""
+        return screenshot_annotator.load_overlay(screenshot_annotator.URL_BAR_ASSET, target_width)
+
+    def _load_taskbar(self, target_width):
+        """Load taskbar_appointment.png resized to the target width"""
+        return screenshot_annotator.load_overlay(screenshot_annotator.TASKBAR_ASSET, target_width)
+
+    def _screenshot_label_lines(self, captured_at: datetime) -> list:
+        """Label block text for a screenshot (based on the enabled label flags)"""
+        label_lines = []
+        
+        # Username (if enabled)
+        if self.label_show_username:
+            label_lines.append(f"Username: {self.screens_label}")
+        
+        # Platform (if enabled)
+        if self.label_show_platform:
+            label_lines.append(f"Platform: emodal")
+        
+        # Container information (if enabled)
+        if self.label_show_container:
+            if hasattr(self, 'current_container_id') and self.current_container_id:
+                container_type = getattr(self, 'container_type', 'unknown')
+                move_type = getattr(self, 'move_type', 'unknown')
+                label_lines.append(f"Container: {self.current_container_id}, {container_type}, {move_type}")
+            else:
+                label_lines.append("Container: N/A")
+        
+        # Date and time (if enabled)
+        if self.label_show_datetime:
+            label_lines.append(f"Date and time: {captured_at.strftime('%Y-%m-%d')} | {captured_at.strftime('%H:%M:%S')}")
+        
+        # VM Email (if enabled and available)
+        if self.label_show_vm_email and hasattr(self, 'vm_email') and self.vm_email:
+            label_lines.append(f"VM Email: {self.vm_email}")
+        
+        return label_lines
+
+    def _capture_screenshot(self, tag: str):
+        """
+        Capture a screenshot in memory and annotate it (URL bar, taskbar, labels) in the media worker pool.
+        
+        Returns the file path immediately; the file is written once, with the annotated
+        image, when the worker finishes (see wait_for_screenshots).
+        """
+        if not self.screens_enabled:
+            print(f"📸 Screenshot skipped (disabled): {tag}")
+            return None
         try:
-            # Look for URL bar in multiple possible locations
-            url_bar_paths = [
-                "url_bar_appointment.png",
-                "test_new_screenshots/url_bar_appointment.png",
-                os.path.join(os.path.dirname(__file__), "test_new_screenshots", "url_bar_appointment.png")
-            ]
-            
-            url_bar_path = None
-            for path in url_bar_paths:
-                if os.path.exists(path):
-                    url_bar_path = path
-                    break
-            
-            if not url_bar_path:
-                print(f"⚠️ URL bar file not found in any location")
-                return None
-                
-            url_bar = Image.open(url_bar_path)
-            original_width, original_height = url_bar.size
-            
-            # Resize to target width (stretch if needed)
-            if target_width != original_width:
-                url_bar = url_bar.resize((target_width, original_height), Image.Resampling.LANCZOS)
-                print(f"📏 Resized URL bar to: {target_width}x{original_height}")
-            
-            return url_bar
-            
+            captured_at = datetime.now()
+            ts = captured_at.strftime('%Y%m%d_%H%M%S_%f')
+            path = os.path.join(self.screens_dir, f"{ts}_{tag}.png")
+            with metrics.span("screenshot_capture"):
+                png_bytes = self.driver.get_screenshot_as_png()
+            print(f"📸 Screenshot captured: {os.path.basename(path)}")
+            
+            done = threading.Event()
+            with self._screens_lock:
+                self._pending_screens[path] = done
+            self.screens.append(path)
+            
+            future = media_pool.submit(
+                screenshot_annotator.annotate_screenshot,
+                png_bytes, self._screenshot_label_lines(captured_at), captured_at
+            )
+            future.add_done_callback(functools.partial(
+                self._finish_annotation, path, png_bytes, done, time.perf_counter(), metrics.current_endpoint()
+            ))
+            return path  # Return the file path
         except Exception as e:
-            print(f"⚠️ Error loading URL bar: {e}")
+            print(f"⚠️ Screenshot failed: {e}")
             return None
 
-    def _load_taskbar(self, target_width):
-        """Load the existing taskbar_appointment.png and resize it to target width"""
+    def _finish_annotation(self, path: str, png_bytes: bytes, done: threading.Event, started: float,
+                           endpoint: str, future) -> None:
+        """Done-callback of the annotation future: hand the file I/O to the screenshot I/O threads"""
         try:
-            # Look for taskbar in multiple possible locations
-            taskbar_paths = [
-                "taskbar_appointment.png",
-                "test_new_screenshots/taskbar_appointment.png",
-                os.path.join(os.path.dirname(__file__), "test_new_screenshots", "taskbar_appointment.png")
-            ]
-            
-            taskbar_path = None
-            for path in taskbar_paths:
-                if os.path.exists(path):
-                    taskbar_path = path
-                    break
-            
-            if not taskbar_path:
-                print(f"⚠️ Taskbar file not found in any location")
-                return None
-                
-            taskbar = Image.open(taskbar_path)
-            original_width, original_height = taskbar.size
-            
-            # Resize to target width (stretch if needed)
-            if target_width != original_width:
-                taskbar = taskbar.resize((target_width, original_height), Image.Resampling.LANCZOS)
-                print(f"📏 Resized taskbar to: {target_width}x{original_height}")
-            
-            return taskbar
-            
+            screenshot_io.submit(self._write_screenshot, path, png_bytes, done, started, endpoint, future)
         except Exception as e:
-            print(f"⚠️ Error loading taskbar: {e}")
-            return None
+            # Executor shut down (interpreter exit): write on this thread instead
+            print(f"⚠️ Screenshot I/O pool unavailable, writing inline: {e}")
+            self._write_screenshot(path, png_bytes, done, started, endpoint, future)
+
+    def _write_screenshot(self, path: str, png_bytes: bytes, done: threading.Event, started: float,
+                          endpoint: str, future) -> None:
+        """Write the screenshot to disk once: the annotated image, or the raw capture if annotation failed"""
+        try:
+            try:
+                annotated = future.result()
+                if annotated is None:
+                    print("⚠️ Failed to load URL bar or taskbar, keeping original screenshot")
+            except Exception as e:
+                # Keep the original screenshot if annotation fails
+                print(f"⚠️ Annotation failed: {e}")
+                annotated = None
+            artifact_store.write_bytes(path, annotated or png_bytes, session_id=self.session.session_id,
+                                       category="screenshot")
+            print(f"📸 {'Enhanced screenshot' if annotated else 'Screenshot'} saved: {os.path.basename(path)}")
+            
+            # Append to the live debug bundle straight from memory
+            bundle = self.debug_bundle
+            if bundle is not None:
+                try:
+                    bundle.add_bytes(f"screenshots/{os.path.basename(path)}", annotated or png_bytes)
+                except Exception as e:
+                    print(f"⚠️ Could not add screenshot to debug bundle: {e}")
+        except Exception as e:
+            print(f"⚠️ Screenshot write failed: {e}")
+        finally:
+            metrics.observe("screenshot_annotate", time.perf_counter() - started, endpoint=endpoint)
+            with self._screens_lock:
+                self._pending_screens.pop(path, None)
+            done.set()
+
+    def wait_for_screenshots(self, paths: list = None, timeout: float = 60) -> bool:
+        """
+        Wait for background screenshot annotation to finish (call before reading or zipping screenshots).
+        
+        Args:
+            paths: Only wait for these screenshots (default: all pending)
+            timeout: Maximum seconds to wait in total
+        
+        Returns:
+            bool: True if nothing is pending for the requested paths
+        """
+        with self._screens_lock:
+            if paths is None:
+                events = list(self._pending_screens.values())
+            else:
+                events = [self._pending_screens[p] for p in paths if p in self._pending_screens]
+        deadline = time.time() + timeout
+        for event in events:
+            if not event.wait(max(0.0, deadline - time.time())):
+                print(f"⚠️ Screenshot annotation still pending after {timeout}s")
+                return False
+        return True
+
+    def write_diagnostics(self, path: str, chunks) -> None:
+        """
+        Write a debug text dump in the background (gzip-streamed) and register it when done.
+        
+        Args:
+            path: Destination file (".gz" is appended when compression is on)
+            chunks: Callable returning the text in pieces (runs on the writer thread)
+        """
+        session_id = self.session.session_id
+        
+        def written(final_path):
+            artifact_store.register(final_path, session_id=session_id, category="debug")
+            print(f"💾 Diagnostics saved: {os.path.basename(final_path)} ({os.path.getsize(final_path)} bytes)")
+        
+        try:
+            future = diagnostics_writer.submit(path, chunks, written)
+        except Exception as e:
+            print(f"⚠️ Could not queue diagnostics file {os.path.basename(path)}: {e}")
+            return
+        if future is not None:
+            self._diagnostic_writes.append(future)
 
-    def _capture_screenshot(self, tag: str):
-        if not self.screens_enabled:
-            print(f"📸 Screenshot skipped (disabled): {tag}")
-            return None
+    def wait_for_diagnostics(self, timeout: float = 30) -> bool:
+        """
+        Wait for this operation's background diagnostics dumps (call before bundling downloads).
+        
+        Returns:
+            bool: True if every dump has been written (or failed)
+        """
+        pending, self._diagnostic_writes = self._diagnostic_writes, []
+        deadline = time.time() + timeout
+        for future in pending:
+            try:
+                future.result(timeout=max(0.0, deadline - time.time()))
+            except Exception:
+                print(f"⚠️ Diagnostics dump still pending after {timeout}s")
+                return False
+        return True
+
+    def start_debug_bundle(self, root: str = "") -> None:
+        """
+        Open this request's debug ZIP now so screenshots are appended as they are written;
+        create_debug_bundle() then only adds the remaining files and closes it.
+        
+        Args:
+            root: Top-level folder for every entry inside the ZIP ("" = none)
+        """
+        self.discard_debug_bundle()
         try:
             ts = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
-            raw_path = os.path.join(self.screens_dir, f"{ts}_{tag}.png")
-            self.driver.save_screenshot(raw_path)
-            print(f"📸 Screenshot saved: {os.path.basename(raw_path)}")
-            
-            # Annotate with URL bar at top, taskbar at bottom, and labels on left
-            try:
-                # Load original screenshot
-                img = Image.open(raw_path).convert("RGBA")
-                original_width, original_height = img.size
-                
-                # Load and resize URL bar and taskbar
-                final_width = max(2074, original_width)  # At least 2074px, or screenshot width if larger
-                url_bar = self._load_url_bar(final_width)
-                taskbar = self._load_taskbar(final_width)
-                
-                if url_bar is None or taskbar is None:
-                    print("⚠️ Failed to load URL bar or taskbar, saving original screenshot")
-                    self.screens.append(raw_path)
-                    return raw_path
-                
-                url_bar_height = url_bar.size[1]
-                taskbar_height = taskbar.size[1]
-                
-                # Create composite image: URL bar + screenshot + taskbar
-                composite_height = url_bar_height + original_height + taskbar_height
-                composite = Image.new('RGB', (final_width, composite_height), color=(255, 255, 255))
-                
-                # Paste URL bar at top
-                composite.paste(url_bar, (0, 0))
-                
-                # Paste original screenshot in middle (center if narrower)
-                if original_width < final_width:
-                    x_offset = (final_width - original_width) // 2
-                    composite.paste(img, (x_offset, url_bar_height), img if img.mode == 'RGBA' else None)
-                else:
-                    composite.paste(img, (0, url_bar_height), img if img.mode == 'RGBA' else None)
-                
-                # Paste taskbar at bottom
-                composite.paste(taskbar, (0, url_bar_height + original_height))
-                
-                # Add labels on LEFT side, just above taskbar
-                draw = ImageDraw.Draw(composite)
-                
-                # Build label text (based on enabled flags)
-                timestamp = datetime.now()
-                date_str = timestamp.strftime('%Y-%m-%d')
-                time_str = timestamp.strftime('%H:%M:%S')
-                
-                label_lines = []
-                
-                # Username (if enabled)
-                if self.label_show_username:
-                    label_lines.append(f"Username: {self.screens_label}")
-                
-                # Platform (if enabled)
-                if self.label_show_platform:
-                    label_lines.append(f"Platform: emodal")
-                
-                # Container information (if enabled)
-                if self.label_show_container:
-                    if hasattr(self, 'current_container_id') and self.current_container_id:
-                        container_type = getattr(self, 'container_type', 'unknown')
-                        move_type = getattr(self, 'move_type', 'unknown')
-                        label_lines.append(f"Container: {self.current_container_id}, {container_type}, {move_type}")
-                    else:
-                        label_lines.append("Container: N/A")
-                
-                # Date and time (if enabled)
-                if self.label_show_datetime:
-                    label_lines.append(f"Date and time: {date_str} | {time_str}")
-                
-                # VM Email (if enabled and available)
-                if self.label_show_vm_email and hasattr(self, 'vm_email') and self.vm_email:
-                    label_lines.append(f"VM Email: {self.vm_email}")
-                
-                # Enhanced font for labels (36px, yellow)
-                try:
-                    label_font = ImageFont.truetype("arial.ttf", 36)
-                except:
-                    try:
-                        label_font = ImageFont.truetype("DejaVuSans.ttf", 36)
-                    except:
-                        label_font = ImageFont.load_default()
-                
-                # Calculate label dimensions
-                line_height = 45
-                max_label_width = 0
-                
-                for line in label_lines:
-                    try:
-                        bbox = draw.textbbox((0, 0), line, font=label_font)
-                        line_width = bbox[2] - bbox[0]
-                    except:
-                        line_width = draw.textlength(line, font=label_font)
-                    if line_width > max_label_width:
-                        max_label_width = line_width
-                
-                total_label_height = len(label_lines) * line_height
-                padding = 20
-                
-                # Position labels on LEFT side, just above taskbar
-                label_x = padding
-                label_y = url_bar_height + original_height - total_label_height - padding
-                
-                # Draw background rectangle for labels
-                bg_padding = 15
-                draw.rectangle([
-                    label_x - bg_padding,
-                    label_y - bg_padding,
-                    label_x + max_label_width + bg_padding,
-                    label_y + total_label_height + bg_padding
-                ], fill=(0, 0, 0, 200))  # Semi-transparent black background
-                
-                # Draw each label line
-                current_y = label_y
-                for line in label_lines:
-                    draw.text((label_x, current_y), line, font=label_font, fill=(255, 255, 0))  # Yellow text
-                    current_y += line_height
-                
-                # ADD DATE AND TIME ON TASKBAR (with exact settings from test)
-                taskbar_start_y = url_bar_height + original_height
-                
-                # Taskbar font controls (exact from test)
-                taskbar_font_size = 24
-                taskbar_font_bold = False
-                
-                # Load taskbar font based on bold setting
-                if taskbar_font_bold:
-                    try:
-                        taskbar_font = ImageFont.truetype("segoeuib.ttf", taskbar_font_size)  # Segoe UI Bold
-                    except:
-                        try:
-                            taskbar_font = ImageFont.truetype("arialbd.ttf", taskbar_font_size)  # Arial Bold
-                        except:
-                            try:
-                                taskbar_font = ImageFont.truetype("DejaVuSans-Bold.ttf", taskbar_font_size)  # DejaVu Bold
-                            except:
-                                taskbar_font = ImageFont.load_default()
-                else:
-                    try:
-                        taskbar_font = ImageFont.truetype("segoeui.ttf", taskbar_font_size)  # Segoe UI Regular
-                    except:
-                        try:
-                            taskbar_font = ImageFont.truetype("arial.ttf", taskbar_font_size)  # Arial Regular
-                        except:
-                            try:
-                                taskbar_font = ImageFont.truetype("DejaVuSans.ttf", taskbar_font_size)  # DejaVu Regular
-                            except:
-                                taskbar_font = ImageFont.load_default()
-                
-                # Position control for taskbar text (exact from test)
-                date_x_offset = 216  # Distance from right edge
-                date_y_offset = 40   # Distance from top of taskbar
-                time_x_offset = 200  # Distance from right edge  
-                time_y_offset = 5    # Distance from top of taskbar
-                
-                # Format time and date using system time
-                current_time = datetime.now()
-                time_text = current_time.strftime("%I:%M %p").lstrip('0')  # e.g., "6:12 PM" (remove leading zero)
-                date_text = current_time.strftime("%m/%d/%Y")   # e.g., "10/28/2025"
-                
-                # Calculate positions
-                date_x = final_width - date_x_offset
-                date_y = taskbar_start_y + date_y_offset
-                time_x = final_width - time_x_offset
-                time_y = taskbar_start_y + time_y_offset
-                
-                # Draw time and date with WHITE font
-                draw.text((time_x, time_y), time_text, font=taskbar_font, fill=(255, 255, 255))  # White text
-                draw.text((date_x, date_y), date_text, font=taskbar_font, fill=(255, 255, 255))  # White text
-                
-                # Save annotated image
-                composite.save(raw_path)
-                print(f"📸 Enhanced screenshot saved: {os.path.basename(raw_path)}")
-                
-            except Exception as e:
-                print(f"⚠️ Annotation failed: {e}")
-                # Save original screenshot if annotation fails
-                pass
-                
-            self.screens.append(raw_path)
-            return raw_path  # Return the file path
+            bundle = DebugBundle(os.path.join(DOWNLOADS_DIR, f"{self.session.session_id}_{ts}.zip.part"), root=root)
+            # Screenshots already in the session folder (earlier requests) go in first
+            self.wait_for_screenshots()
+            bundle.add_directory(self.screens_dir, 'screenshots')
+            with self._screens_lock:
+                self.debug_bundle = bundle
         except Exception as e:
-            print(f"⚠️ Screenshot failed: {e}")
+            print(f"⚠️ Could not start debug bundle: {e}")
+
+    def take_debug_bundle(self, root: str = None) -> Optional[DebugBundle]:
+        """
+        Detach the live debug bundle (call after wait_for_screenshots).
+        
+        Args:
+            root: Expected top-level folder; a bundle started with another root is discarded
+        
+        Returns:
+            The open DebugBundle, or None if none was started
+        """
+        with self._screens_lock:
+            bundle, self.debug_bundle = self.debug_bundle, None
+        if bundle is not None and root is not None and bundle.root != root:
+            bundle.discard()
             return None
+        return bundle
+
+    def discard_debug_bundle(self) -> None:
+        """Close and delete an unfinished live debug bundle"""
+        bundle = self.take_debug_bundle()
+        if bundle is not None:
+            bundle.discard()
 
     def _extract_booking_number_from_image(self, screenshot_path: str) -> str:
         """
         Extract booking number from screenshot using image processing and OCR.
         
+        Tesseract runs once per image (image_to_data); every strategy below reuses
+        the same word boxes, and identical images are served from the OCR cache.
+        
         Args:
             screenshot_path: Path to the screenshot image
             
@@ -1371,58 +2460,54 @@ class EModalBusinessOperations:
         try:
             print("  🔍 Processing image for booking number extraction...")
             
+            # Make sure the annotated image has been written before checking for it
+            if screenshot_path:
+                self.wait_for_screenshots([screenshot_path])
+            
             # Check if screenshot path is valid
             if not screenshot_path or not os.path.exists(screenshot_path):
                 print(f"  ❌ Invalid screenshot path: {screenshot_path}")
                 return None
             
-            # Check if Tesseract is available
-            try:
-                import pytesseract
-                pytesseract.get_tesseract_version()
-                print("  ✅ Tesseract OCR is available")
-            except Exception as e:
-                print(f"  ❌ Tesseract OCR not available: {e}")
+            # Check if Tesseract is available (probed once per process)
+            available, probe_error = booking_ocr.tesseract_available()
+            if not available:
+                print(f"  ❌ Tesseract OCR not available: {probe_error}")
                 print("  💡 To enable image-based extraction, install Tesseract OCR:")
                 print("     Windows: Download from https://github.com/UB-Mannheim/tesseract/wiki")
                 print("     Linux: sudo apt-get install tesseract-ocr")
                 return None
             
-            # Import required libraries
-            from PIL import Image, ImageDraw, ImageFont
-            import numpy as np
-            import cv2
-            import re
-            
-            # Load the image
-            image = Image.open(screenshot_path)
-            img_array = np.array(image)
-            
-            print(f"  📸 Image loaded: {image.size[0]}x{image.size[1]} pixels")
+            with open(screenshot_path, 'rb') as f:
+                image_bytes = f.read()
             
-            # Convert to OpenCV format (BGR)
-            img_cv = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
+            # Single OCR pass (in a media worker) shared by all strategies
+            ocr = booking_ocr.ocr_image(image_bytes, pool=media_pool)
+            words = ocr["words"]
+            image_shape = (ocr["height"], ocr["width"])
+            print(f"  📸 Image analyzed: {ocr['width']}x{ocr['height']} pixels, {len(words)} words "
+                  f"(OCR cache: {booking_ocr.ocr_cache.stats()})")
             
-            # Method 1: Look for "Booking" text using template matching
-            booking_number = self._find_booking_number_near_text(img_cv, "Booking")
+            # Method 1: Look for "Booking" text and read the words around it
+            booking_number = self._find_booking_number_near_text(words, image_shape, "Booking")
             if booking_number:
                 print(f"  ✅ Found booking number near 'Booking' text: {booking_number}")
                 return booking_number
             
             # Method 2: Look for "Booking #" text
-            booking_number = self._find_booking_number_near_text(img_cv, "Booking #")
+            booking_number = self._find_booking_number_near_text(words, image_shape, "Booking #")
             if booking_number:
                 print(f"  ✅ Found booking number near 'Booking #' text: {booking_number}")
                 return booking_number
             
             # Method 3: Look for blue text (booking numbers are often blue)
-            booking_number = self._find_blue_text_booking_number(img_cv)
+            booking_number = self._find_blue_text_booking_number(words)
             if booking_number:
                 print(f"  ✅ Found booking number in blue text: {booking_number}")
                 return booking_number
             
-            # Method 4: OCR the entire image and look for booking number pattern
-            booking_number = self._ocr_booking_number(img_cv)
+            # Method 4: All recognized text, looking for the booking number pattern
+            booking_number = self._ocr_booking_number(words)
             if booking_number:
                 print(f"  ✅ Found booking number via OCR: {booking_number}")
                 return booking_number
@@ -1436,147 +2521,72 @@ class EModalBusinessOperations:
             traceback.print_exc()
             return None
 
-    def _find_booking_number_near_text(self, img_cv, search_text: str) -> str:
-        """Find booking number near specific text using template matching"""
+    def _find_booking_number_near_text(self, words: list, image_shape: tuple, search_text: str) -> str:
+        """Find booking number in the words around a label (reuses the OCR word boxes)"""
         try:
-            import cv2
-            import pytesseract
-            import re
-            
-            # Use OCR to find text locations
-            data = pytesseract.image_to_data(img_cv, output_type=pytesseract.Output.DICT)
-            
             # Find the search text
-            text_found = False
-            search_x, search_y, search_w, search_h = 0, 0, 0, 0
-            
-            for i, text in enumerate(data['text']):
-                if search_text.lower() in text.lower():
-                    text_found = True
-                    search_x = data['left'][i]
-                    search_y = data['top'][i]
-                    search_w = data['width'][i]
-                    search_h = data['height'][i]
-                    print(f"  🔍 Found '{search_text}' at ({search_x}, {search_y})")
+            anchor = None
+            for word in words:
+                if search_text.lower() in word["text"].lower():
+                    anchor = word
+                    print(f"  🔍 Found '{search_text}' at ({anchor['left']}, {anchor['top']})")
                     break
             
-            if not text_found:
+            if not anchor:
                 return None
             
             # Define search area around the found text (extend to the right and below)
             margin = 50
-            search_area_x1 = max(0, search_x - margin)
-            search_area_y1 = max(0, search_y - margin)
-            search_area_x2 = min(img_cv.shape[1], search_x + search_w + 300)  # Extend right for booking number
-            search_area_y2 = min(img_cv.shape[0], search_y + search_h + 100)  # Extend down
-            
-            # Crop the search area
-            search_area = img_cv[search_area_y1:search_area_y2, search_area_x1:search_area_x2]
-            
-            # Save cropped area for debugging
-            cropped_path = os.path.join(self.screens_dir, f"booking_search_area_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
-            cv2.imwrite(cropped_path, search_area)
-            print(f"  📸 Saved search area: {os.path.basename(cropped_path)}")
-            
-            # OCR the search area
-            search_text_result = pytesseract.image_to_string(search_area, config='--psm 6')
-            print(f"  📋 OCR text in search area: '{search_text_result.strip()}'")
-            
-            # Look for booking number pattern (letters and numbers, typically 8-12 characters)
-            booking_patterns = [
-                r'[A-Z]{2,4}[A-Z0-9]{6,10}',  # Pattern like RICFEM857500
-                r'[A-Z0-9]{8,12}',            # General alphanumeric
-                r'[A-Z]{3,6}[0-9]{4,8}',      # Letters followed by numbers
+            x1 = max(0, anchor["left"] - margin)
+            y1 = max(0, anchor["top"] - margin)
+            x2 = min(image_shape[1], anchor["left"] + anchor["width"] + 300)  # Extend right for booking number
+            y2 = min(image_shape[0], anchor["top"] + anchor["height"] + 100)  # Extend down
+            
+            # Words whose boxes overlap the search area
+            nearby = [
+                w for w in words
+                if w["left"] < x2 and w["left"] + w["width"] > x1 and w["top"] < y2 and w["top"] + w["height"] > y1
             ]
+            search_text_result = booking_ocr.words_to_text(nearby)
+            print(f"  📋 OCR text in search area: '{search_text_result.strip()}'")
             
-            for pattern in booking_patterns:
-                matches = re.findall(pattern, search_text_result)
-                for match in matches:
-                    if len(match) >= 8:  # Booking numbers are usually at least 8 characters
-                        print(f"  🎯 Found potential booking number: {match}")
-                        return match
-            
-            return None
+            match = booking_ocr.find_booking_number(search_text_result)
+            if match:
+                print(f"  🎯 Found potential booking number: {match}")
+            return match
             
         except Exception as e:
             print(f"  ❌ Error in _find_booking_number_near_text: {e}")
             return None
 
-    def _find_blue_text_booking_number(self, img_cv) -> str:
-        """Find booking number by looking for blue text"""
+    def _find_blue_text_booking_number(self, words: list) -> str:
+        """Find booking number among words rendered in blue (blue share measured during the OCR pass)"""
         try:
-            import cv2
-            import pytesseract
-            import re
-            import numpy as np
-            
-            # Convert to HSV for better color detection
-            hsv = cv2.cvtColor(img_cv, cv2.COLOR_BGR2HSV)
-            
-            # Define blue color range
-            lower_blue = np.array([100, 50, 50])
-            upper_blue = np.array([130, 255, 255])
+            # Keep words whose box contains a meaningful share of blue pixels
+            blue_words = [w for w in words if w.get("blue_ratio", 0) >= 0.05]
             
-            # Create mask for blue regions
-            blue_mask = cv2.inRange(hsv, lower_blue, upper_blue)
-            
-            # Apply mask to original image
-            blue_regions = cv2.bitwise_and(img_cv, img_cv, mask=blue_mask)
-            
-            # Save blue regions for debugging
-            blue_path = os.path.join(self.screens_dir, f"blue_regions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
-            cv2.imwrite(blue_path, blue_regions)
-            print(f"  📸 Saved blue regions: {os.path.basename(blue_path)}")
-            
-            # OCR blue regions
-            blue_text = pytesseract.image_to_string(blue_regions, config='--psm 6')
+            blue_text = booking_ocr.words_to_text(blue_words)
             print(f"  📋 Blue text OCR: '{blue_text.strip()}'")
             
-            # Look for booking number pattern in blue text
-            booking_patterns = [
-                r'[A-Z]{2,4}[A-Z0-9]{6,10}',  # Pattern like RICFEM857500
-                r'[A-Z0-9]{8,12}',            # General alphanumeric
-                r'[A-Z]{3,6}[0-9]{4,8}',      # Letters followed by numbers
-            ]
-            
-            for pattern in booking_patterns:
-                matches = re.findall(pattern, blue_text)
-                for match in matches:
-                    if len(match) >= 8:  # Booking numbers are usually at least 8 characters
-                        print(f"  🎯 Found potential blue booking number: {match}")
-                        return match
-            
-            return None
+            match = booking_ocr.find_booking_number(blue_text)
+            if match:
+                print(f"  🎯 Found potential blue booking number: {match}")
+            return match
             
         except Exception as e:
             print(f"  ❌ Error in _find_blue_text_booking_number: {e}")
             return None
 
-    def _ocr_booking_number(self, img_cv) -> str:
-        """Use OCR to find booking number pattern in the entire image"""
+    def _ocr_booking_number(self, words: list) -> str:
+        """Find booking number pattern anywhere in the recognized text"""
         try:
-            import pytesseract
-            import re
-            
-            # OCR the entire image
-            full_text = pytesseract.image_to_string(img_cv, config='--psm 6')
+            full_text = booking_ocr.words_to_text(words)
             print(f"  📋 Full OCR text: '{full_text[:200]}...'")
             
-            # Look for booking number patterns
-            booking_patterns = [
-                r'[A-Z]{2,4}[A-Z0-9]{6,10}',  # Pattern like RICFEM857500
-                r'[A-Z0-9]{8,12}',            # General alphanumeric
-                r'[A-Z]{3,6}[0-9]{4,8}',      # Letters followed by numbers
-            ]
-            
-            for pattern in booking_patterns:
-                matches = re.findall(pattern, full_text)
-                for match in matches:
-                    if len(match) >= 8:  # Booking numbers are usually at least 8 characters
-                        print(f"  🎯 Found potential OCR booking number: {match}")
-                        return match
-            
-            return None
+            match = booking_ocr.find_booking_number(full_text)
+            if match:
+                print(f"  🎯 Found potential OCR booking number: {match}")
+            return match
             
         except Exception as e:
             print(f"  ❌ Error in _ocr_booking_number: {e}")
@@ -1767,13 +2777,16 @@ class EModalBusinessOperations:
         except Exception as e:
             return {"success": False, "error": f"Navigation failed: {str(e)}"}
 
-    def load_all_containers_with_infinite_scroll(self, target_count: int = None, target_container_id: str = None) -> Dict[str, Any]:
+    def load_all_containers_with_infinite_scroll(self, target_count: int = None, target_container_id: str = None,
+                                                 known_ids=None, known_run_length: int = 20) -> Dict[str, Any]:
         """
         Scroll through containers page to load content via infinite scrolling
         
         Args:
             target_count: Stop scrolling when this many containers are loaded (None = load all)
             target_container_id: Stop scrolling when this container ID is found (None = load all)
+            known_ids: Container IDs the caller already has (set or KnownIdFilter); enables watermark mode
+            known_run_length: Watermark mode stops after this many consecutive already-known IDs
         
         Returns:
             Dict with success, total_containers, scroll_cycles, and optionally found_target_container
@@ -1840,7 +2853,8 @@ class EModalBusinessOperations:
                 except Exception:
                     pass
                 actions.move_by_offset(center_x, center_y).perform()
-                time.sleep(1)
+                # Hover effects (tooltips, row highlight) settle before the first scroll
+                self._wait_for_dom_quiet("scroll_pointer", quiet_ms=200, timeout=1)
             except Exception as e:
                 print(f"  ⚠️ Mouse positioning failed: {e}")
             
@@ -1852,8 +2866,7 @@ class EModalBusinessOperations:
                 try:
                     el = self.driver.find_element(By.XPATH, f"//*[contains(text(), '{target_container_id}')]")
                     if el and el.is_displayed():
-                        self.driver.execute_script("arguments[0].scrollIntoView({block:'center'});", el)
-                        time.sleep(0.3)
+                        self.driver.execute_script("arguments[0].scrollIntoView({block:'center'});", el)  # Instant scroll
                         print(f"✅ Target container {target_container_id} found on page!")
                         return True
                 except Exception:
@@ -1887,12 +2900,34 @@ class EModalBusinessOperations:
             # Track previous content count
             previous_count = 0
             no_new_content_count = 0
-            max_no_new_content_cycles = 3  # 15 seconds (5 sec per cycle)
+            max_no_new_content_cycles = 3
+            # Per-cycle wait for the rows a scroll requests; a cycle only counts as empty once
+            # this wait has run out. Scroll steps (~0.5s) + this stay under the ~2.65s of fixed
+            # pauses an old cycle always paid
+            new_rows_timeout = 2.0
+            last_wait_timed_out = True
             scroll_cycle = 0
             
+            # Watermark mode: stop once we scroll into a run of IDs the caller already has
+            watermark_checked = 0  # IDs (in page order) already examined
+            known_run = 0
+            id_pattern = re.compile(r'\b([A-Z]{4}\d{6,7})[A-Z]?\b')
+            
+            def count_container_ids(driver) -> int:
+                # Stale/missing grid while Angular re-renders counts as "nothing yet"
+                try:
+                    text = driver.find_element(By.XPATH, "//div[@id='searchres']").text
+                except Exception:
+                    return 0
+                return sum(1 for line in text.split('\n') if id_pattern.search(line))
+            
             print("🔢 Starting container counting...")
             
+            cycle_started = None
             while no_new_content_count < max_no_new_content_cycles:
+                if cycle_started is not None:
+                    metrics.observe("scroll_cycle", time.perf_counter() - cycle_started)
+                cycle_started = time.perf_counter()
                 scroll_cycle += 1
                 print(f"🔄 Scroll cycle {scroll_cycle} (no new content: {no_new_content_count}/{max_no_new_content_cycles})")
                 
@@ -1907,17 +2942,41 @@ class EModalBusinessOperations:
                         page_text = searchres.text
                         
                         # Count lines that match container ID pattern (4 letters + 6-7 digits)
-                        import re
                         lines = page_text.split('\n')
                         container_count = 0
+                        page_ids = []
                         for line in lines:
                             # Match container ID pattern in the line
-                            if re.search(r'\b[A-Z]{4}\d{6,7}[A-Z]?\b', line):
+                            match = id_pattern.search(line)
+                            if match:
                                 container_count += 1
+                                page_ids.append(match)
                         
                         current_count = container_count
                         print(f"  📊 Found {current_count} actual container IDs in text")
                         
+                        # Watermark: walk only IDs that appeared since the last cycle
+                        if known_ids:
+                            for match in page_ids[watermark_checked:]:
+                                if match.group(0) in known_ids or match.group(1) in known_ids:
+                                    known_run += 1
+                                else:
+                                    known_run = 0
+                                if known_run >= known_run_length:
+                                    break
+                            watermark_checked = len(page_ids)
+                            
+                            if known_run >= known_run_length:
+                                print(f"  🏁 Watermark reached: {known_run} consecutive known containers")
+                                self._capture_screenshot("after_infinite_scroll")
+                                return {
+                                    "success": True,
+                                    "total_containers": current_count,
+                                    "scroll_cycles": scroll_cycle,
+                                    "stopped_reason": f"Watermark: {known_run} consecutive known containers",
+                                    "watermark_reached": True
+                                }
+                        
                     except Exception as count_e:
                         print(f"  ⚠️ Error counting containers: {count_e}")
                         # Fallback to DOM counting
@@ -1945,14 +3004,18 @@ class EModalBusinessOperations:
                         "fast_path": True
                     }
                 
+                report_progress(phase="scrolling", scroll_cycles=scroll_cycle, containers_loaded=current_count)
+                
                 # Check if we got new content
                 if current_count > previous_count:
                     print(f"  ✅ New content loaded! {previous_count} → {current_count} containers")
                     previous_count = current_count
                     no_new_content_count = 0
-                else:
+                elif last_wait_timed_out:
                     no_new_content_count += 1
                     print(f"  ⏳ No new content ({no_new_content_count}/{max_no_new_content_cycles})")
+                else:
+                    print("  ⏳ Rows changed but count did not grow, not counting as empty")
                 
                 # Check if we've reached target count
                 if target_count and current_count >= target_count:
@@ -2038,8 +3101,7 @@ class EModalBusinessOperations:
                     # Bring target into view and focus (without clicking to avoid expanding rows)
                     if not using_window:
                         try:
-                            self.driver.execute_script("arguments[0].scrollIntoView({block:'center'});", scroll_target)
-                            time.sleep(0.3)
+                            self.driver.execute_script("arguments[0].scrollIntoView({block:'center'});", scroll_target)  # Instant scroll
                             # Move mouse to scroll target but DON'T click (prevents accidental row expansion)
                             actions.move_to_element(scroll_target).perform()
                             # Focus without clicking - use JavaScript focus
@@ -2053,42 +3115,15 @@ class EModalBusinessOperations:
                     # HEADLESS-COMPATIBLE: Scroll the matinfinitescroll container
                     # This directive triggers on scroll events within its container
                     try:
+                        # Three increments then the bottom, in one browser-side call; the row-count
+                        # wait below replaces the fixed pauses that used to follow each step
                         if using_window:
                             print("  ⚠️ Using window scroll (not recommended for matinfinitescroll)")
-                            # Window scrolling - multiple small increments
-                            for i in range(3):
-                                self.driver.execute_script("""
-                                    window.scrollBy(0, 400);
-                                    window.dispatchEvent(new Event('scroll', {bubbles: true}));
-                                    window.dispatchEvent(new WheelEvent('wheel', {deltaY: 400, bubbles: true}));
-                                """)
-                                time.sleep(0.4)
-                            self.driver.execute_script("""
-                                window.scrollTo(0, document.body.scrollHeight);
-                                window.dispatchEvent(new Event('scroll', {bubbles: true}));
-                            """)
-                            time.sleep(0.5)
+                            self.driver.execute_async_script(SCROLL_STEPS_JS, None, 3, 400, 150)
                         else:
                             # Scroll the #searchres matinfinitescroll container
                             print("  ✅ Scrolling matinfinitescroll container")
-                            # Multiple incremental scrolls with events
-                            for i in range(3):
-                                self.driver.execute_script("""
-                                    var el = arguments[0];
-                                    el.scrollTop = el.scrollTop + 300;
-                                    el.dispatchEvent(new Event('scroll', {bubbles: true}));
-                                    el.dispatchEvent(new WheelEvent('wheel', {deltaY: 300, bubbles: true}));
-                                    void el.offsetHeight;
-                                """, scroll_target)
-                                time.sleep(0.35)
-                            # Final: scroll to bottom of container
-                            self.driver.execute_script("""
-                                var el = arguments[0];
-                                el.scrollTop = el.scrollHeight;
-                                el.dispatchEvent(new Event('scroll', {bubbles: true}));
-                                void el.offsetHeight;
-                            """, scroll_target)
-                            time.sleep(0.6)
+                            self.driver.execute_async_script(SCROLL_STEPS_JS, scroll_target, 3, 300, 150)
                         print("  ✅ Scroll cycle completed")
                     except Exception as scroll_e:
                         print(f"  ⚠️ Scroll failed: {scroll_e}")
@@ -2108,9 +3143,24 @@ class EModalBusinessOperations:
                 except Exception as e:
                     print(f"  ⚠️ Scroll error: {e}")
                 
-                # Short wait to allow DOM to update (optimized like timeline search)
-                time.sleep(0.7)
-            
+                # Wait for the scroll to deliver new rows; only a real timeout marks the cycle empty
+                baseline_count = previous_count
+                wait_started = time.time()
+                grew = self._wait_until(
+                    "scroll_new_rows",
+                    lambda d: count_container_ids(d) > baseline_count,
+                    timeout=new_rows_timeout,
+                    poll=0.2,
+                )
+                last_wait_timed_out = not grew
+                if grew:
+                    # More rows may still be arriving in the same response
+                    remaining = new_rows_timeout - (time.time() - wait_started)
+                    self._wait_for_network_idle("scroll_cycle.network", timeout=min(1.0, max(0.0, remaining)),
+                                                idle_ms=250)
+            
+            if cycle_started is not None:
+                metrics.observe("scroll_cycle", time.perf_counter() - cycle_started)
             print(f"🏁 Infinite scroll completed. Total containers loaded: {previous_count}")
             print(f"📊 Final scroll cycles: {scroll_cycle}")
             self._capture_screenshot("after_infinite_scroll")
@@ -2160,9 +3210,9 @@ class EModalBusinessOperations:
             # Screenshot before waiting
             self._capture_screenshot("appointment_before_wait")
             
-            # Wait 30 seconds for page to fully load
-            print("⏳ Waiting 30 seconds for appointment page to fully load...")
-            time.sleep(30)
+            # Wait for the page to settle (up to 30 seconds)
+            print("⏳ Waiting for appointment page to fully load (up to 30s)...")
+            self._settle("appointment_page_load", max_wait=30, quiet_ms=1500)
             print("✅ Page load wait complete")
             
             # Screenshot after waiting
@@ -2225,14 +3275,14 @@ class EModalBusinessOperations:
             # Clear and focus the field
             input_field.clear()
             input_field.click()
-            time.sleep(0.5)
+            self._wait_for_focus("text_field_focus", input_field, timeout=0.5)
             
             print(f"  ✅ Found and focused {field_label} field")
             self._capture_screenshot(f"text_{field_label.lower().replace(' ', '_')}_focused")
             
             # Type the value directly
             input_field.send_keys(value)
-            time.sleep(0.5)
+            self._wait_for_value("text_field_value", input_field, value)
             
             print(f"  📝 Typed '{value}' in {field_label} field")
             self._capture_screenshot(f"text_{field_label.lower().replace(' ', '_')}_filled")
@@ -2240,7 +3290,7 @@ class EModalBusinessOperations:
             # Click blank area to confirm
             try:
                 self.driver.find_element(By.TAG_NAME, "body").click()
-                time.sleep(0.5)
+                self._settle("text_field_confirm", max_wait=0.5, quiet_ms=200)
             except:
                 pass
             
@@ -2298,7 +3348,7 @@ class EModalBusinessOperations:
             # Clear and focus the field
             input_field.clear()
             input_field.click()
-            time.sleep(1.0)  # Wait for autocomplete to open
+            self._wait_for_options("autocomplete_open", timeout=1.0)
             
             print(f"  ✅ Found and focused {field_label} field")
             self._capture_screenshot(f"autocomplete_{field_label.lower().replace(' ', '_')}_focused")
@@ -2327,20 +3377,20 @@ class EModalBusinessOperations:
             if exact_match:
                 # Found exact match - select it
                 exact_match.click()
-                time.sleep(0.5)
+                self._wait_for_selection("autocomplete_select", timeout=0.5)
                 print(f"  ✅ Exact match: Selected '{value}' from {field_label}")
                 self._capture_screenshot(f"autocomplete_{field_label.lower().replace(' ', '_')}_exact")
                 
                 # Enter the selected value directly in the field
                 input_field.clear()
                 input_field.send_keys(value)
-                time.sleep(0.5)
+                self._wait_for_value("autocomplete_value", input_field, value)
                 print(f"  📝 Entered '{value}' directly in {field_label} field")
                 
                 # Click blank space to confirm
                 try:
                     self.driver.find_element(By.TAG_NAME, "body").click()
-                    time.sleep(0.5)
+                    self._wait_for_selection("autocomplete_confirm", timeout=0.5)
                     print(f"  ✅ Confirmed {field_label} selection")
                 except:
                     pass
@@ -2359,20 +3409,20 @@ class EModalBusinessOperations:
                 # Found partial match - select it
                 partial_text = partial_match.text.strip()
                 partial_match.click()
-                time.sleep(0.5)
+                self._wait_for_selection("autocomplete_select", timeout=0.5)
                 print(f"  ✅ Partial match: Selected '{partial_text}' from {field_label}")
                 self._capture_screenshot(f"autocomplete_{field_label.lower().replace(' ', '_')}_partial")
                 
                 # Enter the selected value directly in the field
                 input_field.clear()
                 input_field.send_keys(partial_text)
-                time.sleep(0.5)
+                self._wait_for_value("autocomplete_value", input_field, partial_text)
                 print(f"  📝 Entered '{partial_text}' directly in {field_label} field")
                 
                 # Click blank space to confirm
                 try:
                     self.driver.find_element(By.TAG_NAME, "body").click()
-                    time.sleep(0.5)
+                    self._wait_for_selection("autocomplete_confirm", timeout=0.5)
                     print(f"  ✅ Confirmed {field_label} selection")
                 except:
                     pass
@@ -2388,7 +3438,8 @@ class EModalBusinessOperations:
                     fallback_text = fallback_option.text.strip()
                     
                     fallback_option.click()
-                    time.sleep(0.5)
+                    
+                    self._wait_for_selection("autocomplete_select", timeout=0.5)
                     
                     print(f"  ✅ Fallback: Selected '{fallback_text}' from {field_label}")
                     self._capture_screenshot(f"autocomplete_{field_label.lower().replace(' ', '_')}_fallback")
@@ -2396,13 +3447,13 @@ class EModalBusinessOperations:
                     # Enter the selected value directly in the field
                     input_field.clear()
                     input_field.send_keys(fallback_text)
-                    time.sleep(0.5)
+                    self._wait_for_value("autocomplete_value", input_field, fallback_text)
                     print(f"  📝 Entered '{fallback_text}' directly in {field_label} field")
                     
                     # Click blank space to confirm
                     try:
                         self.driver.find_element(By.TAG_NAME, "body").click()
-                        time.sleep(0.5)
+                        self._wait_for_selection("autocomplete_confirm", timeout=0.5)
                         print(f"  ✅ Confirmed {field_label} selection")
                     except:
                         pass
@@ -2424,7 +3475,8 @@ class EModalBusinessOperations:
                             fallback_text = fallback_option.text.strip()
                             
                             fallback_option.click()
-                            time.sleep(0.5)
+                            
+                            self._wait_for_selection("autocomplete_select", timeout=0.5)
                             
                             print(f"  ✅ Dependency fallback: Selected '{fallback_text}' from {field_label}")
                             self._capture_screenshot(f"autocomplete_{field_label.lower().replace(' ', '_')}_dependency_fallback")
@@ -2474,9 +3526,10 @@ class EModalBusinessOperations:
             
             # Click to open dropdown
             self.driver.execute_script("arguments[0].scrollIntoView(true);", dropdown)
-            time.sleep(0.5)
+            self._wait_until("dropdown_clickable", EC.element_to_be_clickable(dropdown), 0.5)
             dropdown.click()
-            time.sleep(2)  # Increased wait for dropdown to fully open and load options
+            # Wait for the options panel to render
+            self._wait_for_element("dropdown_options", (By.CSS_SELECTOR, "mat-option"), timeout=2, visible=True)
             
             print(f"  ✅ Opened {dropdown_label} dropdown")
             self._capture_screenshot(f"dropdown_{dropdown_label.lower().replace(' ', '_')}_opened")
@@ -2488,19 +3541,17 @@ class EModalBusinessOperations:
                 print(f"  📝 Normalized search: '{option_text}' → '{normalized_text}'")
             
             # Wait for options to be visible and find option by exact text
-            options = None
-            for attempt in range(3):  # Try 3 times with increasing waits
+            def find_exact_options(driver):
                 # Try with normalized text first
-                options = self.driver.find_elements(By.XPATH, f"//mat-option//span[normalize-space(text())='{normalized_text}']")
+                found = driver.find_elements(By.XPATH, f"//mat-option//span[normalize-space(text())='{normalized_text}']")
                 
                 # If not found and normalized is different, try original text
-                if not options and normalized_text != option_text:
-                    options = self.driver.find_elements(By.XPATH, f"//mat-option//span[normalize-space(text())='{option_text}']")
-                
-                if options:
-                    break
-                print(f"  ⏳ Waiting for options to load (attempt {attempt + 1}/3)...")
-                time.sleep(1)
+                if not found and normalized_text != option_text:
+                    found = driver.find_elements(By.XPATH, f"//mat-option//span[normalize-space(text())='{option_text}']")
+                return found
+            
+            # Options can load lazily: poll for the exact option for up to 3 seconds
+            options = self._wait_until("dropdown_option", find_exact_options, 3)
             
             if not options:
                 # Try partial match as fallback (with both normalized and original)
@@ -2522,9 +3573,9 @@ class EModalBusinessOperations:
                             fallback_text = fallback_option.text.strip()
                             
                             self.driver.execute_script("arguments[0].scrollIntoView(true);", fallback_option)
-                            time.sleep(0.3)
+                            self._wait_until("dropdown_option_clickable", EC.element_to_be_clickable(fallback_option), 0.3)
                             fallback_option.click()
-                            time.sleep(1)
+                            self._wait_for_selection("dropdown_select", timeout=1)
                             
                             print(f"  ✅ Fallback: Selected '{fallback_text}' from {dropdown_label}")
                             self._capture_screenshot(f"dropdown_{dropdown_label.lower().replace(' ', '_')}_fallback_selected")
@@ -2556,9 +3607,9 @@ class EModalBusinessOperations:
             # Click the option
             option = options[0]
             self.driver.execute_script("arguments[0].scrollIntoView(true);", option)
-            time.sleep(0.3)
+            self._wait_until("dropdown_option_clickable", EC.element_to_be_clickable(option), 0.3)
             option.click()
-            time.sleep(1)
+            self._wait_for_selection("dropdown_select", timeout=1)
             
             print(f"  ✅ Selected '{option_text}' from {dropdown_label}")
             self._capture_screenshot(f"dropdown_{dropdown_label.lower().replace(' ', '_')}_selected")
@@ -2584,9 +3635,9 @@ class EModalBusinessOperations:
         try:
             print(f"📦 Filling container/booking number: {container_id}...")
             
-            # Wait 3 seconds before starting to fill (allows UI to stabilize after dropdown selections)
-            print("  ⏳ Waiting 3 seconds for UI to stabilize...")
-            time.sleep(3)
+            # Let the UI stabilize after dropdown selections (up to 3 seconds)
+            print("  ⏳ Waiting for UI to stabilize...")
+            self._settle("container_field_ready", max_wait=3)
             print("  ✅ Ready to fill container/booking number")
             
             # First, try to find booking number field (text input)
@@ -2608,25 +3659,25 @@ class EModalBusinessOperations:
                     for btn in remove_buttons:
                         try:
                             btn.click()
-                            time.sleep(0.3)
+                            self._wait_until("chip_removed", EC.staleness_of(btn), 0.3)
                         except:
                             pass
                     self._capture_screenshot("booking_numbers_cleared")
                 
                 # Click and type
                 booking_input.click()
-                time.sleep(0.3)
+                self._wait_for_focus("chip_input_focus", booking_input)
                 booking_input.send_keys(container_id)
-                time.sleep(0.5)
+                self._wait_for_value("chip_input_value", booking_input, container_id)
                 
                 # Press Enter to add as chip (same as container)
                 booking_input.send_keys(Keys.ENTER)
-                time.sleep(1)
+                self._wait_for_element("chip_added", (By.XPATH, f"//mat-chip//span[contains(text(),'{container_id}')]"), timeout=1)
                 
                 # Click blank area to confirm chip is added
                 try:
                     self.driver.find_element(By.TAG_NAME, "body").click()
-                    time.sleep(0.5)
+                    self._settle("chip_confirm", max_wait=0.5, quiet_ms=200)
                     print(f"  ✅ Booking number chip confirmed")
                 except:
                     pass
@@ -2652,7 +3703,7 @@ class EModalBusinessOperations:
                 for btn in remove_buttons:
                     try:
                         btn.click()
-                        time.sleep(0.3)
+                        self._wait_until("chip_removed", EC.staleness_of(btn), 0.3)
                     except:
                         pass
                 self._capture_screenshot("containers_cleared")
@@ -2672,19 +3723,19 @@ class EModalBusinessOperations:
             
             # Click and type
             container_input.click()
-            time.sleep(0.3)
+            self._wait_for_focus("chip_input_focus", container_input)
             container_input.send_keys(container_id)
-            time.sleep(0.5)
+            self._wait_for_value("chip_input_value", container_input, container_id)
             
             # Press Enter to add as chip
             container_input.send_keys(Keys.ENTER)
-            time.sleep(1)
+            self._wait_for_element("chip_added", (By.XPATH, f"//mat-chip//span[contains(text(),'{container_id}')]"), timeout=1)
             
             # Click blank area to confirm chip is added
             try:
                 # Click on the page body to remove focus from input
                 self.driver.find_element(By.TAG_NAME, "body").click()
-                time.sleep(0.5)
+                self._settle("chip_confirm", max_wait=0.5, quiet_ms=200)
                 print(f"  ✅ Container chip confirmed")
             except:
                 pass
@@ -2789,7 +3840,7 @@ class EModalBusinessOperations:
             
             # Scroll into view (center of viewport)
             self.driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", next_button)
-            time.sleep(1)
+            self._wait_until("next_button_clickable", EC.element_to_be_clickable(next_button), 1)
             
             # Try regular click first
             try:
@@ -2801,9 +3852,9 @@ class EModalBusinessOperations:
                 self.driver.execute_script("arguments[0].click();", next_button)
                 print(f"  ✅ Clicked Next button (JavaScript click)")
             
-            # Wait for transition and stepper UI to update
-            print(f"  ⏳ Waiting 25 seconds for stepper to update...")
-            time.sleep(25)
+            # Wait for transition and stepper UI to update (up to 25 seconds)
+            print(f"  ⏳ Waiting for stepper to update (up to 25s)...")
+            self._settle("stepper_transition", max_wait=25, quiet_ms=1500)
             print(f"  ✅ Wait complete, checking stepper...")
             
             # Verify phase transition using stepper
@@ -2843,11 +3894,11 @@ class EModalBusinessOperations:
                 try:
                     parent = checkbox.find_element(By.XPATH, "./ancestor::mat-checkbox")
                     parent.click()
-                    time.sleep(1)
+                    self._wait_until("checkbox_selected", EC.element_to_be_selected(checkbox), 1)
                     print("  ✅ Checkbox selected")
                 except:
                     checkbox.click()
-                    time.sleep(1)
+                    self._wait_until("checkbox_selected", EC.element_to_be_selected(checkbox), 1)
                     print("  ✅ Checkbox selected (direct)")
             else:
                 print("  ✅ Checkbox already selected")
@@ -2890,10 +3941,10 @@ class EModalBusinessOperations:
             
             # Fill the PIN field
             pin_input.click()
-            time.sleep(0.3)
+            self._wait_for_focus("pin_focus", pin_input)
             pin_input.clear()
             pin_input.send_keys(pin_code)
-            time.sleep(0.5)
+            self._wait_for_value("pin_value", pin_input, pin_code)
             print(f"  ✅ PIN code entered: {pin_code}")
             self._capture_screenshot("pin_entered")
             return {"success": True, "pin_code": pin_code}
@@ -2939,18 +3990,18 @@ class EModalBusinessOperations:
             
             # Click to open dropdown
             plate_input.click()
-            time.sleep(0.3)
+            self._wait_for_focus("plate_focus", plate_input)
             plate_input.clear()
             
             # If wildcard, just trigger the dropdown without typing specific value
             if is_wildcard:
                 # Type a space or click to trigger dropdown
                 plate_input.send_keys(" ")
-                time.sleep(1.5)  # Wait for autocomplete to populate
+                self._wait_for_options("plate_options", timeout=1.5)  # Wait for autocomplete to populate
                 
-                # Clear the space
+                # Clear the space (the list refreshes for the empty filter)
                 plate_input.clear()
-                time.sleep(0.5)
+                self._wait_for_options("plate_options_refresh", timeout=0.5)
                 
                 print(f"  🔍 Searching for any available truck plate in list...")
                 
@@ -2963,13 +4014,13 @@ class EModalBusinessOperations:
                         first_option = all_options[0]
                         selected_text = first_option.text.strip()
                         first_option.click()
-                        time.sleep(0.5)
+                        self._wait_for_selection("plate_select", timeout=0.5)
                         print(f"  ✅ Selected truck plate from list: '{selected_text}'")
                         
                         # Click blank area to confirm selection
                         try:
                             self.driver.find_element(By.TAG_NAME, "body").click()
-                            time.sleep(0.5)
+                            self._wait_for_selection("plate_confirm", timeout=0.5)
                             print(f"  ✅ Truck plate confirmed")
                         except:
                             pass
@@ -2990,20 +4041,20 @@ class EModalBusinessOperations:
             
             # Normal flow: type the specific truck plate
             plate_input.send_keys(truck_plate)
-            time.sleep(1.5)  # Wait for autocomplete to populate
+            self._wait_for_options("plate_options", timeout=1.5)  # Wait for autocomplete to populate
             
             # Try to find exact match
             try:
                 options = self.driver.find_elements(By.XPATH, f"//mat-option//span[contains(text(),'{truck_plate}')]")
                 if options:
                     options[0].click()
-                    time.sleep(0.5)
+                    self._wait_for_selection("plate_select", timeout=0.5)
                     print(f"  ✅ Selected '{truck_plate}' from autocomplete")
                     
                     # Click blank area to confirm selection
                     try:
                         self.driver.find_element(By.TAG_NAME, "body").click()
-                        time.sleep(0.5)
+                        self._wait_for_selection("plate_confirm", timeout=0.5)
                         print(f"  ✅ Truck plate confirmed")
                     except:
                         pass
@@ -3027,13 +4078,13 @@ class EModalBusinessOperations:
                         first_option = all_options[0]
                         selected_text = first_option.text.strip()
                         first_option.click()
-                        time.sleep(0.5)
+                        self._wait_for_selection("plate_select", timeout=0.5)
                         print(f"  ✅ Selected alternative truck plate: '{selected_text}'")
                         
                         # Click blank area to confirm selection
                         try:
                             self.driver.find_element(By.TAG_NAME, "body").click()
-                            time.sleep(0.5)
+                            self._wait_for_selection("plate_confirm", timeout=0.5)
                             print(f"  ✅ Truck plate confirmed")
                         except:
                             pass
@@ -3056,7 +4107,7 @@ class EModalBusinessOperations:
             # Click blank area to confirm
             try:
                 self.driver.find_element(By.TAG_NAME, "body").click()
-                time.sleep(0.5)
+                self._wait_for_selection("plate_confirm", timeout=0.5)
             except:
                 pass
             
@@ -3094,7 +4145,7 @@ class EModalBusinessOperations:
                                 # Fallback to JavaScript click
                                 self.driver.execute_script("arguments[0].click();", close_btn)
                             
-                            time.sleep(0.5)
+                            self._wait_until("popup_closed", EC.invisibility_of_element(close_btn), 0.5)
                             print(f"  ✅ Popup {idx} closed")
                     except Exception as btn_error:
                         print(f"  ⚠️ Could not click button {idx}: {btn_error}")
@@ -3180,7 +4231,7 @@ class EModalBusinessOperations:
                     try:
                         # Scroll span into view
                         self.driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", span)
-                        time.sleep(0.5)
+                        self._wait_until("chassis_toggle_clickable", EC.element_to_be_clickable(span), 0.5)
                         
                         # Try to find parent button and click it
                         parent = None
@@ -3196,7 +4247,7 @@ class EModalBusinessOperations:
                             print(f"  🖱️  Clicking {target} button (parent)...")
                             try:
                                 parent.click()
-                                time.sleep(1)
+                                self._settle("chassis_toggle", max_wait=1)
                                 print(f"  ✅ Toggled to {target}")
                                 self._capture_screenshot("own_chassis_toggled")
                                 return {"success": True, "own_chassis": own_chassis, "was_toggled": True}
@@ -3206,7 +4257,7 @@ class EModalBusinessOperations:
                         # If parent click failed or parent not found, click span directly
                         print(f"  🖱️  Clicking {target} button (direct span)...")
                         span.click()
-                        time.sleep(1)
+                        self._settle("chassis_toggle", max_wait=1)
                         print(f"  ✅ Toggled to {target} (direct click)")
                         self._capture_screenshot("own_chassis_toggled")
                         return {"success": True, "own_chassis": own_chassis, "was_toggled": True}
@@ -3254,18 +4305,17 @@ class EModalBusinessOperations:
             
             # Clear and set to 1
             quantity_input.clear()
-            time.sleep(0.3)
             quantity_input.click()
-            time.sleep(0.3)
+            self._wait_for_focus("quantity_focus", quantity_input)
             quantity_input.send_keys("1")
-            time.sleep(0.5)
+            self._wait_for_value("quantity_value", quantity_input, "1")
             
             print(f"  ✅ Quantity set to 1")
             self._capture_screenshot("quantity_filled")
             
-            # Wait 3 seconds as requested
-            print(f"  ⏳ Waiting 3 seconds...")
-            time.sleep(3)
+            # Let the form react to the quantity (at most the 3 seconds it used to sleep)
+            print(f"  ⏳ Waiting for the page to update...")
+            self._settle("quantity_update", max_wait=3)
             
             return {"success": True, "quantity": "1"}
             
@@ -3297,11 +4347,10 @@ class EModalBusinessOperations:
             
             # Clear and fill
             unit_input.clear()
-            time.sleep(0.3)
             unit_input.click()
-            time.sleep(0.3)
+            self._wait_for_focus("unit_number_focus", unit_input)
             unit_input.send_keys(unit_number)
-            time.sleep(0.5)
+            self._wait_for_value("unit_number_value", unit_input, unit_number)
             
             print(f"  ✅ Unit number filled: {unit_number}")
             self._capture_screenshot("unit_number_filled")
@@ -3328,11 +4377,10 @@ class EModalBusinessOperations:
                     )
                     
                     seal_input.clear()
-                    time.sleep(0.2)
                     seal_input.click()
-                    time.sleep(0.2)
+                    self._wait_for_focus("seal_focus", seal_input, timeout=0.2)
                     seal_input.send_keys(seal_value)
-                    time.sleep(0.3)
+                    self._wait_for_value("seal_value", seal_input, seal_value, timeout=0.3)
                     
                     filled_count += 1
                     print(f"  ✅ Filled Seal {i}")
@@ -3387,7 +4435,9 @@ class EModalBusinessOperations:
                 # Try JavaScript click
                 self.driver.execute_script("arguments[0].click();", calendar_icon)
             
-            time.sleep(1)
+            # Wait for the date picker overlay
+            self._wait_for_element("calendar_open", (By.CSS_SELECTOR, "mat-calendar, .mat-datepicker-content"),
+                                   timeout=1, visible=True)
             print(f"  ✅ Calendar clicked")
             
             # Take screenshot to show calendar
@@ -3444,7 +4494,8 @@ class EModalBusinessOperations:
             
             # Scroll into view and click
             self.driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", dropdown)
-            time.sleep(1)
+            # Smooth scroll: wait until the dropdown is clickable (no longer moving under an overlay)
+            self._wait_until("appointment_dropdown_clickable", EC.element_to_be_clickable(dropdown), 1)
             
             # Try clicking
             try:
@@ -3455,7 +4506,8 @@ class EModalBusinessOperations:
                 self.driver.execute_script("arguments[0].click();", dropdown)
                 print("  ✅ Clicked dropdown (JavaScript click)")
             
-            time.sleep(2)
+            # Slots are fetched when the panel opens: wait for options, then for the list to settle
+            self._wait_for_options("appointment_options", timeout=2)
             print("  ✅ Opened appointment dropdown")
             self._capture_screenshot("appointment_dropdown_opened")
             
@@ -3472,7 +4524,7 @@ class EModalBusinessOperations:
             # Close dropdown
             try:
                 self.driver.find_element(By.TAG_NAME, "body").click()
-                time.sleep(0.5)
+                self._wait_for_selection("appointment_dropdown_close", timeout=0.5)
             except:
                 pass
             
@@ -3526,9 +4578,10 @@ class EModalBusinessOperations:
                 return {"success": False, "error": "Submit button not found"}
             submit_button = submit_buttons[0]
             self.driver.execute_script("arguments[0].scrollIntoView(true);", submit_button)
-            time.sleep(0.5)
+            self._wait_until("submit_clickable", EC.element_to_be_clickable(submit_button), 0.5)
             submit_button.click()
-            time.sleep(3)
+            # The submission request must finish before the confirmation screenshot
+            self._settle("appointment_submit", max_wait=3)
             print(f"  ✅ Submit button clicked - Appointment submitted!")
             self._capture_screenshot("appointment_submitted")
             return {"success": True}
@@ -3789,8 +4842,8 @@ class EModalBusinessOperations:
         try:
             print("\n🚗 Navigating to My Appointments page...")
             self.driver.get("https://truckerportal.emodal.com/myappointments")
-            print("⏳ Waiting 45 seconds for page to fully load...")
-            time.sleep(45)  # Wait for page to fully load before starting operations
+            print("⏳ Waiting for page to fully load (up to 45s)...")
+            self._settle("myappointments_load", max_wait=45, quiet_ms=1500)
             self._capture_screenshot("myappointments_page")
             print("✅ Navigated to My Appointments page")
             return {"success": True}
@@ -3821,6 +4874,7 @@ class EModalBusinessOperations:
             while True:
                 scroll_cycles += 1
                 print(f"\n🔄 Cycle {scroll_cycles} (no new: {no_new_content_count}/{max_no_new_content})")
+                report_progress(phase="selecting_appointments", scroll_cycles=scroll_cycles, selected_count=selected_count)
                 
                 # Find all checkboxes
                 try:
@@ -3841,9 +4895,8 @@ class EModalBusinessOperations:
                         is_checked = checkbox.get_attribute('aria-checked') == 'true'
                         
                         if not is_checked:
-                            # Scroll into view
+                            # Scroll into view (instant, no settle wait needed)
                             self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", checkbox)
-                            time.sleep(0.2)
                             
                             # Try multiple click strategies
                             clicked = False
@@ -3882,7 +4935,11 @@ class EModalBusinessOperations:
                                     pass
                             
                             if clicked:
-                                time.sleep(0.2)
+                                self._wait_until(
+                                    "appointment_checkbox_toggle",
+                                    lambda d, cb=checkbox: cb.get_attribute('aria-checked') == 'true',
+                                    timeout=0.5, poll=0.05
+                                )
                                 newly_selected += 1
                                 selected_count += 1
                                 
@@ -3910,7 +4967,13 @@ class EModalBusinessOperations:
                     if no_new_content_count < max_no_new_content:
                         print(f"  📜 Scrolling to load more content...")
                         self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                        time.sleep(0.7)  # Short wait like timeline (instead of 3 seconds)
+                        # Wait for more checkboxes to render (bounded by the old 0.7s pause)
+                        checkbox_count = len(checkboxes)
+                        self._wait_until(
+                            "appointment_scroll_load",
+                            lambda d: len(d.find_elements(By.XPATH, "//input[@type='checkbox' and contains(@class, 'mat-checkbox-input')]")) > checkbox_count,
+                            timeout=0.7
+                        )
                 
                 # Check if we should stop
                 if no_new_content_count >= max_no_new_content:
@@ -3944,14 +5007,14 @@ class EModalBusinessOperations:
             print("\n📥 Clicking Excel download button...")
             self._capture_screenshot("before_excel_click")
             
-            # Wait 5 seconds as requested
-            print("  ⏳ Waiting 5 seconds before clicking...")
-            time.sleep(5)
+            # Let selection updates finish (up to 5 seconds)
+            print("  ⏳ Waiting for page to settle before clicking...")
+            self._settle("before_excel_click", max_wait=5)
             
             # Scroll to top to ensure toolbar is visible
             print("  📜 Scrolling to top to reveal toolbar...")
             self.driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(1)
+            self._wait_for_dom_quiet("scroll_to_toolbar", quiet_ms=200, timeout=1)
             
             # Try multiple selectors for the Excel download button
             excel_button = None
@@ -4017,8 +5080,8 @@ class EModalBusinessOperations:
             
             self._capture_screenshot("after_excel_click")
             
-            # Wait for download to start
-            time.sleep(3)
+            # Wait for the export request to complete (up to 3 seconds)
+            self._wait_for_network_idle("excel_export_request", timeout=3)
             
             return {"success": True}
             
@@ -4029,29 +5092,116 @@ class EModalBusinessOperations:
             traceback.print_exc()
             return {"success": False, "error": str(e)}
     
-    def scrape_containers_to_excel(self) -> Dict[str, Any]:
-        """Extract container data using Ctrl+A Ctrl+C behavior"""
+    def extract_container_rows_dom(self) -> Dict[str, Any]:
+        """Extract the containers grid as structured rows with one JavaScript call.
+
+        Walks the table rows in the browser and returns header names plus one array of
+        cell texts per row (icon/button text removed). Cells are mapped to CONTAINER_COLUMNS
+        by header name, falling back to position when the headers cannot be matched.
+        """
         try:
-            import pandas as pd
-            from openpyxl import Workbook
-            from openpyxl.styles import Font, Alignment, PatternFill
-            import re
-            from selenium.webdriver.common.keys import Keys
+            grid = self.driver.execute_script("""
+                var root = document.getElementById('searchres') || document;
+                function cellText(cell) {
+                    var clone = cell.cloneNode(true);
+                    clone.querySelectorAll('mat-icon, .mat-icon, button').forEach(function(n) { n.remove(); });
+                    return (clone.textContent || '').replace(/\\s+/g, ' ').trim();
+                }
+                var headerCells = root.querySelectorAll('thead th, mat-header-cell, [role=columnheader]');
+                var headers = Array.prototype.map.call(headerCells, cellText);
+                var rows = [];
+                root.querySelectorAll('tbody tr, mat-row').forEach(function(row) {
+                    var cells = row.querySelectorAll('td, mat-cell');
+                    if (cells.length < 3) { return; }  // expanded timeline/detail rows
+                    rows.push(Array.prototype.map.call(cells, cellText));
+                });
+                return {headers: headers, rows: rows};
+            """)
+            
+            headers = (grid or {}).get("headers") or []
+            raw_rows = (grid or {}).get("rows") or []
+            print(f"🧩 DOM extraction: {len(raw_rows)} rows, {len(headers)} header cells")
+            
+            def norm(name):
+                return re.sub(r'[^a-z0-9]', '', (name or '').lower())
+            
+            # Column index per schema column: by header name, else by position after icon-only columns
+            header_index = {norm(h): i for i, h in enumerate(headers) if norm(h)}
+            column_index = [header_index.get(norm(col)) for col in CONTAINER_COLUMNS]
+            if sum(idx is not None for idx in column_index) < 10:
+                named = [i for i, h in enumerate(headers) if norm(h)] if headers else []
+                offset = named[0] if named else 0
+                column_index = [offset + i for i in range(len(CONTAINER_COLUMNS))]
+            
+            rows = []
+            for cells in raw_rows:
+                row_data = {}
+                for col, idx in zip(CONTAINER_COLUMNS, column_index):
+                    row_data[col] = cells[idx] if idx is not None and idx < len(cells) else ''
+                match = CONTAINER_ID_FIELD_RE.match(row_data['Container #'])
+                if not match:
+                    continue
+                row_data['Container #'] = re.sub(r'[A-Z]$', '', match.group(1))
+                rows.append(row_data)
+            
+            return {"success": True, "rows": rows, "headers": headers, "method": "dom"}
+        except Exception as e:
+            return {"success": False, "error": f"DOM extraction failed: {str(e)}", "rows": []}
+    
+    def scrape_containers_to_excel(self, extraction: str = "text", row_sink: Optional[dict] = None,
+                                   export_format: str = "xlsx") -> Dict[str, Any]:
+        """Extract container data using Ctrl+A Ctrl+C behavior
+
+        Args:
+            extraction: "text" (select-all text parsing) or "dom" (structured rows from one
+                        JavaScript call; falls back to "text" if it finds no rows)
+            row_sink: Optional dict filled with container ID -> row as rows are parsed
+            export_format: Output file format: "xlsx", "csv", "jsonl" or "parquet"
+                           (None = no file; rows only go to row_sink)
+        """
+        try:
+            export_format = export_writers.normalize_format(export_format) if export_format else None
             
             print("📊 Extracting container data using select all...")
             self._capture_screenshot("before_scraping")
             
-            # Wait for page to be loaded
-            time.sleep(2)
+            # Wait for the grid to finish rendering (up to 2 seconds)
+            self._settle("before_scraping", max_wait=2)
             
             # Define expected columns
-            columns = [
-                'Container #', 'Trade Type', 'Status', 'Holds', 
-                'Pregate Ticket#', 'Emodal Pregate Status', 'Gate Status',
-                'Origin', 'Destination', 'Current Loc', 'Line', 
-                'Vessel Name', 'Vessel Code', 'Voyage', 'Size Type', 
-                'Fees', 'LFD/GTD', 'Tags'
-            ]
+            columns = CONTAINER_COLUMNS
+            
+            if extraction == "dom":
+                dom_result = self.extract_container_rows_dom()
+                if dom_result.get("success") and dom_result.get("rows"):
+                    if row_sink is not None:
+                        for row in dom_result["rows"]:
+                            row_sink[row['Container #']] = row
+                    if export_format is None:
+                        print(f"✅ Extracted {len(dom_result['rows'])} containers via DOM (no file requested)")
+                        self._capture_screenshot("after_scraping")
+                        return {"success": True, "total_containers": len(dom_result["rows"]), "method": "dom"}
+                    download_dir = os.path.join(DOWNLOADS_DIR, self.session.session_id)
+                    os.makedirs(download_dir, exist_ok=True)
+                    ts = datetime.now().strftime('%Y%m%d_%H%M%S')
+                    excel_filename = f"containers_scraped_{ts}.{export_format}"
+                    excel_path = os.path.join(download_dir, excel_filename)
+                    
+                    artifact_store.ensure_space(0, excel_path)
+                    total_containers = write_containers_export(dom_result["rows"], excel_path, columns, export_format)
+                    file_size = os.path.getsize(excel_path)
+                    print(f"✅ {export_format.upper()} file created: {excel_filename} ({file_size} bytes, {total_containers} containers via DOM)")
+                    self._capture_screenshot("after_scraping")
+                    
+                    return {
+                        "success": True,
+                        "file_path": excel_path,
+                        "file_name": excel_filename,
+                        "file_size": file_size,
+                        "total_containers": total_containers,
+                        "method": "dom"
+                    }
+                print(f"⚠️ DOM extraction found no rows ({dom_result.get('error', 'empty grid')}), falling back to text selection...")
             
             # Extract text using JavaScript selection and copy (same result as Ctrl+A Ctrl+C)
             try:
@@ -4098,218 +5248,71 @@ class EModalBusinessOperations:
                 print(f"❌ All text extraction methods failed: {e}")
                 return {"success": False, "error": f"Could not extract page text: {e}"}
             
-            # DEBUG: Save extracted text to file for debugging (RAW TEXT ONLY)
             download_dir = os.path.join(DOWNLOADS_DIR, self.session.session_id)
             os.makedirs(download_dir, exist_ok=True)
             
-            debug_text_file = os.path.join(download_dir, "copied_text.txt")
-            try:
-                with open(debug_text_file, 'w', encoding='utf-8') as f:
-                    # Just the raw text - exactly what was copied
-                    f.write(page_text)
-                print(f"💾 Copied text saved to: {debug_text_file}")
-                print(f"   File size: {os.path.getsize(debug_text_file)} bytes")
-                print(f"   Characters: {len(page_text)}")
-            except Exception as debug_e:
-                print(f"⚠️ Could not save copied text file: {debug_e}")
-            
-            # Parse container data from text
-            lines = page_text.split('\n')
-            containers_data = []
-            
-            # Skip header lines - look for "Container #" then "Tags" (last column header)
-            start_idx = 0
-            found_container_header = False
-            for i, line in enumerate(lines):
-                if 'Container #' in line:
-                    found_container_header = True
-                if found_container_header and 'Tags' in line:
-                    start_idx = i + 1
-                    print(f"✅ Found header section ending at line {i}, data starts at line {start_idx}")
-                    break
-            
-            if start_idx == 0:
-                print("⚠️ Header not found, trying to find first container ID")
-                # Look for first container ID pattern
-                for i, line in enumerate(lines):
-                    if re.match(r'^([A-Z]{4}\d{6,7}[A-Z]?)\s*$', line.strip()):
-                        start_idx = i
-                        print(f"✅ Found first container at line {i}")
-                        break
-            
-            i = start_idx
-            while i < len(lines):
-                line = lines[i].strip()
-                
-                # Check if line contains tabs (all data on one line) or just container ID
-                if '\t' in line:
-                    # Tab-separated format: all fields on one line
-                    fields = line.split('\t')
-                    fields = [f.strip() for f in fields if f.strip()]  # Remove empty fields
-                    
-                    # Remove icon text from fields (keyboard_arrow_right, info, more_vert, etc.)
-                    icon_texts = ['keyboard_arrow_right', 'info', 'more_vert', 'expand_more', 'expand_less']
-                    # Remove standalone icon fields
-                    fields = [f for f in fields if f not in icon_texts]
-                    # Also remove icon text from within fields (e.g., "info NO" -> "NO")
-                    cleaned_fields = []
-                    for field in fields:
-                        for icon in icon_texts:
-                            field = field.replace(icon, '').strip()
-                        if field:  # Only add non-empty fields
-                            cleaned_fields.append(field)
-                    fields = cleaned_fields
-                    
-                    # First field should be container ID (after removing icons)
-                    if fields and re.match(r'^([A-Z]{4}\d{6,7}[A-Z]?)$', fields[0]):
-                        container_id_raw = fields[0]
-                        container_id_clean = re.sub(r'[A-Z]$', '', container_id_raw)
-                        
-                        # Build row data from tab-separated fields
-                        row_data = {}
-                        for idx, field in enumerate(fields):
-                            if idx == 0:
-                                row_data['Container #'] = container_id_clean
-                            elif idx < len(columns):
-                                row_data[columns[idx]] = field
-                        
-                        # Collect Fees, LFD/GTD, Tags from next 3 lines if not in current line
-                        if len(row_data) < len(columns):
-                            for j in range(i + 1, min(i + 4, len(lines))):
-                                next_line = lines[j].strip()
-                                if next_line and len(row_data) < len(columns):
-                                    row_data[columns[len(row_data)]] = next_line
-                        
-                        if len(row_data) >= 10:
-                            containers_data.append(row_data)
-                            if len(containers_data) % 10 == 0:
-                                print(f"  Parsed {len(containers_data)} containers...")
-                        
-                        i += 1
-                        continue
-                
-                # Newline-separated format: each field on its own line
-                match = re.match(r'^([A-Z]{4}\d{6,7}[A-Z]?)\s*$', line)
-                if match:
-                    container_id_raw = match.group(1)
-                    container_id_clean = re.sub(r'[A-Z]$', '', container_id_raw)
-                    
-                    # Collect next 17 fields (18 columns total including container ID)
-                    row_data = {'Container #': container_id_clean}
-                    
-                    # Get the next fields
-                    field_idx = 1
-                    for j in range(i + 1, min(i + 25, len(lines))):
-                        field_line = lines[j].strip()
-                        if field_line and field_idx < len(columns):
-                            row_data[columns[field_idx]] = field_line
-                            field_idx += 1
-                            if field_idx >= len(columns):
-                                break
-                    
-                    # Only add if we have all or most fields
-                    if len(row_data) >= 10:  # At least 10 fields
-                        containers_data.append(row_data)
-                        if len(containers_data) % 10 == 0:
-                            print(f"  Parsed {len(containers_data)} containers...")
-                        i = i + field_idx  # Skip processed lines
-                        continue
-                
-                i += 1
-            
-            print(f"✅ Parsed {len(containers_data)} containers total")
-            
-            # DEBUG: Save parsing results to debug file
-            try:
-                debug_parse_file = os.path.join(download_dir, "parsing_debug.txt")
-                with open(debug_parse_file, 'w', encoding='utf-8') as f:
-                    f.write("="*70 + "\n")
-                    f.write("PARSING DEBUG RESULTS\n")
-                    f.write("="*70 + "\n")
-                    f.write(f"Total containers parsed: {len(containers_data)}\n")
-                    f.write(f"Header start index: {start_idx}\n")
-                    f.write(f"Total lines: {len(lines)}\n")
-                    f.write("="*70 + "\n\n")
-                    
-                    if containers_data:
-                        f.write("SAMPLE CONTAINERS (first 3):\n\n")
-                        for i, container in enumerate(containers_data[:3], 1):
-                            f.write(f"{i}. {container.get('Container #', 'N/A')}\n")
-                            for key, value in container.items():
-                                f.write(f"   {key}: {value}\n")
-                            f.write("\n")
-                    else:
-                        f.write("NO CONTAINERS PARSED!\n\n")
-                        f.write("First 50 lines of extracted text:\n")
-                        f.write("-"*70 + "\n")
-                        for i, line in enumerate(lines[:50], 1):
-                            f.write(f"{i:3d}: {repr(line)}\n")
-                
-                print(f"💾 Parsing debug saved to: {debug_parse_file}")
-                print(f"   File size: {os.path.getsize(debug_parse_file)} bytes")
-            except Exception as debug_e:
-                print(f"⚠️ Could not save parsing debug file: {debug_e}")
-            
-            # List all files in download directory for verification
-            print(f"\n📂 Files in download directory ({download_dir}):")
-            try:
-                for fname in os.listdir(download_dir):
-                    fpath = os.path.join(download_dir, fname)
-                    fsize = os.path.getsize(fpath) if os.path.isfile(fpath) else 0
-                    print(f"   - {fname} ({fsize} bytes)")
-            except Exception as list_e:
-                print(f"   ⚠️ Could not list files: {list_e}")
-            
-            if not containers_data:
-                return {"success": False, "error": "No container data extracted"}
+            # Diagnostics "full": raw copied text (background, gzip-streamed)
+            if self.diagnostics >= diagnostics.FULL:
+                self.write_diagnostics(os.path.join(download_dir, "copied_text.txt"),
+                                       lambda: diagnostics.iter_chunks(page_text))
             
             ts = datetime.now().strftime('%Y%m%d_%H%M%S')
-            excel_filename = f"containers_scraped_{ts}.xlsx"
+            excel_filename = f"containers_scraped_{ts}.{export_format}"
             excel_path = os.path.join(download_dir, excel_filename)
             
-            # Create DataFrame
-            df = pd.DataFrame(containers_data)
-            
-            # Ensure all columns exist
-            for col in columns:
-                if col not in df.columns:
-                    df[col] = ''
-            
-            # Reorder columns to match expected format
-            df = df[columns]
-            
-            # Write to Excel with formatting
-            with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Containers', index=False)
-                
-                # Get workbook and worksheet
-                workbook = writer.book
-                worksheet = writer.sheets['Containers']
-                
-                # Format header row
-                header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
-                header_font = Font(color='FFFFFF', bold=True)
-                
-                for cell in worksheet[1]:
-                    cell.fill = header_fill
-                    cell.font = header_font
-                    cell.alignment = Alignment(horizontal='center', vertical='center')
-                
-                # Auto-adjust column widths
-                for column in worksheet.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    adjusted_width = min(max_length + 2, 50)
-                    worksheet.column_dimensions[column_letter].width = adjusted_width
+            # Parse rows lazily and feed them straight into the Excel writer
+            sample_rows = []
+            
+            def tracked_rows():
+                count = 0
+                for row in iter_container_rows(io.StringIO(page_text), columns):
+                    count += 1
+                    if len(sample_rows) < 3:
+                        sample_rows.append(row)
+                    if row_sink is not None:
+                        row_sink[row['Container #']] = row
+                    if count % 10 == 0:
+                        print(f"  Parsed {count} containers...")
+                        report_progress(phase="parsing", containers_parsed=count)
+                    yield row
+            
+            if export_format is None:
+                total_containers = sum(1 for _ in tracked_rows())  # Rows only go to row_sink
+            else:
+                artifact_store.ensure_space(len(page_text), excel_path)  # Exports are about the size of the raw text or smaller
+                total_containers = write_containers_export(tracked_rows(), excel_path, columns, export_format)
+            
+            print(f"✅ Parsed {total_containers} containers total")
+            report_progress(phase="writing_excel", containers_parsed=total_containers)
+            
+            # Diagnostics "basic" and up: parsing report (background); "full" also lists the folder
+            if self.diagnostics >= diagnostics.BASIC:
+                self.write_diagnostics(os.path.join(download_dir, "parsing_debug.txt"),
+                                       functools.partial(parsing_debug_report, total_containers, page_text,
+                                                         list(sample_rows)))
+            if self.diagnostics >= diagnostics.FULL:
+                print(f"\n📂 Files in download directory ({download_dir}):")
+                try:
+                    with os.scandir(download_dir) as entries:
+                        for entry in entries:
+                            fsize = entry.stat().st_size if entry.is_file() else 0
+                            print(f"   - {entry.name} ({fsize} bytes)")
+                except Exception as list_e:
+                    print(f"   ⚠️ Could not list files: {list_e}")
+            
+            if not total_containers:
+                try:
+                    os.remove(excel_path)
+                except OSError:
+                    pass
+                return {"success": False, "error": "No container data extracted"}
+            
+            if export_format is None:
+                self._capture_screenshot("after_scraping")
+                return {"success": True, "total_containers": total_containers, "method": "scraped"}
             
             file_size = os.path.getsize(excel_path)
-            print(f"✅ Excel file created: {excel_filename} ({file_size} bytes)")
+            print(f"✅ {export_format.upper()} file created: {excel_filename} ({file_size} bytes)")
             self._capture_screenshot("after_scraping")
             
             return {
@@ -4317,7 +5320,7 @@ class EModalBusinessOperations:
                 "file_path": excel_path,
                 "file_name": excel_filename,
                 "file_size": file_size,
-                "total_containers": len(containers_data),
+                "total_containers": total_containers,
                 "method": "scraped"
             }
             
@@ -4532,7 +5535,7 @@ class EModalBusinessOperations:
             
             # Wait for page to be fully loaded
             self._wait_for_app_ready(15)
-            time.sleep(2)
+            self._wait_for_dom_quiet("search_page_ready", quiet_ms=300, timeout=2)
             
             # Try common search input/selectors with more comprehensive options
             search_selectors = [
@@ -4623,7 +5626,7 @@ class EModalBusinessOperations:
                 # Wait for results to load
                 print("⏳ Waiting for search results...")
                 self._wait_for_app_ready(15)
-                time.sleep(2)
+                self._settle("search_results", max_wait=2)
                 self._capture_screenshot("after_search")
                 
                 # Verify search worked by checking if container appears on page
@@ -4832,13 +5835,55 @@ class EModalBusinessOperations:
         except Exception as e:
             return {"success": False, "error": f"Progressive search failed: {str(e)}"}
 
+    def index_container_rows(self, container_ids: list) -> Dict[str, Any]:
+        """Map container IDs to their row position in the already-loaded grid (single DOM pass).
+
+        Call after load_all_containers_with_infinite_scroll(). IDs that are not in the
+        grid are simply missing from the returned positions.
+        """
+        try:
+            positions = self.driver.execute_script("""
+                var wanted = {};
+                arguments[0].forEach(function(id) { wanted[id] = true; });
+                var root = document.getElementById('searchres') || document;
+                var rows = root.querySelectorAll('tr, mat-row');
+                var out = {};
+                var idPattern = /\\b([A-Z]{4}\\d{6,7})[A-Z]?\\b/g;
+                for (var i = 0; i < rows.length; i++) {
+                    var text = rows[i].innerText || '';
+                    var m;
+                    idPattern.lastIndex = 0;
+                    while ((m = idPattern.exec(text)) !== null) {
+                        var id = m[1];
+                        if (wanted[m[0]]) { id = m[0]; }
+                        if (wanted[id] && !(id in out)) { out[id] = i; }
+                    }
+                }
+                return {positions: out, total_rows: rows.length};
+            """, list(container_ids))
+            found = positions.get("positions", {}) if positions else {}
+            print(f"📇 Indexed grid: {len(found)}/{len(container_ids)} requested containers present ({positions.get('total_rows', 0) if positions else 0} rows)")
+            return {"success": True, "positions": found, "total_rows": positions.get("total_rows", 0) if positions else 0}
+        except Exception as e:
+            return {"success": False, "error": f"Grid indexing failed: {str(e)}", "positions": {}}
+
+    def scroll_to_container_row(self, container_id: str) -> Dict[str, Any]:
+        """Bring an already-loaded container row into view (no searching or infinite scrolling)"""
+        try:
+            el = self.driver.find_element(By.XPATH, f"//*[contains(text(), '{container_id}')]")
+            self.driver.execute_script("arguments[0].scrollIntoView({block:'center'});", el)
+            time.sleep(0.3)
+            return {"success": True, "found": True, "method": "indexed_row"}
+        except Exception as e:
+            return {"success": False, "error": f"Container '{container_id}' not in loaded grid: {e}"}
+
     def collapse_container_row(self, container_id: str) -> Dict[str, Any]:
         """Collapse the expanded timeline row for the container by clicking the down arrow"""
         try:
             print(f"⤴️ Collapsing row for: {container_id}")
             
             # Wait for page to be ready
-            time.sleep(0.5)
+            self._wait_for_dom_quiet("collapse_page_ready", quiet_ms=200, timeout=0.5)
             
             # Find the container row
             row = None
@@ -4888,7 +5933,11 @@ class EModalBusinessOperations:
             try:
                 self.driver.execute_script("arguments[0].click();", collapse_element)
                 print("✅ JavaScript click executed on collapse element")
-                time.sleep(1)
+                self._wait_until(
+                    "collapse_row",
+                    lambda d: row.find_elements(By.XPATH, ".//mat-icon[contains(text(),'keyboard_arrow_right')]"),
+                    timeout=1
+                )
                 
                 # Verify collapse by checking for right arrow
                 try:
@@ -4918,7 +5967,7 @@ class EModalBusinessOperations:
             
             # Wait for page to be ready
             self._wait_for_app_ready(10)
-            time.sleep(1)
+            self._wait_for_dom_quiet("expand_page_ready", quiet_ms=250, timeout=1)
             
             # Try multiple strategies to find the container row
             row = None
@@ -5075,9 +6124,15 @@ class EModalBusinessOperations:
                 if not clicked:
                     return {"success": False, "error": "Could not click expand element"}
                 
-                # Wait for expansion to complete
+                # Wait for expansion to complete: arrow flips or timeline renders (up to 2s)
                 self._wait_for_app_ready(10)
-                time.sleep(2)  # Give more time for animation
+                self._wait_until(
+                    "expand_row",
+                    lambda d: row.find_elements(By.XPATH, ".//mat-icon[contains(text(),'keyboard_arrow_down')]")
+                    or row.find_elements(By.XPATH, "./following-sibling::*[1]//div[contains(@class,'timeline') or contains(@class,'containerflow')]"),
+                    timeout=2
+                )
+                self._wait_for_dom_quiet("expand_animation", quiet_ms=200, timeout=1)
                 self._capture_screenshot("after_expand_click")
                 
                 # Verify expansion worked by checking if arrow changed
@@ -5197,31 +6252,10 @@ class EModalBusinessOperations:
             try:
                 print("  🔍 Method 1: Checking timeline divider classes...")
                 
-                # Find the parent row containing Pregate
-                pregate_row = pregate_element.find_element(By.XPATH, "./ancestor::div[contains(@fxlayout,'row')][1]")
-                
-                # Look for the timeline divider in this row or adjacent rows
-                # The divider can be before or after the milestone
-                divider = None
-                
-                # Try to find divider in the same row
-                try:
-                    divider = pregate_row.find_element(By.XPATH, ".//div[contains(@class,'timeline-divider')]")
-                except:
-                    # Try previous row
-                    try:
-                        prev_row = pregate_row.find_element(By.XPATH, "./preceding-sibling::div[contains(@fxlayout,'row')][1]")
-                        divider = prev_row.find_element(By.XPATH, ".//div[contains(@class,'timeline-divider')]")
-                    except:
-                        # Try next row
-                        try:
-                            next_row = pregate_row.find_element(By.XPATH, "./following-sibling::div[contains(@fxlayout,'row')][1]")
-                            divider = next_row.find_element(By.XPATH, ".//div[contains(@class,'timeline-divider')]")
-                        except:
-                            pass
+                # Divider in the Pregate row, or the previous / next row (one script call)
+                divider_classes = self.driver.execute_script(PREGATE_DIVIDER_JS, pregate_element)
                 
-                if divider:
-                    divider_classes = divider.get_attribute("class")
+                if divider_classes is not None:
                     print(f"  📋 Divider classes: {divider_classes}")
                     
                     # Check if line is colored (passed) or gray (not passed)
@@ -5268,66 +6302,47 @@ class EModalBusinessOperations:
         try:
             print("📋 Extracting full timeline...")
             
-            # Find the timeline container
-            timeline_container = None
-            try:
-                timeline_container = self.driver.find_element(By.XPATH, "//app-containerflow")
-                print("  ✅ Found timeline container")
-            except Exception:
-                try:
-                    timeline_container = self.driver.find_element(By.XPATH, "//div[contains(@class,'timeline-container')]")
-                except Exception:
-                    return {"success": False, "error": "Timeline container not found"}
-            
-            # Find all milestone rows
+            # Read every milestone row (labels + divider classes) in one script call
             try:
-                milestone_rows = timeline_container.find_elements(By.XPATH, ".//div[@fxlayout='row']")
-                print(f"  📊 Found {len(milestone_rows)} timeline rows")
+                milestone_rows = self.driver.execute_script(TIMELINE_ROWS_JS)
             except Exception as e:
-                return {"success": False, "error": f"Could not find timeline rows: {str(e)}"}
+                return {"success": False, "error": f"Could not read timeline rows: {str(e)}"}
+            
+            if milestone_rows is None:
+                return {"success": False, "error": "Timeline container not found"}
+            print(f"  📊 Found {len(milestone_rows)} timeline rows")
             
             timeline_data = []
             
             for idx, row in enumerate(milestone_rows):
-                try:
-                    # Find milestone label (name)
-                    milestone_labels = row.find_elements(By.XPATH, ".//span[contains(@class,'location-details-label')]")
-                    
-                    if len(milestone_labels) >= 2:
-                        # First span is the milestone name, second is the date
-                        milestone_name = milestone_labels[0].text.strip()
-                        milestone_date = milestone_labels[1].text.strip()
-                        
-                        # Skip if it's just an arrow icon
-                        if not milestone_name or milestone_name in ['arrow_drop_up', 'arrow_drop_down']:
-                            continue
-                        
-                        # Find divider to determine status
-                        status = "pending"
-                        try:
-                            divider = row.find_element(By.XPATH, ".//div[contains(@class,'timeline-divider')]")
-                            divider_classes = divider.get_attribute("class")
-                            
-                            # Check if line is colored (completed) or gray (pending)
-                            if 'dividerflowcolor' in divider_classes and 'horizontalconflow' not in divider_classes:
-                                status = "completed"
-                            elif 'horizontalconflow' in divider_classes or 'dividerflowcolor2' in divider_classes:
-                                status = "pending"
-                        except Exception:
-                            # If no divider found, assume pending
-                            pass
-                        
-                        timeline_data.append({
-                            "milestone": milestone_name,
-                            "date": milestone_date,
-                            "status": status
-                        })
-                        
-                        print(f"    {idx+1}. {milestone_name} | {milestone_date} | {status}")
+                if row.get("label_count", 0) < 2:
+                    continue
+                
+                # First span is the milestone name, second is the date
+                milestone_name = row.get("name", "")
+                milestone_date = row.get("date", "")
                 
-                except Exception as row_e:
-                    # Skip rows that don't have the expected structure
+                # Skip if it's just an arrow icon
+                if not milestone_name or milestone_name in ['arrow_drop_up', 'arrow_drop_down']:
                     continue
+                
+                # Divider color determines status (no divider: pending)
+                status = "pending"
+                divider_classes = row.get("divider_class")
+                if divider_classes is not None:
+                    # Check if line is colored (completed) or gray (pending)
+                    if 'dividerflowcolor' in divider_classes and 'horizontalconflow' not in divider_classes:
+                        status = "completed"
+                    elif 'horizontalconflow' in divider_classes or 'dividerflowcolor2' in divider_classes:
+                        status = "pending"
+                
+                timeline_data.append({
+                    "milestone": milestone_name,
+                    "date": milestone_date,
+                    "status": status
+                })
+                
+                print(f"    {idx+1}. {milestone_name} | {milestone_date} | {status}")
             
             if not timeline_data:
                 return {"success": False, "error": "No timeline milestones found"}
@@ -5381,15 +6396,14 @@ class EModalBusinessOperations:
             location = pregate_container.location
             size = pregate_container.size
             
-            # Take screenshot
+            # Take screenshot (in memory; only the crop is written)
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
-            full_screenshot_path = os.path.join(self.screens_dir, f"{timestamp}_full_page.png")
-            self.driver.save_screenshot(full_screenshot_path)
+            png_bytes = self.driver.get_screenshot_as_png()
             
             from PIL import Image
             import numpy as np
             
-            img = Image.open(full_screenshot_path)
+            img = Image.open(io.BytesIO(png_bytes))
             
             # Crop tightly around Pregate text and line below it
             # Small area: just the text + line underneath
@@ -5436,12 +6450,6 @@ class EModalBusinessOperations:
                 print(f"    ⏳ Line is LIGHT (brightness {brightness:.1f} >= {threshold}) - Container has NOT passed Pregate")
                 passed = False
             
-            # Clean up full screenshot
-            try:
-                os.remove(full_screenshot_path)
-            except:
-                pass
-            
             return {
                 "success": True,
                 "passed_pregate": passed,
@@ -5553,15 +6561,14 @@ class EModalBusinessOperations:
             vertical_padding = 150  # pixels above/below
             horizontal_padding = 300  # more padding left/right to show timeline flow
             
-            # Get full page screenshot
+            # Get full page screenshot (in memory; only the crop is written)
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
-            full_screenshot_path = os.path.join(self.screens_dir, f"{timestamp}_full_timeline.png")
-            self.driver.save_screenshot(full_screenshot_path)
-            print(f"  📸 Full screenshot saved")
+            png_bytes = self.driver.get_screenshot_as_png()
+            print(f"  📸 Full screenshot captured")
             
             # Crop the image around Pregate element
             from PIL import Image
-            img = Image.open(full_screenshot_path)
+            img = Image.open(io.BytesIO(png_bytes))
             
             # Calculate crop box with padding (wider for horizontal timeline)
             left = max(0, location['x'] - horizontal_padding)
@@ -5583,12 +6590,6 @@ class EModalBusinessOperations:
             print(f"  ✅ Cropped timeline screenshot saved: {os.path.basename(cropped_path)}")
             print(f"  📊 Final image size: {crop_width}x{crop_height}px")
             
-            # Remove full screenshot to save space
-            try:
-                os.remove(full_screenshot_path)
-            except:
-                pass
-            
             return {
                 "success": True,
                 "screenshot_path": cropped_path,
@@ -5995,171 +6996,57 @@ class EModalBusinessOperations:
         try:
             print("🧭 Analyzing timeline...")
             
-            # Find timeline container
-            timeline_container = None
-            try:
-                timeline_container = self.driver.find_element(By.XPATH, "//div[contains(@class,'timeline-container')]")
-                print("  ✅ Found timeline container")
-            except Exception:
-                try:
-                    timeline_container = self.driver.find_element(By.XPATH, "//app-containerflow")
-                    print("  ✅ Found app-containerflow")
-                except Exception:
-                    return {"success": False, "error": "Timeline container not found"}
-
-            # Get all divider elements in order (top to bottom)
+            # Known later milestones used by the date fallback
+            later_milestones = [
+                "Ready for pick up",
+                "Departed Terminal", 
+                "Arrived at customer",
+                "Discharged"
+            ]
+            
+            # Read dividers, the Pregate row and milestone dates in one script call
             try:
-                dividers = timeline_container.find_elements(By.XPATH, ".//div[contains(@class,'timeline-divider')]")
-                print(f"  📊 Found {len(dividers)} timeline dividers")
+                snapshot = self.driver.execute_script(TIMELINE_ANALYSIS_JS, later_milestones)
             except Exception as e:
-                return {"success": False, "error": f"Could not find timeline dividers: {str(e)}"}
-
-            # Find Pregate milestone row and its divider
-            pregate_divider = None
-            pregate_index = -1
+                return {"success": False, "error": f"Could not read timeline: {str(e)}"}
+            
+            if snapshot is None:
+                return {"success": False, "error": "Timeline container not found"}
+            
+            divider_classes = snapshot.get("dividers") or []
+            print(f"  📊 Found {len(divider_classes)} timeline dividers")
+            
+            if not snapshot.get("found"):
+                labels = snapshot.get("labels") or []
+                print(f"  🔍 Found {len(labels)} milestone labels, none usable as Pregate: {labels}")
+                print("  ⚠️ Could not locate Pregate milestone: Pregate milestone not found in any form")
+                return {"success": False, "error": "Pregate milestone not found: Pregate milestone not found in any form"}
+            print(f"  ✅ Found Pregate using: {snapshot.get('method')}")
+            
+            if not snapshot.get("divider_found"):
+                print("  ⚠️ Could not locate Pregate milestone: no timeline divider")
+                return {"success": False, "error": "Pregate milestone not found: Could not locate timeline divider for Pregate milestone"}
+            print(f"  ✅ Pregate divider located via {snapshot.get('divider_method')}")
+            
+            pregate_index = snapshot.get("pregate_index", -1)
+            
+            # Check if Pregate has a real date (not N/A)
             pregate_date_na = True
+            pregate_date_text = snapshot.get("pregate_date")
+            if pregate_date_text is not None:
+                pregate_date_na = pregate_date_text == "N/A" or pregate_date_text == ""
+                print(f"  📅 Pregate date: '{pregate_date_text}' (N/A: {pregate_date_na})")
+            else:
+                print("  ⚠️ Could not read Pregate date")
             
-            try:
-                # Find the Pregate row with multiple possible text variations
-                pregate_selectors = [
-                    "//span[normalize-space(.)='Pregate']",
-                    "//span[contains(text(),'Pregate')]",
-                    "//span[normalize-space(.)='pregate']",
-                    "//span[contains(text(),'pregate')]",
-                    "//*[normalize-space(.)='Pregate']",
-                    "//*[contains(text(),'Pregate')]"
-                ]
-                
-                pregate_row = None
-                for selector in pregate_selectors:
-                    try:
-                        pregate_element = self.driver.find_element(By.XPATH, selector)
-                        pregate_row = pregate_element.find_element(By.XPATH, "ancestor::div[contains(@class,'fxlayout')][1]")
-                        print(f"  ✅ Found Pregate using selector: {selector}")
-                        break
-                    except Exception:
-                        continue
-                
-                if not pregate_row:
-                    # Fallback: look for any milestone that might be Pregate
-                    all_milestones = self.driver.find_elements(By.XPATH, "//span[contains(@class,'location-details-label')]")
-                    print(f"  🔍 Found {len(all_milestones)} milestone labels, checking for Pregate...")
-                    for milestone in all_milestones:
-                        try:
-                            text = milestone.text.strip()
-                            print(f"    - '{text}'")
-                            if 'pregate' in text.lower():
-                                try:
-                                    # Try multiple ancestor patterns
-                                    ancestor_patterns = [
-                                        "ancestor::div[contains(@class,'fxlayout')][1]",
-                                        "ancestor::div[contains(@class,'fxlayout')]",
-                                        "ancestor::div[contains(@class,'row')][1]",
-                                        "ancestor::div[contains(@class,'row')]",
-                                        "ancestor::div[1]",
-                                        ".."
-                                    ]
-                                    
-                                    for pattern in ancestor_patterns:
-                                        try:
-                                            pregate_row = milestone.find_element(By.XPATH, pattern)
-                                            print(f"  ✅ Found Pregate in text: '{text}' using pattern: {pattern}")
-                                            break
-                                        except Exception:
-                                            continue
-                                    else:
-                                        print(f"  ⚠️ Found Pregate text but couldn't find parent row")
-                                        continue
-                                    break
-                                except Exception as e:
-                                    print(f"  ⚠️ Error processing Pregate milestone: {e}")
-                                    continue
-                        except Exception:
-                            continue
-                
-                if not pregate_row:
-                    raise Exception("Pregate milestone not found in any form")
-                
-                # Find the divider within this row - based on the HTML structure you provided
-                pregate_divider = None
-                try:
-                    # Look for the divider in the same row structure as shown in your HTML
-                    pregate_divider = pregate_row.find_element(By.XPATH, ".//div[contains(@class,'timeline-divider')]")
-                except Exception:
-                    # If not found, look for it in the parent structure
-                    try:
-                        # The divider might be in a sibling div
-                        parent = pregate_row.find_element(By.XPATH, "./..")
-                        pregate_divider = parent.find_element(By.XPATH, ".//div[contains(@class,'timeline-divider')]")
-                    except Exception:
-                        # Last resort: look for any divider near this milestone
-                        try:
-                            # Find all dividers and match by position
-                            all_dividers = timeline_container.find_elements(By.XPATH, ".//div[contains(@class,'timeline-divider')]")
-                            print(f"  🔍 Found {len(all_dividers)} total dividers, trying to match by position...")
-                            
-                            # Get the position of the Pregate milestone
-                            pregate_rect = self.driver.execute_script("return arguments[0].getBoundingClientRect();", pregate_row)
-                            pregate_y = pregate_rect['top']
-                            
-                            # Find the closest divider
-                            closest_divider = None
-                            min_distance = float('inf')
-                            
-                            for i, divider in enumerate(all_dividers):
-                                try:
-                                    div_rect = self.driver.execute_script("return arguments[0].getBoundingClientRect();", divider)
-                                    div_y = div_rect['top']
-                                    distance = abs(div_y - pregate_y)
-                                    
-                                    if distance < min_distance:
-                                        min_distance = distance
-                                        closest_divider = divider
-                                        print(f"    Divider {i}: distance={distance:.1f}px")
-                                except Exception:
-                                    continue
-                            
-                            if closest_divider:
-                                pregate_divider = closest_divider
-                                print(f"  ✅ Found closest divider with distance {min_distance:.1f}px")
-                            else:
-                                raise Exception("No divider found near Pregate milestone")
-                                
-                        except Exception as e:
-                            print(f"  ⚠️ Could not find divider near Pregate: {e}")
-                            raise Exception(f"Could not locate timeline divider for Pregate milestone: {str(e)}")
-                
-                if not pregate_divider:
-                    raise Exception("Could not locate timeline divider for Pregate milestone")
-                
-                # Get its index in the ordered list
-                for i, div in enumerate(dividers):
-                    if div == pregate_divider:
-                        pregate_index = i
-                        break
-                
-                # Check if Pregate has a real date (not N/A)
-                try:
-                    pregate_date_span = pregate_row.find_element(By.XPATH, ".//span[contains(@class,'location-details-label') and contains(@class,'p-top-5')]")
-                    pregate_date_text = pregate_date_span.text.strip()
-                    pregate_date_na = pregate_date_text == "N/A" or pregate_date_text == ""
-                    print(f"  📅 Pregate date: '{pregate_date_text}' (N/A: {pregate_date_na})")
-                except Exception:
-                    print("  ⚠️ Could not read Pregate date")
-                
-                print(f"  📍 Pregate divider found at index: {pregate_index}")
-                
-            except Exception as e:
-                print(f"  ⚠️ Could not locate Pregate milestone: {e}")
-                return {"success": False, "error": f"Pregate milestone not found: {str(e)}"}
+            print(f"  📍 Pregate divider found at index: {pregate_index}")
 
             # Analyze divider states (colored = reached/active)
             colored_indices = []
             divider_states = []
             
-            for i, divider in enumerate(dividers):
+            for i, classes in enumerate(divider_classes):
                 try:
-                    classes = divider.get_attribute("class") or ""
                     is_colored = "dividerflowcolor" in classes and "horizontalconflow" not in classes
                     is_neutral = "horizontalconflow" in classes
                     
@@ -6199,24 +7086,13 @@ class EModalBusinessOperations:
             later_milestones_with_dates = []
             if status == "before_pregate":
                 try:
-                    # Check known later milestones for real dates
-                    later_milestones = [
-                        "Ready for pick up",
-                        "Departed Terminal", 
-                        "Arrived at customer",
-                        "Discharged"
-                    ]
-                    
+                    # Check known later milestones for real dates (read in the same script call)
+                    later_dates = snapshot.get("later_dates") or {}
                     for milestone in later_milestones:
-                        try:
-                            milestone_row = self.driver.find_element(By.XPATH, f"//span[normalize-space(.)='{milestone}']/ancestor::div[contains(@class,'fxlayout')][1]")
-                            date_span = milestone_row.find_element(By.XPATH, ".//span[contains(@class,'location-details-label') and contains(@class,'p-top-5')]")
-                            date_text = date_span.text.strip()
-                            if date_text != "N/A" and date_text != "":
-                                later_milestones_with_dates.append(milestone)
-                                print(f"  📅 {milestone} has date: {date_text}")
-                        except Exception:
-                            pass
+                        date_text = later_dates.get(milestone)
+                        if date_text and date_text != "N/A":
+                            later_milestones_with_dates.append(milestone)
+                            print(f"  📅 {milestone} has date: {date_text}")
                     
                     if later_milestones_with_dates:
                         status = "after_pregate"
@@ -6243,7 +7119,7 @@ class EModalBusinessOperations:
                     "max_colored_index": max_colored_index,
                     "pregate_date_na": pregate_date_na,
                     "later_milestones_with_dates": later_milestones_with_dates,
-                    "total_dividers": len(dividers),
+                    "total_dividers": len(divider_classes),
                     "colored_dividers": len(colored_indices),
                     "divider_states": divider_states
                 }
@@ -6622,102 +7498,152 @@ def cleanup_expired_sessions():
     """Clean up expired browser sessions"""
     expired_sessions = []
     
-    for session_id, session in active_sessions.items():
-        if session.is_expired():
+    for session_id, session in session_registry.items():
+        if session.is_expired() and not session_registry.is_locked(session_id):
             expired_sessions.append(session_id)
     
     for session_id in expired_sessions:
-        session = active_sessions[session_id]
-        try:
-            session.driver.quit()
+        if session_registry.remove(session_id, quit_driver=True):
             print(f"🔒 Cleaned up expired session: {session_id}")
-        except:
-            pass
-        del active_sessions[session_id]
+
+
+def create_debug_bundle(operations, session_id: str, request_id: str = None, suffix: str = "DEBUG",
+                        session_root: str = None, downloads_dir: str = None,
+                        extra_files: list = None, texts: Dict[str, str] = None) -> Optional[str]:
+    """
+    Finish an operation's debug ZIP and place it in DOWNLOADS_DIR (served by /files).
+    
+    Screenshots appended during the operation (start_debug_bundle) are already in the
+    ZIP; the session screenshots folder is then scanned for anything else (images written
+    directly, such as Pregate crops). PNG/XLSX entries are stored, text is deflated.
+    
+    Args:
+        operations: EModalBusinessOperations that ran the request
+        session_id: Session ID (file name prefix and default top-level folder)
+        request_id: Request ID (for logging)
+        suffix: File name suffix, e.g. DEBUG, FAILED, PREGATE
+        session_root: Top-level folder inside the ZIP (default: session_id, "" = none)
+        downloads_dir: Also include this folder under downloads/
+        extra_files: (file path, archive name) pairs to include
+        texts: Archive name -> text content (e.g. error.txt)
+    
+    Returns:
+        Bundle file name, or None if it could not be built
+    """
+    root = session_id if session_root is None else session_root
+    ts = datetime.now().strftime('%Y%m%d_%H%M%S')
+    bundle_name = f"{session_id}_{ts}_{suffix}.zip"
+    operations.wait_for_screenshots()
+    operations.wait_for_diagnostics()
+    
+    # The bundle is at most about the size of the session's screenshots + downloads
+    artifact_store.ensure_space(file_registry.total_bytes(session_id=operations.session.session_id), DOWNLOADS_DIR)
+    
+    for attempt in range(2):
+        bundle = None
+        try:
+            bundle = operations.take_debug_bundle(root)
+            if bundle is None:
+                bundle = DebugBundle(os.path.join(DOWNLOADS_DIR, f"{bundle_name}.part"), root=root)
+            # Images written straight to the folder (e.g. Pregate crops) were not appended live;
+            # names already in the bundle are skipped
+            bundle.add_directory(operations.screens_dir, 'screenshots')
+            if downloads_dir:
+                bundle.add_directory(downloads_dir, 'downloads')
+            for file_path, arcname in extra_files or []:
+                bundle.add_file(file_path, arcname)
+            for arcname, text in (texts or {}).items():
+                bundle.add_bytes(arcname, text)
+            artifact_store.register(bundle.finalize(os.path.join(DOWNLOADS_DIR, bundle_name)),
+                                    session_id=session_id, category="bundle")
+            return bundle_name
+        except OSError as e:
+            if bundle is not None:
+                bundle.discard()
+            if e.errno != errno.ENOSPC or attempt:
+                logger.warning(f"[{request_id}] Debug bundle creation failed: {e}")
+                return None
+            # Disk filled up mid-bundle: free space and rebuild once from the files on disk
+            logger.warning(f"[{request_id}] Disk full while bundling - evicting old artifacts and retrying")
+            artifact_store.ensure_space(2 * file_registry.total_bytes(session_id=operations.session.session_id),
+                                        DOWNLOADS_DIR)
+        except Exception as e:
+            logger.warning(f"[{request_id}] Debug bundle creation failed: {e}")
+            if bundle is not None:
+                bundle.discard()
+            return None
+    return None
 
 
 def cleanup_old_files():
     """
-    Clean up files older than 24 hours from downloads and screenshots directories.
-    This runs periodically to save storage space.
+    Delete expired files (per-category retention, 24h by default) and enforce the storage quota.
+    Driven by the file registry's expiry index in small batches - no directory walks.
     """
     try:
-        now = time.time()
-        cutoff_time = now - (24 * 60 * 60)  # 24 hours ago
-        
-        total_deleted = 0
-        total_size_freed = 0
-        
-        # Clean downloads directory
-        if os.path.exists(DOWNLOADS_DIR):
-            for root, dirs, files in os.walk(DOWNLOADS_DIR, topdown=False):
-                for name in files:
-                    filepath = os.path.join(root, name)
-                    try:
-                        file_mtime = os.path.getmtime(filepath)
-                        if file_mtime < cutoff_time:
-                            file_size = os.path.getsize(filepath)
-                            os.remove(filepath)
-                            total_deleted += 1
-                            total_size_freed += file_size
-                    except Exception as e:
-                        logger.warning(f"Failed to delete {filepath}: {e}")
-                
-                # Remove empty directories
-                for name in dirs:
-                    dirpath = os.path.join(root, name)
-                    try:
-                        if not os.listdir(dirpath):  # if empty
-                            os.rmdir(dirpath)
-                    except Exception:
-                        pass
-        
-        # Clean screenshots directory
-        if os.path.exists(SCREENSHOTS_DIR):
-            for root, dirs, files in os.walk(SCREENSHOTS_DIR, topdown=False):
-                for name in files:
-                    filepath = os.path.join(root, name)
-                    try:
-                        file_mtime = os.path.getmtime(filepath)
-                        if file_mtime < cutoff_time:
-                            file_size = os.path.getsize(filepath)
-                            os.remove(filepath)
-                            total_deleted += 1
-                            total_size_freed += file_size
-                    except Exception as e:
-                        logger.warning(f"Failed to delete {filepath}: {e}")
-                
-                # Remove empty directories
-                for name in dirs:
-                    dirpath = os.path.join(root, name)
-                    try:
-                        if not os.listdir(dirpath):  # if empty
-                            os.rmdir(dirpath)
-                    except Exception:
-                        pass
-        
-        if total_deleted > 0:
-            size_mb = total_size_freed / (1024 * 1024)
-            logger.info(f"🗑️ Cleanup: Deleted {total_deleted} files older than 24h, freed {size_mb:.2f} MB")
+        index_existing_files()
+        result = retention_manager.run_once()
+        
+        removed = result["deleted"] + result["evicted"]
+        if removed > 0:
+            size_mb = result["bytes_freed"] / (1024 * 1024)
+            quota_note = f" (+{result['evicted']} evicted over quota)" if result["evicted"] else ""
+            logger.info(f"🗑️ Cleanup: Deleted {result['deleted']} expired files{quota_note}, freed {size_mb:.2f} MB")
         else:
             logger.debug("🗑️ Cleanup: No old files to delete")
+        return result
             
     except Exception as e:
         logger.error(f"⚠️ Cleanup error: {e}")
+        return None
+
+
+def reconcile_files():
+    """Daily full walk: index files written outside the registry, drop abandoned .tmp/.part files"""
+    try:
+        result = retention_manager.reconcile()
+        if result["registered"] or result["stale_removed"]:
+            logger.info(f"🗂️ Reconcile: indexed {result['registered']} untracked files, "
+                        f"removed {result['stale_removed']} stale partial files")
+    except Exception as e:
+        logger.error(f"⚠️ File reconcile error: {e}")
 
 
 def periodic_cleanup_task():
-    """Background task that runs cleanup every hour"""
+    """Background task: expired files every 5 minutes, sessions/jobs hourly, file reconcile daily"""
+    last_hourly = last_reconcile = time.time()
     while True:
         try:
-            time.sleep(3600)  # Sleep for 1 hour
+            time.sleep(FILE_CLEANUP_INTERVAL)
             cleanup_old_files()
-            cleanup_expired_sessions()
+            now = time.time()
+            if now - last_hourly >= 3600:
+                last_hourly = now
+                cleanup_expired_sessions()
+                job_manager.cleanup_expired()
+            if now - last_reconcile >= FILE_RECONCILE_INTERVAL:
+                last_reconcile = now
+                reconcile_files()
         except Exception as e:
             logger.error(f"⚠️ Periodic cleanup task error: {e}")
             time.sleep(60)  # Wait 1 minute before retrying
 
 
+# Every operations method is a span (step name = method name without leading underscore)
+metrics.instrument_class(
+    EModalBusinessOperations,
+    exclude={"_record_wait", "wait_timing_summary", "set_screenshot_labels",
+             "_screenshot_label_lines", "_finish_annotation", "_write_screenshot"},
+    aliases={
+        "_extract_booking_number_from_image": "ocr_booking_number",
+        "_find_booking_number_near_text": "ocr_near_label",
+        "_find_blue_text_booking_number": "ocr_blue_text",
+        "_ocr_booking_number": "ocr_full_text",
+    }
+)
+metrics.set_endpoint_resolver(lambda: request.endpoint if has_request_context() else None)
+
+
 # API Routes
 
 @app.route('/health', methods=['GET'])
@@ -6729,21 +7655,202 @@ def health_check():
         "status": "healthy",
         "service": "E-Modal Business Operations API",
         "version": "1.0.0",
-        "active_sessions": len(active_sessions),
+        "active_sessions": session_registry.count(),
         "max_sessions": MAX_CONCURRENT_SESSIONS,
-        "session_capacity": f"{len(active_sessions)}/{MAX_CONCURRENT_SESSIONS}",
+        "session_capacity": f"{session_registry.count()}/{MAX_CONCURRENT_SESSIONS}",
         "persistent_sessions": len(persistent_sessions),
+        "warm_browsers": f"{len(warm_driver_pool)}/{WARM_POOL_SIZE}",
+        "session_evictions": dict(session_eviction_counts),
+        "jobs": job_manager.counts(),
+        "storage": artifact_store.usage(),
         "timestamp": datetime.now().isoformat()
     })
 
 
 def release_session_after_operation(session_id: str):
     """Mark session as not in use after operation completes"""
-    if session_id and session_id in active_sessions:
-        active_sessions[session_id].mark_not_in_use()
+    session = session_registry.get(session_id) if session_id else None
+    if session:
+        session.mark_not_in_use()
         logger.info(f"🔓 Session {session_id} marked as not in use")
 
 
+@app.before_request
+def start_request_timer():
+    """Remember when the request started (observed as the "request" step)"""
+    from flask import g
+    g.request_started = time.perf_counter()
+
+
+@app.teardown_request
+def observe_request_duration(exc=None):
+    """Record total request latency per endpoint"""
+    from flask import g
+    started = g.pop('request_started', None)
+    if started is not None and request.endpoint:
+        metrics.observe("request", time.perf_counter() - started)
+
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Step latency histograms and session pool gauges in Prometheus text format"""
+    sessions = session_registry.items()
+    gauges = {
+        "sessions_active": ("Registered browser sessions", len(sessions)),
+        "sessions_in_use": ("Browser sessions currently running an operation", sum(1 for _, s in sessions if s.in_use)),
+        "sessions_max": ("Maximum concurrent browser sessions", MAX_CONCURRENT_SESSIONS),
+        "sessions_persistent": ("Sessions reusable by credentials", len(persistent_sessions)),
+        "appointment_sessions": ("Open appointment workflow sessions", len(session_registry.appointment_items())),
+        "warm_browsers": ("Pre-warmed browsers ready for login", len(warm_driver_pool)),
+        "session_evictions": ("Sessions evicted since start, by reason", dict(session_eviction_counts), "reason"),
+        "jobs": ("Background jobs by status", job_manager.counts(), "status"),
+        "media_tasks_pending": ("Image tasks queued or running in the media worker pool", media_pool.pending()),
+        "storage_bytes": ("Bytes of registered artifacts (downloads + screenshots)", file_registry.total_bytes()),
+    }
+    return app.response_class(
+        metrics.render_prometheus(gauges),
+        mimetype="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.teardown_request
+def release_request_sessions(exc=None):
+    """Release every browser session held by the finished request so queued requests can proceed"""
+    from flask import g
+    
+    for session_id in g.pop('held_sessions', set()):
+        session = session_registry.get(session_id)
+        if session:
+            session.mark_not_in_use()
+        session_registry.release(session_id)
+
+
+def supports_async_job(view):
+    """
+    Let a long-running POST endpoint run as a background job.
+    
+    When the JSON body contains "async": true the request is replayed on the
+    job pool and the client gets a job_id immediately (HTTP 202); poll
+    GET /jobs/<job_id> for progress and the final result. File responses are
+    returned as URLs in job mode (return_url is forced on).
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        data = request.get_json(silent=True) if request.is_json else None
+        if not isinstance(data, dict) or not data.get('async'):
+            return view(*args, **kwargs)
+        
+        job_data = dict(data)
+        job_data.pop('async', None)
+        job_data['return_url'] = True
+        if job_data.get('format') == 'ndjson':
+            job_data['format'] = 'json'  # Job results are polled, not streamed
+        path = request.path
+        base_url = request.host_url
+        
+        def run_job():
+            report_progress(phase="started")
+            with app.test_request_context(path, method='POST', json=job_data, base_url=base_url):
+                response = app.make_response(view(*args, **kwargs))
+                result = response.get_json(silent=True)
+                if result is None:
+                    result = {"success": response.status_code < 400}
+                return result, response.status_code
+        
+        job = job_manager.submit(path.strip('/'), run_job)
+        logger.info(f"📋 Queued job {job.job_id} for {path}")
+        return jsonify({
+            "success": True,
+            "job_id": job.job_id,
+            "status": job.status,
+            "status_url": f"http://{request.host}/jobs/{job.job_id}"
+        }), 202
+    
+    return wrapper
+
+
+def supports_ndjson_stream(view):
+    """
+    Let an endpoint stream its rows as NDJSON ("format": "ndjson" in the JSON body).
+    
+    The request is replayed on the job pool with format "json" while the response
+    streams: progress lines, one line per container the first time the view puts it into a
+    StreamingRowSink, then a final "result" line with the view's JSON response
+    (without the rows already sent). Streams never wait in the job queue: when
+    every job worker is busy the request is rejected with 503.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        data = request.get_json(silent=True) if request.is_json else None
+        if not isinstance(data, dict) or data.get('format') != 'ndjson':
+            return view(*args, **kwargs)
+        
+        stream_data = dict(data)
+        stream_data['format'] = 'json'
+        path = request.path
+        base_url = request.host_url
+        stream = RowStream()
+        
+        def run_stream():
+            set_current_stream(stream)
+            set_progress_listener(stream.put_progress)
+            try:
+                with app.test_request_context(path, method='POST', json=stream_data, base_url=base_url):
+                    response = app.make_response(view(*args, **kwargs))
+                    result = response.get_json(silent=True)
+                    if result is None:
+                        result = {"success": response.status_code < 400}
+                stream.finish(result, response.status_code)
+                return result, response.status_code
+            except Exception as e:
+                logger.error(f"NDJSON stream for {path} failed: {e}")
+                stream.finish({"success": False, "error": str(e)}, 500)
+                return {"success": False, "error": str(e)}, 500
+            finally:
+                set_current_stream(None)
+                set_progress_listener(None)
+        
+        job = job_manager.try_submit(path.strip('/'), run_stream)
+        if job is None:
+            logger.warning(f"⚠️ Rejected NDJSON stream for {path}: all {job_manager.max_workers} job workers busy")
+            response = jsonify({
+                "success": False,
+                "error": "Server busy: all background workers are in use, retry later",
+                "active_jobs": job_manager.active_count()
+            })
+            response.status_code = 503
+            response.headers['Retry-After'] = '30'
+            return response
+        logger.info(f"📡 Streaming {path} as NDJSON (job {job.job_id})")
+        return app.response_class(
+            stream.events(),
+            mimetype='application/x-ndjson',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+    
+    return wrapper
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get status, progress and (when finished) the result of a background job"""
+    job = job_manager.get(job_id)
+    if not job:
+        return jsonify({"success": False, "error": "Job not found or expired"}), 404
+    return jsonify({"success": True, **job.to_dict()})
+
+
+@app.route('/jobs', methods=['GET'])
+def list_jobs():
+    """List background jobs (without results)"""
+    jobs = []
+    for job in job_manager.list_jobs():
+        info = job.to_dict()
+        info.pop('result', None)
+        jobs.append(info)
+    return jsonify({"success": True, "jobs": jobs, "counts": job_manager.counts()})
+
+
 @app.route('/get_session', methods=['POST'])
 def get_or_create_session():
     """
@@ -6779,6 +7886,21 @@ def get_or_create_session():
         existing_session = find_session_by_credentials(username, password)
         
         if existing_session:
+            # Another request is driving this browser: don't probe or close it, it is alive and in use
+            if not try_acquire_session_for_request(existing_session.session_id):
+                logger.info(f"Session {existing_session.session_id} is busy with another request - treating as healthy")
+                existing_session.update_last_used()
+                return jsonify({
+                    "success": True,
+                    "session_id": existing_session.session_id,
+                    "is_new": False,
+                    "username": existing_session.username,
+                    "created_at": existing_session.created_at.isoformat(),
+                    "expires_at": None,  # Keep-alive sessions don't expire
+                    "in_use": True,
+                    "message": "Using existing persistent session (currently busy with another request)"
+                })
+            
             # QUICK HEALTH CHECK - Look for error states (401/403/404/500)
             is_healthy = check_session_health(existing_session)
             
@@ -6787,20 +7909,8 @@ def get_or_create_session():
                 logger.error(f"❌ Session unhealthy (error detected): {existing_session.session_id}")
                 logger.error(f"   Terminating unhealthy session, will create new one")
                 
-                # Terminate the browser session
-                try:
-                    existing_session.driver.quit()
-                except:
-                    pass
-                
-                # Remove from persistent sessions
-                cred_hash = get_credentials_hash(username, password)
-                if cred_hash in persistent_sessions:
-                    del persistent_sessions[cred_hash]
-                
-                # Remove from active sessions
-                if existing_session.session_id in active_sessions:
-                    del active_sessions[existing_session.session_id]
+                # Remove from active and persistent sessions and close the browser (lock held)
+                session_registry.remove(existing_session.session_id, quit_driver=True)
                 
                 # Fall through to create new session
                 logger.info(f"✅ Unhealthy session terminated, creating new one")
@@ -6830,17 +7940,9 @@ def get_or_create_session():
         session_id = f"session_{int(time.time())}_{hash(username)}"
         cred_hash = get_credentials_hash(username, password)
         
-        # Create unique temp profile directory for this session
-        temp_profile_dir = tempfile.mkdtemp(prefix=f"emodal_session_{session_id}_")
-        logger.info(f"Created temp profile: {temp_profile_dir}")
-        
-        # Authenticate with unique profile
-        handler = EModalLoginHandler(
-            captcha_api_key=captcha_api_key,
-            use_vpn_profile=False,  # Don't use default profile (causes conflicts)
-            auto_close=False,  # Keep browser open for persistent session
-            user_data_dir=temp_profile_dir
-        )
+        # Authenticate with unique profile (warm pooled browser when available)
+        handler, temp_profile_dir = create_login_handler(captcha_api_key, session_id)
+        logger.info(f"Using browser profile: {temp_profile_dir}")
         
         login_result = handler.login(username, password)
         if not login_result.success:
@@ -6917,8 +8019,7 @@ def get_or_create_session():
                                 last_refresh=datetime.now()
                             )
                             
-                            active_sessions[session_id] = browser_session
-                            persistent_sessions[cred_hash] = session_id
+                            session_registry.add(browser_session)
                             
                             logger.info(f"✅ Created persistent session: {session_id} for user: {username} (manual)")
                             
@@ -6998,11 +8099,10 @@ def get_or_create_session():
             last_refresh=datetime.now()
         )
         
-        active_sessions[session_id] = browser_session
-        persistent_sessions[cred_hash] = session_id
+        session_registry.add(browser_session)
         
         logger.info(f"✅ Created persistent session: {session_id} for user: {username}")
-        logger.info(f"📊 Active sessions: {len(active_sessions)}/{MAX_CONCURRENT_SESSIONS}")
+        logger.info(f"📊 Active sessions: {session_registry.count()}/{MAX_CONCURRENT_SESSIONS}")
         
         return jsonify({
             "success": True,
@@ -7025,6 +8125,8 @@ def get_or_create_session():
 
 
 @app.route('/get_containers', methods=['POST'])
+@supports_async_job
+@supports_ndjson_stream
 def get_containers():
     """
     Get containers data as Excel download
@@ -7041,12 +8143,27 @@ def get_containers():
         "target_count": 500  (optional) - Stop when this many containers loaded
         "target_container_id": "MSDU5772413"  (optional) - Stop when this container found
         "debug": true/false  (default: false) - If true, return ZIP with screenshots; if false, Excel only
+        "diagnostics": "off"/"basic"/"full"  (default: server EMODAL_DIAGNOSTICS, "full" with debug) - Debug text dumps
+        "extraction": "text"/"dom"  (default: "text") - How to read the grid ("dom" = one structured JS call)
+        "export_format": "xlsx"/"csv"/"jsonl"/"parquet"  (default: "xlsx") - File format of the export
+        "format": "json"/"ndjson"/"csv"/"xlsx"  (optional) - json: rows in the JSON response, no file;
+                  ndjson: stream progress/row/result lines as rows are parsed; csv/xlsx: export file.
+                  Rows are parsed after scrolling finishes, so an ndjson stream sends only
+                  progress/heartbeat lines while scrolling and the first row after it
+        "since_snapshot": "snap_XXX"  (optional) - Also return added/removed/changed rows since that snapshot
+        "known_ids": [...] / "known_ids_bloom": {"m", "k", "bits"}  (optional) - Containers the client already has
+        "watermark": true/false  (default: false) - Use the since_snapshot containers as known_ids
+        "known_run_length": 20  (default: 20) - Stop scrolling after this many consecutive known containers
     }
     
+    Every full (infinite scrolling) scrape is saved as a snapshot for the account and its
+    snapshot_id is returned; pass it back as since_snapshot on the next poll.
+    
     Note: Only one of infinite_scrolling, target_count, or target_container_id should be used at a time.
     Priority: target_container_id > target_count > infinite_scrolling
     
-    Returns Excel file with container data (and session_id in response)
+    Returns Excel file with container data (and session_id in response), or the rows
+    themselves for format json/ndjson
     """
     
     request_id = f"containers_{int(time.time())}"
@@ -7063,7 +8180,40 @@ def get_containers():
         infinite_scrolling = data.get('infinite_scrolling', True)  # Default: enabled
         debug_mode = data.get('debug', False)  # Default: no debug (Excel only)
         capture_screens = debug_mode  # Only capture if debug mode is enabled
+        diagnostics_level = request_diagnostics_level(data, debug_mode)
         return_url = data.get('return_url', False)
+        extraction = data.get('extraction', 'text')  # "text" (select-all parsing) or "dom" (structured rows)
+        response_format = data.get('format')  # json / ndjson: rows in the response, no file written
+        if response_format not in (None, 'json', 'ndjson', 'csv', 'xlsx'):
+            return jsonify({"success": False, "error": "format must be one of: json, ndjson, csv, xlsx"}), 400
+        rows_inline = response_format in ('json', 'ndjson')
+        try:
+            export_format = None if rows_inline else \
+                export_writers.normalize_format(response_format or data.get('export_format'))
+            if export_format:
+                export_writers.ensure_available(export_format)
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        if rows_inline:
+            return_url = True  # Rows are returned as JSON
+        since_snapshot = data.get('since_snapshot', None)  # Return only rows changed since this snapshot
+        # Watermark early-stop: IDs the client already has (list, Bloom digest, or the since_snapshot rows)
+        try:
+            known_ids = KnownIdFilter(data.get('known_ids'), data.get('known_ids_bloom'))
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        use_snapshot_watermark = bool(data.get('watermark', False))
+        try:
+            known_run_length = int(data.get('known_run_length', 20))
+        except (TypeError, ValueError):
+            known_run_length = 0
+        if known_run_length < 1:
+            return jsonify({
+                "success": False,
+                "error": f"'known_run_length' must be a positive whole number, got {data.get('known_run_length')!r}"
+            }), 400
+        if since_snapshot:
+            return_url = True  # Delta is returned as JSON
         
         # Determine the work mode
         work_mode = "all"  # default
@@ -7108,6 +8258,9 @@ def get_containers():
             operations = EModalBusinessOperations(session_wrapper)
             operations.screens_enabled = bool(capture_screens)
             operations.screens_label = screens_label
+            operations.diagnostics = diagnostics_level
+            if debug_mode and operations.screens_enabled:
+                operations.start_debug_bundle(session_id)
             print(f"📸 Screenshots enabled: {operations.screens_enabled}")
             print(f"📁 Screenshots directory: {operations.screens_dir}")
 
@@ -7154,7 +8307,18 @@ def get_containers():
                     print(f"✅ Loaded {scroll_result.get('total_containers', 0)} containers (target: {target_count})")
             elif infinite_scrolling:
                 print("📜 Loading all containers with infinite scroll...")
-                scroll_result = operations.load_all_containers_with_infinite_scroll()
+                if use_snapshot_watermark and since_snapshot:
+                    registered = session_registry.get(session_id)
+                    account_key = (registered.credentials_hash if registered and registered.credentials_hash else None) or f"user:{username}"
+                    base_snapshot = container_snapshots.get(account_key, since_snapshot)
+                    if base_snapshot:
+                        known_ids = KnownIdFilter(base_snapshot.rows.keys())
+                if known_ids:
+                    print(f"🏁 Watermark mode: stop after {known_run_length} consecutive known containers")
+                scroll_result = operations.load_all_containers_with_infinite_scroll(
+                    known_ids=known_ids or None,
+                    known_run_length=known_run_length
+                )
                 if not scroll_result["success"]:
                     print(f"⚠️ Infinite scroll failed: {scroll_result.get('error', 'Unknown error')}")
                     # Continue anyway - maybe all containers are already loaded
@@ -7174,30 +8338,18 @@ def get_containers():
             print("📊 Skipping checkbox selection - will scrape table directly")
             
             # Step 3: Scrape table and create Excel file
-            download_result = operations.scrape_containers_to_excel()
+            scraped_rows = StreamingRowSink()  # Also forwards rows to an NDJSON response as they are parsed
+            download_result = operations.scrape_containers_to_excel(extraction=extraction, row_sink=scraped_rows,
+                                                                 export_format=export_format)
             if not download_result["success"]:
                 # Create failure bundle with screenshots
                 bundle_path = None
                 bundle_name = None
                 try:
-                    ts = datetime.now().strftime('%Y%m%d_%H%M%S')
-                    bundle_name = f"{session_id}_{ts}_FAILED.zip"
-                    bundle_path = os.path.join(DOWNLOADS_DIR, bundle_name)
-                    session_root = session_id
-                    
-                    with zipfile.ZipFile(bundle_path, 'w', zipfile.ZIP_DEFLATED) as zf:
-                        # Include screenshots
-                        session_sc_dir = operations.screens_dir
-                        if os.path.isdir(session_sc_dir):
-                            for root, _, files in os.walk(session_sc_dir):
-                                for f in files:
-                                    fp = os.path.join(root, f)
-                                    rel = os.path.relpath(fp, session_sc_dir)
-                                    arc = os.path.join(session_root, 'screenshots', rel)
-                                    zf.write(fp, arc)
-                        # Add error log
-                        error_log = f"Error: {download_result['error']}\nTime: {datetime.now().isoformat()}\nRequest ID: {request_id}\nStep: Download Excel"
-                        zf.writestr(os.path.join(session_root, 'error.txt'), error_log)
+                    error_log = f"Error: {download_result['error']}\nTime: {datetime.now().isoformat()}\nRequest ID: {request_id}\nStep: Download Excel"
+                    bundle_name = create_debug_bundle(operations, session_id, request_id, suffix="FAILED",
+                                                      texts={"error.txt": error_log})
+                    bundle_path = os.path.join(DOWNLOADS_DIR, bundle_name) if bundle_name else None
                     
                     # Print download URL
                     if bundle_path and os.path.exists(bundle_path):
@@ -7221,23 +8373,28 @@ def get_containers():
                 }), 500
             
             # Success - ensure file is under project downloads; otherwise move it
-            src_path = download_result["file_path"]
-            final_name = os.path.basename(src_path)
-            # If not already under our DOWNLOADS_DIR, move into a session folder
-            if not os.path.abspath(src_path).startswith(os.path.abspath(DOWNLOADS_DIR)):
-                session_folder = os.path.join(DOWNLOADS_DIR, session_id)
-                try:
-                    os.makedirs(session_folder, exist_ok=True)
-                except Exception:
-                    pass
-                dest_path = os.path.join(session_folder, final_name)
-                try:
-                    shutil.move(src_path, dest_path)
-                except Exception:
-                    shutil.copyfile(src_path, dest_path)
+            dest_path = final_name = None
+            if download_result.get("file_path"):
+                src_path = download_result["file_path"]
+                final_name = os.path.basename(src_path)
+                # If not already under our DOWNLOADS_DIR, move into a session folder
+                if not os.path.abspath(src_path).startswith(os.path.abspath(DOWNLOADS_DIR)):
+                    session_folder = os.path.join(DOWNLOADS_DIR, session_id)
+                    try:
+                        os.makedirs(session_folder, exist_ok=True)
+                    except Exception:
+                        pass
+                    dest_path = os.path.join(session_folder, final_name)
+                    try:
+                        shutil.move(src_path, dest_path)
+                    except Exception:
+                        shutil.copyfile(src_path, dest_path)
+                else:
+                    dest_path = src_path
+                artifact_store.register(dest_path, session_id=session_id, category="export")
+                logger.info(f"[{request_id}] Success! File: {final_name}")
             else:
-                dest_path = src_path
-            logger.info(f"[{request_id}] Success! File: {final_name}")
+                logger.info(f"[{request_id}] Success! {download_result.get('total_containers')} containers (no file)")
 
             # Session is automatically kept alive (persistent by default)
             logger.info(f"[{request_id}] Session remains active: {session_id}")
@@ -7247,37 +8404,16 @@ def get_containers():
             bundle_path = None
             excel_url = None
             
-            # Always prepare Excel file URL
-            excel_url = f"http://{request.host}/files/{session_id}/{final_name}"
+            # Always prepare Excel file URL (unless rows are returned inline)
+            if final_name:
+                excel_url = f"http://{request.host}/files/{session_id}/{final_name}"
             
             if debug_mode:
                 # Debug mode: Build ZIP with screenshots + debug files + Excel
                 try:
-                    ts = datetime.now().strftime('%Y%m%d_%H%M%S')
-                    bundle_name = f"{session_id}_{ts}_DEBUG.zip"
-                    bundle_path = os.path.join(DOWNLOADS_DIR, bundle_name)
-                    session_root = session_id  # top-level folder inside zip
-                    with zipfile.ZipFile(bundle_path, 'w', zipfile.ZIP_DEFLATED) as zf:
-                        # Include session downloads folder (Excel + debug files)
-                        session_dl_dir = os.path.join(DOWNLOADS_DIR, session_id)
-                        if os.path.isdir(session_dl_dir):
-                            for root, _, files in os.walk(session_dl_dir):
-                                for f in files:
-                                    fp = os.path.join(root, f)
-                                    # arc path inside zip: <session_id>/downloads/...
-                                    rel = os.path.relpath(fp, session_dl_dir)
-                                    arc = os.path.join(session_root, 'downloads', rel)
-                                    zf.write(fp, arc)
-                        # Include session screenshots folder
-                        session_sc_dir = operations.screens_dir
-                        if os.path.isdir(session_sc_dir):
-                            for root, _, files in os.walk(session_sc_dir):
-                                for f in files:
-                                    fp = os.path.join(root, f)
-                                    # arc path: <session_id>/screenshots/...
-                                    rel = os.path.relpath(fp, session_sc_dir)
-                                    arc = os.path.join(session_root, 'screenshots', rel)
-                                    zf.write(fp, arc)
+                    bundle_name = create_debug_bundle(operations, session_id, request_id, suffix="DEBUG",
+                                                      downloads_dir=os.path.join(DOWNLOADS_DIR, session_id))
+                    bundle_path = os.path.join(DOWNLOADS_DIR, bundle_name) if bundle_name else None
                     
                     # Print debug bundle URL
                     if bundle_path and os.path.exists(bundle_path):
@@ -7292,7 +8428,7 @@ def get_containers():
                     
                 except Exception as be:
                     print(f"⚠️ Debug bundle creation failed: {be}")
-            else:
+            elif final_name:
                 # Normal mode: No bundle, just Excel
                 print(f"\n{'='*70}")
                 print(f"📄 EXCEL FILE READY")
@@ -7309,8 +8445,14 @@ def get_containers():
                 "is_new_session": is_new_session,  # NEW: Indicate if session was created
                 "file_url": excel_url,
                 "file_name": final_name,
-                "file_size": os.path.getsize(dest_path)
+                "file_format": export_format,
+                "file_size": os.path.getsize(dest_path) if dest_path else None
             }
+            if rows_inline:
+                response_data["format"] = response_format
+                response_data["rows_returned"] = len(scraped_rows)
+                if not scraped_rows.streaming:
+                    response_data["containers"] = list(scraped_rows.values())
             
             # Add scroll information if available
             if scroll_result.get("success"):
@@ -7324,6 +8466,32 @@ def get_containers():
             # Add debug bundle URL if debug mode
             if debug_mode and bundle_path and os.path.exists(bundle_path):
                 response_data["debug_bundle_url"] = f"/files/{bundle_name}"
+            if debug_mode:
+                response_data["wait_timings"] = operations.wait_timing_summary()
+            
+            # Delta sync: snapshot full scrapes per account and diff against the client's snapshot
+            registered = session_registry.get(session_id)
+            account_key = (registered.credentials_hash if registered and registered.credentials_hash else None) or f"user:{username}"
+            full_scrape = work_mode == "all" and infinite_scrolling and not scroll_result.get("watermark_reached")
+            
+            base_snapshot = container_snapshots.get(account_key, since_snapshot) if since_snapshot else None
+            if full_scrape:
+                new_snapshot = container_snapshots.save(account_key, dict(scraped_rows))
+                response_data["snapshot_id"] = new_snapshot.snapshot_id
+            
+            if since_snapshot:
+                if base_snapshot:
+                    delta = diff_container_rows(base_snapshot.rows, scraped_rows, CONTAINER_COLUMNS)
+                    if not full_scrape:
+                        # Partial scrape can't tell removed rows from rows that weren't loaded
+                        delta.pop("removed", None)
+                    delta["since_snapshot"] = since_snapshot
+                    response_data["delta"] = delta
+                    print(f"🔁 Delta since {since_snapshot}: +{len(delta['added'])} "
+                          f"-{len(delta.get('removed', []))} ~{len(delta['changed'])}")
+                else:
+                    response_data["delta"] = None
+                    response_data["snapshot_reset"] = True  # Unknown/expired snapshot - use the full file
             
             if return_url:
                 return jsonify(response_data)
@@ -7332,7 +8500,7 @@ def get_containers():
                     dest_path,
                     as_attachment=True,
                     download_name=final_name,
-                    mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+                    mimetype=export_writers.MIMETYPES[export_format]
                 )
             
         except Exception as operation_error:
@@ -7342,35 +8510,11 @@ def get_containers():
             bundle_path = None
             bundle_name = None
             try:
-                ts = datetime.now().strftime('%Y%m%d_%H%M%S')
-                bundle_name = f"{session_id}_{ts}_FAILED.zip"
-                bundle_path = os.path.join(DOWNLOADS_DIR, bundle_name)
-                session_root = session_id
-                
-                with zipfile.ZipFile(bundle_path, 'w', zipfile.ZIP_DEFLATED) as zf:
-                    # Include any partial downloads
-                    session_dl_dir = os.path.join(DOWNLOADS_DIR, session_id)
-                    if os.path.isdir(session_dl_dir):
-                        for root, _, files in os.walk(session_dl_dir):
-                            for f in files:
-                                fp = os.path.join(root, f)
-                                rel = os.path.relpath(fp, session_dl_dir)
-                                arc = os.path.join(session_root, 'downloads', rel)
-                                zf.write(fp, arc)
-                    
-                    # Include screenshots (most important for debugging)
-                    session_sc_dir = operations.screens_dir
-                    if os.path.isdir(session_sc_dir):
-                        for root, _, files in os.walk(session_sc_dir):
-                            for f in files:
-                                fp = os.path.join(root, f)
-                                rel = os.path.relpath(fp, session_sc_dir)
-                                arc = os.path.join(session_root, 'screenshots', rel)
-                                zf.write(fp, arc)
-                    
-                    # Add error log file
-                    error_log = f"Error: {str(operation_error)}\nTime: {datetime.now().isoformat()}\nRequest ID: {request_id}"
-                    zf.writestr(os.path.join(session_root, 'error.txt'), error_log)
+                error_log = f"Error: {str(operation_error)}\nTime: {datetime.now().isoformat()}\nRequest ID: {request_id}"
+                bundle_name = create_debug_bundle(operations, session_id, request_id, suffix="FAILED",
+                                                  downloads_dir=os.path.join(DOWNLOADS_DIR, session_id),
+                                                  texts={"error.txt": error_log})
+                bundle_path = os.path.join(DOWNLOADS_DIR, bundle_name) if bundle_name else None
                 
                 # Print public download URL for failed operation
                 if bundle_path and os.path.exists(bundle_path):
@@ -7405,6 +8549,7 @@ def get_containers():
 
 
 @app.route('/check_appointments', methods=['POST'])
+@supports_async_job
 def check_appointments():
     """
     Check available appointment times by going through all 3 phases.
@@ -7493,9 +8638,14 @@ def check_appointments():
         vm_email = data.get('vm_email', None)
         
         # Check if continuing from existing appointment workflow session
-        if appointment_session_id and appointment_session_id in appointment_sessions:
+        appt_session = session_registry.get_appointment(appointment_session_id) if appointment_session_id else None
+        if appt_session:
             print(f"🔄 Continuing from existing appointment session: {appointment_session_id}")
-            appt_session = appointment_sessions[appointment_session_id]
+            if not acquire_session_for_request(appt_session.browser_session.session_id):
+                return jsonify({
+                    "success": False,
+                    "error": "Browser session is busy with another request"
+                }), 409
             appt_session.update_last_used()
             operations = EModalBusinessOperations(appt_session.browser_session)
             operations.screens_enabled = True
@@ -7538,7 +8688,7 @@ def check_appointments():
                 last_used=datetime.now(),
                 phase_data={}
             )
-            appointment_sessions[appt_session.session_id] = appt_session
+            session_registry.add_appointment(appt_session)
             logger.info(f"[{request_id}] Appointment workflow session created: {appt_session.session_id}")
             
             operations = EModalBusinessOperations(browser_session)
@@ -7582,6 +8732,8 @@ def check_appointments():
         operations = EModalBusinessOperations(appt_session.browser_session)
         operations.screens_enabled = True
         operations.screens_label = appt_session.browser_session.username
+        if debug_mode:
+            operations.start_debug_bundle("")
         
         # Set vm_email for screenshot annotations
         if vm_email:
@@ -7603,6 +8755,7 @@ def check_appointments():
         
         # PHASE 1: Dropdowns + Container/Booking Number + Quantity (for export)
         if appt_session.current_phase == 1:
+            report_progress(phase="phase_1")
             if container_type == 'import':
                 print("\n" + "="*70)
                 print("📋 PHASE 1 (IMPORT): Trucking Company, Terminal, Move Type, Container")
@@ -7805,7 +8958,19 @@ def check_appointments():
                     if error_dialog:
                         error_message = error_dialog.text.strip()
                         print(f"  ⚠️ Booking number error detected: {error_message}")
-                        operations._capture_screenshot("booking_number_error")
+                        error_screenshot = operations._capture_screenshot("booking_number_error")
+                        error_screenshot_url = None
+                        # Screenshots are not served by /files; publish a copy under downloads/
+                        try:
+                            if error_screenshot:
+                                import shutil
+                                operations.wait_for_screenshots([error_screenshot])
+                                public_screenshot_path = os.path.join(DOWNLOADS_DIR, os.path.basename(error_screenshot))
+                                shutil.copy2(error_screenshot, public_screenshot_path)
+                                artifact_store.register(public_screenshot_path, session_id=browser_session_id, category="screenshot")
+                                error_screenshot_url = f"http://{request.host}/files/{os.path.basename(error_screenshot)}"
+                        except Exception as copy_error:
+                            print(f"⚠️ Could not copy screenshot: {copy_error}")
                         
                         # Close the error dialog
                         operations.close_popup_if_present()
@@ -7821,7 +8986,7 @@ def check_appointments():
                             "is_new_session": is_new_browser_session,
                             "appointment_session_id": appt_session.session_id,
                             "current_phase": 1,
-                            "screenshot_url": f"http://{request.host}/files/{operations.screens_dir.split('/')[-1]}/booking_number_error.png"
+                            "screenshot_url": error_screenshot_url
                         }), 400
                 except:
                     pass  # No error dialog found, continue
@@ -7912,6 +9077,7 @@ def check_appointments():
         
         # PHASE 2: Container Selection + Type-Specific Fields
         if appt_session.current_phase == 2:
+            report_progress(phase="phase_2")
             if container_type == 'import':
                 print("\n" + "="*70)
                 print("📋 PHASE 2 (IMPORT): Checkbox, PIN, Truck Plate, Chassis")
@@ -8099,6 +9265,7 @@ def check_appointments():
         
         # PHASE 3: Get Available Times (import) or Find Calendar (export)
         if appt_session.current_phase == 3:
+            report_progress(phase="phase_3")
             if container_type == 'import':
                 print("\n" + "="*70)
                 print("📋 PHASE 3 (IMPORT): Retrieving Available Appointment Times")
@@ -8148,29 +9315,19 @@ def check_appointments():
         bundle_url = None
         if debug_mode:
             try:
-                ts = datetime.now().strftime('%Y%m%d_%H%M%S')
-                bundle_name = f"{appt_session.session_id}_{ts}_check_appointments.zip"
-                bundle_path = os.path.join(DOWNLOADS_DIR, bundle_name)
-                
-                with zipfile.ZipFile(bundle_path, 'w', zipfile.ZIP_DEFLATED) as zf:
-                    # Include screenshots
-                    session_sc_dir = operations.screens_dir
-                    if os.path.isdir(session_sc_dir):
-                        for root, _, files in os.walk(session_sc_dir):
-                            for f in files:
-                                fp = os.path.join(root, f)
-                                rel = os.path.relpath(fp, session_sc_dir)
-                                arc = os.path.join('screenshots', rel)
-                                zf.write(fp, arc)
+                bundle_name = create_debug_bundle(operations, appt_session.session_id, request_id, suffix="check_appointments",
+                                                  session_root="")
+                bundle_path = os.path.join(DOWNLOADS_DIR, bundle_name) if bundle_name else None
                 
-                bundle_url = f"http://{request.host}/files/{bundle_name}"
-                print(f"\n{'='*70}")
-                print(f"📦 DEBUG BUNDLE CREATED")
-                print(f"{'='*70}")
-                print(f" Public URL: {bundle_url}")
-                print(f" File: {bundle_name}")
-                print(f" Size: {os.path.getsize(bundle_path)} bytes")
-                print(f"{'='*70}\n")
+                if bundle_path:
+                    bundle_url = f"http://{request.host}/files/{bundle_name}"
+                    print(f"\n{'='*70}")
+                    print(f"📦 DEBUG BUNDLE CREATED")
+                    print(f"{'='*70}")
+                    print(f" Public URL: {bundle_url}")
+                    print(f" File: {bundle_name}")
+                    print(f" Size: {os.path.getsize(bundle_path)} bytes")
+                    print(f"{'='*70}\n")
                 
             except Exception as be:
                 print(f"⚠️ Bundle creation failed: {be}")
@@ -8178,8 +9335,7 @@ def check_appointments():
             print(f"\n✅ Working mode: No debug bundle created (screenshots available via direct URLs)")
         
         # Clean up appointment workflow session (keep browser session alive)
-        if appt_session.session_id in appointment_sessions:
-            del appointment_sessions[appt_session.session_id]
+        session_registry.remove_appointment(appt_session.session_id)
         
         logger.info(f"[{request_id}] Check appointments completed successfully (browser session kept alive: {browser_session_id})")
         
@@ -8191,8 +9347,10 @@ def check_appointments():
             # Copy to downloads folder for public access
             try:
                 import shutil
+                operations.wait_for_screenshots([screenshot_path])  # Written by the media pool
                 public_screenshot_path = os.path.join(DOWNLOADS_DIR, screenshot_filename)
                 shutil.copy2(screenshot_path, public_screenshot_path)
+                artifact_store.register(public_screenshot_path, session_id=browser_session_id, category="screenshot")
                 dropdown_screenshot_url = f"http://{request.host}/files/{screenshot_filename}"
                 print(f"📸 Dropdown screenshot available: {dropdown_screenshot_url}")
             except Exception as copy_error:
@@ -8206,8 +9364,10 @@ def check_appointments():
             # Copy to downloads folder for public access
             try:
                 import shutil
+                operations.wait_for_screenshots([screenshot_path])  # Written by the media pool
                 public_screenshot_path = os.path.join(DOWNLOADS_DIR, screenshot_filename)
                 shutil.copy2(screenshot_path, public_screenshot_path)
+                artifact_store.register(public_screenshot_path, session_id=browser_session_id, category="screenshot")
                 calendar_screenshot_url = f"http://{request.host}/files/{screenshot_filename}"
                 print(f"📸 Calendar screenshot available: {calendar_screenshot_url}")
             except Exception as copy_error:
@@ -8362,6 +9522,7 @@ def make_appointment():
             operations = EModalBusinessOperations(browser_session)
             operations.screens_enabled = True
             operations.screens_label = username
+            operations.start_debug_bundle("")
             
             # Ensure app context
             print("🕒 Ensuring app context is fully loaded...")
@@ -8477,28 +9638,19 @@ def make_appointment():
         bundle_name = None
         bundle_url = None
         try:
-            ts = datetime.now().strftime('%Y%m%d_%H%M%S')
-            bundle_name = f"{appt_session.session_id}_{ts}_appointment_submitted.zip"
-            bundle_path = os.path.join(DOWNLOADS_DIR, bundle_name)
-            
-            with zipfile.ZipFile(bundle_path, 'w', zipfile.ZIP_DEFLATED) as zf:
-                session_sc_dir = operations.screens_dir
-                if os.path.isdir(session_sc_dir):
-                    for root, _, files in os.walk(session_sc_dir):
-                        for f in files:
-                            fp = os.path.join(root, f)
-                            rel = os.path.relpath(fp, session_sc_dir)
-                            arc = os.path.join('screenshots', rel)
-                            zf.write(fp, arc)
-            
-            bundle_url = f"http://{request.host}/files/{bundle_name}"
-            print(f"\n{'='*70}")
-            print(f"📦 APPOINTMENT SUBMITTED - DEBUG BUNDLE CREATED")
-            print(f"{'='*70}")
-            print(f" Public URL: {bundle_url}")
-            print(f" File: {bundle_name}")
-            print(f" Size: {os.path.getsize(bundle_path)} bytes")
-            print(f"{'='*70}\n")
+            bundle_name = create_debug_bundle(operations, appt_session.session_id, request_id, suffix="appointment_submitted",
+                                              session_root="")
+            bundle_path = os.path.join(DOWNLOADS_DIR, bundle_name) if bundle_name else None
+            
+            if bundle_path:
+                bundle_url = f"http://{request.host}/files/{bundle_name}"
+                print(f"\n{'='*70}")
+                print(f"📦 APPOINTMENT SUBMITTED - DEBUG BUNDLE CREATED")
+                print(f"{'='*70}")
+                print(f" Public URL: {bundle_url}")
+                print(f" File: {bundle_name}")
+                print(f" Size: {os.path.getsize(bundle_path)} bytes")
+                print(f"{'='*70}\n")
             
         except Exception as be:
             print(f"⚠️ Bundle creation failed: {be}")
@@ -8596,6 +9748,8 @@ def get_container_timeline():
             operations = EModalBusinessOperations(session_wrapper)
             operations.screens_enabled = bool(capture_screens)
             operations.screens_label = screens_label
+            if debug_mode and operations.screens_enabled:
+                operations.start_debug_bundle(session_id)
 
             # Ensure app context
             ctx = operations.ensure_app_context(30)
@@ -8653,21 +9807,8 @@ def get_container_timeline():
                 bundle_name = None
                 bundle_path = None
                 try:
-                    ts = datetime.now().strftime('%Y%m%d_%H%M%S')
-                    bundle_name = f"{session_id}_{ts}_PREGATE.zip"
-                    bundle_path = os.path.join(DOWNLOADS_DIR, bundle_name)
-                    session_root = session_id
-                    
-                    with zipfile.ZipFile(bundle_path, 'w', zipfile.ZIP_DEFLATED) as zf:
-                        # Add all screenshots from session (includes Pregate image if captured)
-                        session_sc_dir = operations.screens_dir
-                        if os.path.isdir(session_sc_dir):
-                            for root, _, files in os.walk(session_sc_dir):
-                                for f in files:
-                                    fp = os.path.join(root, f)
-                                    rel = os.path.relpath(fp, session_sc_dir)
-                                    arc = os.path.join(session_root, 'screenshots', rel)
-                                    zf.write(fp, arc)
+                    bundle_name = create_debug_bundle(operations, session_id, request_id, suffix="PREGATE")
+                    bundle_path = os.path.join(DOWNLOADS_DIR, bundle_name) if bundle_name else None
                     
                     # Print public download URL
                     if bundle_path and os.path.exists(bundle_path):
@@ -8784,6 +9925,8 @@ def get_booking_number():
             operations = EModalBusinessOperations(session_wrapper)
             operations.screens_enabled = bool(capture_screens)
             operations.screens_label = screens_label
+            if debug_mode and operations.screens_enabled:
+                operations.start_debug_bundle(session_id)
 
             # Ensure app context
             ctx = operations.ensure_app_context(30)
@@ -8829,21 +9972,8 @@ def get_booking_number():
                 bundle_name = None
                 bundle_path = None
                 try:
-                    ts = datetime.now().strftime('%Y%m%d_%H%M%S')
-                    bundle_name = f"{session_id}_{ts}_BOOKING.zip"
-                    bundle_path = os.path.join(DOWNLOADS_DIR, bundle_name)
-                    session_root = session_id
-                    
-                    with zipfile.ZipFile(bundle_path, 'w', zipfile.ZIP_DEFLATED) as zf:
-                        # Add all screenshots from session
-                        session_sc_dir = operations.screens_dir
-                        if os.path.isdir(session_sc_dir):
-                            for root, _, files in os.walk(session_sc_dir):
-                                for f in files:
-                                    fp = os.path.join(root, f)
-                                    rel = os.path.relpath(fp, session_sc_dir)
-                                    arc = os.path.join(session_root, 'screenshots', rel)
-                                    zf.write(fp, arc)
+                    bundle_name = create_debug_bundle(operations, session_id, request_id, suffix="BOOKING")
+                    bundle_path = os.path.join(DOWNLOADS_DIR, bundle_name) if bundle_name else None
                     
                     # Print public download URL
                     if bundle_path and os.path.exists(bundle_path):
@@ -8901,6 +10031,7 @@ def get_booking_number():
 
 
 @app.route('/get_appointments', methods=['POST'])
+@supports_async_job
 def get_appointments():
     """
     Navigate to myappointments page, scroll through appointments, select all checkboxes, and download Excel.
@@ -8968,6 +10099,8 @@ def get_appointments():
             operations = EModalBusinessOperations(session_wrapper)
             operations.screens_enabled = bool(capture_screens)
             operations.screens_label = screens_label
+            if debug_mode and operations.screens_enabled:
+                operations.start_debug_bundle(session_id)
 
             # Navigate to myappointments page
             nav = operations.navigate_to_myappointments()
@@ -9051,6 +10184,8 @@ def get_appointments():
                     # File is already in the right directory, just use current name
                     excel_filename = os.path.basename(excel_file)
                 
+                artifact_store.register(excel_file, session_id=session_id, category="export")
+                
                 # Create full public URL
                 excel_url = f"http://{request.host}/files/{excel_filename}"
                 print(f"✅ Appointments Excel file ready: {excel_url}")
@@ -9058,8 +10193,9 @@ def get_appointments():
                 print("⚠️ Appointments Excel file not found in downloads folder")
                 # Create debug bundle if requested
                 if debug_mode:
-                    debug_zip_filename = create_debug_bundle(operations, session_id, request_id)
-                    debug_bundle_url = f"http://{request.host}/files/{debug_zip_filename}"
+                    debug_zip_filename = create_debug_bundle(operations, session_id, request_id, suffix="FAILED",
+                                                             texts={"error.txt": "Error: Excel file not found after download"})
+                    debug_bundle_url = f"http://{request.host}/files/{debug_zip_filename}" if debug_zip_filename else None
                     
                     return jsonify({
                         "success": False,
@@ -9082,25 +10218,9 @@ def get_appointments():
                 bundle_name = None
                 bundle_path = None
                 try:
-                    ts = datetime.now().strftime('%Y%m%d_%H%M%S')
-                    bundle_name = f"{session_id}_{ts}_APPOINTMENTS.zip"
-                    bundle_path = os.path.join(DOWNLOADS_DIR, bundle_name)
-                    session_root = session_id
-                    
-                    with zipfile.ZipFile(bundle_path, 'w', zipfile.ZIP_DEFLATED) as zf:
-                        # Add all screenshots from session
-                        session_sc_dir = operations.screens_dir
-                        if os.path.isdir(session_sc_dir):
-                            for root, _, files in os.walk(session_sc_dir):
-                                for f in files:
-                                    fp = os.path.join(root, f)
-                                    rel = os.path.relpath(fp, session_sc_dir)
-                                    arc = os.path.join(session_root, 'screenshots', rel)
-                                    zf.write(fp, arc)
-                        
-                        # Add Excel file if found
-                        if excel_file and os.path.exists(excel_file):
-                            zf.write(excel_file, os.path.join(session_root, excel_filename))
+                    bundle_name = create_debug_bundle(operations, session_id, request_id, suffix="APPOINTMENTS",
+                                                      extra_files=[(excel_file, excel_filename)] if excel_file and os.path.exists(excel_file) else None)
+                    bundle_path = os.path.join(DOWNLOADS_DIR, bundle_name) if bundle_name else None
                     
                     # Print public download URL
                     if bundle_path and os.path.exists(bundle_path):
@@ -9161,7 +10281,7 @@ def list_sessions():
     cleanup_expired_sessions()
     
     sessions_info = []
-    for session_id, session in active_sessions.items():
+    for session_id, session in session_registry.items():
         sessions_info.append({
             "session_id": session_id,
             "username": session.username,
@@ -9180,11 +10300,11 @@ def list_sessions():
 @app.route('/sessions/<session_id>', methods=['DELETE'])
 def close_session(session_id):
     """Close a specific browser session"""
-    if session_id in active_sessions:
-        session = active_sessions[session_id]
+    session = session_registry.get(session_id)
+    if session:
         try:
             session.driver.quit()
-            del active_sessions[session_id]
+            session_registry.remove(session_id)
             return jsonify({"success": True, "message": f"Session {session_id} closed"})
         except Exception as e:
             return jsonify({"success": False, "error": str(e)}), 500
@@ -9199,27 +10319,15 @@ def manual_cleanup():
         logger.info("🗑️ Manual cleanup triggered")
         cleanup_old_files()
         
-        # Get current disk usage
+        # Current disk usage (from the file registry - no directory walk)
+        downloads_root = os.path.abspath(DOWNLOADS_DIR) + os.sep
         downloads_size = 0
         screenshots_size = 0
-        
-        if os.path.exists(DOWNLOADS_DIR):
-            for root, dirs, files in os.walk(DOWNLOADS_DIR):
-                for f in files:
-                    fp = os.path.join(root, f)
-                    try:
-                        downloads_size += os.path.getsize(fp)
-                    except:
-                        pass
-        
-        if os.path.exists(SCREENSHOTS_DIR):
-            for root, dirs, files in os.walk(SCREENSHOTS_DIR):
-                for f in files:
-                    fp = os.path.join(root, f)
-                    try:
-                        screenshots_size += os.path.getsize(fp)
-                    except:
-                        pass
+        for record in file_registry.records():
+            if record.path.startswith(downloads_root):
+                downloads_size += record.size
+            else:
+                screenshots_size += record.size
         
         total_size_mb = (downloads_size + screenshots_size) / (1024 * 1024)
         
@@ -9278,7 +10386,346 @@ def emergency_recovery():
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+def _bulk_process_import(operations, container_id: str, located: bool = False) -> dict:
+    """
+    Get Pregate status and timeline for one IMPORT container (search, expand, extract, collapse).
+    
+    Returns:
+        Result entry for import_results
+    """
+    try:
+        # Set current container for screenshots
+        operations.current_container_id = container_id
+        
+        # Search (or jump to the already-loaded row) and expand
+        if located:
+            search_result = operations.scroll_to_container_row(container_id)
+        else:
+            search_result = operations.search_container_with_scrolling(container_id)
+        if not search_result.get("success"):
+            return {
+                "container_id": container_id,
+                "success": False,
+                "error": f"Container not found: {search_result.get('error')}",
+                "pregate_status": None
+            }
+        
+        expand_result = operations.expand_container_row(container_id)
+        if not expand_result.get("success"):
+            return {
+                "container_id": container_id,
+                "success": False,
+                "error": f"Failed to expand: {expand_result.get('error')}",
+                "pregate_status": None,
+                "timeline": [],
+                "milestone_count": 0
+            }
+        
+        # Extract full timeline
+        timeline_result = operations.extract_full_timeline()
+        timeline_data = []
+        milestone_count = 0
+        
+        if timeline_result.get("success"):
+            timeline_data = timeline_result.get("timeline", [])
+            milestone_count = timeline_result.get("milestone_count", 0)
+            print(f"  ✅ Extracted {milestone_count} milestones")
+        else:
+            print(f"  ⚠️ Timeline extraction failed: {timeline_result.get('error')}")
+        
+        # Get Pregate status
+        pregate_result = operations.check_pregate_status()
+        
+        if pregate_result.get("success"):
+            entry = {
+                "container_id": container_id,
+                "success": True,
+                "pregate_status": pregate_result.get("passed_pregate"),
+                "pregate_details": pregate_result.get("message"),
+                "timeline": timeline_data,
+                "milestone_count": milestone_count
+            }
+            print(f"  ✅ Pregate: {pregate_result.get('passed_pregate')}")
+        else:
+            entry = {
+                "container_id": container_id,
+                "success": False,
+                "error": pregate_result.get("error"),
+                "pregate_status": None,
+                "timeline": timeline_data,
+                "milestone_count": milestone_count
+            }
+            print(f"  ❌ Failed: {pregate_result.get('error')}")
+        
+        # Collapse the container row before moving to next
+        print(f"  🔽 Collapsing container row...")
+        collapse_result = operations.collapse_container_row(container_id)
+        if collapse_result.get("success"):
+            print(f"  ✅ Container collapsed")
+        else:
+            print(f"  ⚠️ Collapse warning: {collapse_result.get('error')}")
+        
+        return entry
+        
+    except Exception as e:
+        logger.error(f"Error processing import container {container_id}: {e}")
+        return {
+            "container_id": container_id,
+            "success": False,
+            "error": str(e),
+            "pregate_status": None,
+            "timeline": [],
+            "milestone_count": 0
+        }
+
+
+def _bulk_process_export(operations, container_id: str, located: bool = False) -> dict:
+    """
+    Get Booking number for one EXPORT container (search, expand, extract, collapse).
+    
+    Returns:
+        Result entry for export_results
+    """
+    try:
+        # Set current container for screenshots
+        operations.current_container_id = container_id
+        
+        # Search (or jump to the already-loaded row) and expand
+        if located:
+            search_result = operations.scroll_to_container_row(container_id)
+        else:
+            search_result = operations.search_container_with_scrolling(container_id)
+        if not search_result.get("success"):
+            return {
+                "container_id": container_id,
+                "success": False,
+                "error": f"Container not found: {search_result.get('error')}",
+                "booking_number": None
+            }
+        
+        expand_result = operations.expand_container_row(container_id)
+        if not expand_result.get("success"):
+            return {
+                "container_id": container_id,
+                "success": False,
+                "error": f"Failed to expand: {expand_result.get('error')}",
+                "booking_number": None
+            }
+        
+        # Get Booking number
+        booking_result = operations.get_booking_number(container_id)
+        
+        if booking_result.get("success"):
+            booking_number = booking_result.get("booking_number")
+            entry = {
+                "container_id": container_id,
+                "success": True,
+                "booking_number": booking_number
+            }
+            if booking_number:
+                print(f"  ✅ Booking: {booking_number}")
+            else:
+                print(f"  ⚠️ Booking: Not available")
+        else:
+            entry = {
+                "container_id": container_id,
+                "success": False,
+                "error": booking_result.get("error"),
+                "booking_number": None
+            }
+            print(f"  ❌ Failed: {booking_result.get('error')}")
+        
+        # Collapse the container row before moving to next
+        print(f"  🔽 Collapsing container row...")
+        collapse_result = operations.collapse_container_row(container_id)
+        if collapse_result.get("success"):
+            print(f"  ✅ Container collapsed")
+        else:
+            print(f"  ⚠️ Collapse warning: {collapse_result.get('error')}")
+        
+        return entry
+        
+    except Exception as e:
+        logger.error(f"Error processing export container {container_id}: {e}")
+        return {
+            "container_id": container_id,
+            "success": False,
+            "error": str(e),
+            "booking_number": None
+        }
+
+
+def _run_bulk_items(operations, items: list, shard_label: str = "", single_pass: bool = False) -> list:
+    """
+    Process bulk work items sequentially on one browser.
+    
+    Args:
+        operations: EModalBusinessOperations bound to the browser
+        items: List of (kind, index, container_id) with kind 'import' or 'export'
+        shard_label: Prefix for log lines when running as one of several shards
+        single_pass: Load the whole grid once and visit rows in DOM order
+                     instead of searching (and rescrolling) for every container
+    
+    Returns:
+        List of (kind, index, result_entry)
+    """
+    processed = []
+    located = False
+    
+    if single_pass and items:
+        print(f"\n{shard_label}📜 Single-pass mode: loading grid once for {len(items)} containers")
+        report_progress(phase="loading_grid")
+        operations.load_all_containers_with_infinite_scroll()
+        index_result = operations.index_container_rows([cid for _, _, cid in items])
+        
+        if index_result.get("success"):
+            positions = index_result["positions"]
+            located = True
+            
+            # Containers missing from the grid fail right away
+            for kind, index, container_id in items:
+                if container_id not in positions:
+                    entry = {
+                        "container_id": container_id,
+                        "success": False,
+                        "error": "Container not found: not present in containers grid"
+                    }
+                    entry["pregate_status" if kind == "import" else "booking_number"] = None
+                    processed.append((kind, index, entry))
+            
+            # Visit the rest top-to-bottom
+            items = sorted(
+                [item for item in items if item[2] in positions],
+                key=lambda item: positions[item[2]]
+            )
+        else:
+            print(f"⚠️ {index_result.get('error')} - falling back to per-container search")
+    
+    for pos, (kind, index, container_id) in enumerate(items, 1):
+        print(f"\n{shard_label}[{pos}/{len(items)}] Processing {kind.upper()}: {container_id}")
+        report_progress(phase=kind, processed=pos - 1, total=len(items), current_container=container_id)
+        
+        if kind == "import":
+            entry = _bulk_process_import(operations, container_id, located=located)
+        else:
+            entry = _bulk_process_export(operations, container_id, located=located)
+        processed.append((kind, index, entry))
+        
+        # Small delay between containers to avoid overwhelming the system
+        if pos < len(items):
+            time.sleep(0.5)
+    
+    return processed
+
+
+def create_worker_session(username: str, password: str, captcha_api_key: str, request_id: str) -> Optional[BrowserSession]:
+    """
+    Log in an extra, short-lived browser session for the same credentials
+    (used to shard bulk work). It is not mapped in persistent_sessions, and
+    the caller must close it with session_registry.remove(..., quit_driver=True)
+    and then delete worker.profile_dir.
+    
+    Only uses free capacity: other users' idle sessions are never evicted for a worker.
+    
+    Returns:
+        BrowserSession held (locked) for the caller, or None on failure or when no slot is free
+    """
+    if not session_registry.has_capacity():
+        logger.warning(f"[{request_id}] No free session slot for worker session")
+        return None
+    
+    session_id = f"worker_{int(time.time())}_{threading.get_ident()}"
+    handler, temp_profile_dir = create_login_handler(captcha_api_key, session_id)
+    try:
+        login_result = handler.login(username, password)
+        login_error = None if login_result.success else login_result.error_message
+    except Exception as e:
+        login_error = str(e)
+    if login_error is not None:
+        logger.warning(f"[{request_id}] Worker session login failed: {login_error}")
+        try:
+            if handler.driver:
+                handler.driver.quit()
+        except:
+            pass
+        shutil.rmtree(temp_profile_dir, ignore_errors=True)
+        return None
+    
+    worker = BrowserSession(
+        session_id=session_id,
+        driver=handler.driver,
+        username=username,
+        created_at=datetime.now(),
+        last_used=datetime.now(),
+        keep_alive=False,
+        credentials_hash=None,  # Not reused by other requests
+        last_refresh=datetime.now(),
+        profile_dir=temp_profile_dir  # Removed by the caller after the driver quits
+    )
+    # The slot may have been taken while logging in
+    if not session_registry.has_capacity():
+        logger.warning(f"[{request_id}] Session slots filled up during worker login - discarding worker")
+        try:
+            handler.driver.quit()
+        except:
+            pass
+        shutil.rmtree(temp_profile_dir, ignore_errors=True)
+        return None
+    session_registry.add(worker)
+    session_registry.try_acquire(session_id)
+    worker.mark_in_use()
+    return worker
+
+
+@metrics.endpoint("get_info_bulk")
+def _run_bulk_shard(items: list, shard_index: int, credentials: dict, debug_mode: bool, request_id: str, single_pass: bool = False) -> list:
+    """
+    Run one shard of a bulk request on its own worker browser session.
+    
+    Returns:
+        List of (kind, index, result_entry); failed entries for every item if the shard failed
+        after starting, or None if no worker session could be created (the caller runs the
+        items on the primary session instead)
+    """
+    def fail_all(error):
+        failed = []
+        for kind, index, container_id in items:
+            entry = {"container_id": container_id, "success": False, "error": error}
+            entry["pregate_status" if kind == "import" else "booking_number"] = None
+            failed.append((kind, index, entry))
+        return failed
+    
+    worker = None
+    try:
+        worker = create_worker_session(
+            credentials["username"], credentials["password"], credentials["captcha_api_key"], request_id
+        )
+        if worker is None:
+            return None
+        
+        operations = EModalBusinessOperations(worker)
+        operations.screens_enabled = debug_mode
+        operations.screens_label = worker.username
+        
+        operations.ensure_app_context(30)
+        nav_result = operations.navigate_to_containers()
+        if not nav_result.get("success"):
+            return fail_all(f"Shard {shard_index}: failed to navigate to containers page: {nav_result.get('error')}")
+        
+        return _run_bulk_items(operations, items, shard_label=f"[shard {shard_index}] ", single_pass=single_pass)
+    except Exception as e:
+        logger.error(f"[{request_id}] Shard {shard_index} failed: {e}")
+        return fail_all(f"Shard {shard_index}: {e}")
+    finally:
+        if worker is not None:
+            session_registry.release(worker.session_id)
+            session_registry.remove(worker.session_id, quit_driver=True)
+            if worker.profile_dir:
+                shutil.rmtree(worker.profile_dir, ignore_errors=True)
+
+
 @app.route('/get_info_bulk', methods=['POST'])
+@supports_async_job
 def get_info_bulk():
     """
     Bulk process multiple containers to extract information efficiently.
@@ -9293,6 +10740,11 @@ def get_info_bulk():
         - import_containers: List of import container IDs (optional)
         - export_containers: List of export container IDs (optional)
         - debug: Boolean for debug mode (default: false)
+        - shards: Number of browser sessions to split the work across (default: 1,
+          capped by the free session slots - no other session is evicted for it; extra sessions
+          need username/password/captcha_api_key)
+        - single_pass: Load the containers grid once and expand rows in page order
+          instead of searching for every container (default: false)
     
     Returns:
         - Results for each container with status/booking number
@@ -9310,6 +10762,14 @@ def get_info_bulk():
         import_containers = data.get('import_containers', [])
         export_containers = data.get('export_containers', [])
         debug_mode = data.get('debug', False)
+        try:
+            shards = int(data.get('shards') or 1)
+        except (TypeError, ValueError):
+            return jsonify({
+                "success": False,
+                "error": f"'shards' must be a whole number, got {data.get('shards')!r}"
+            }), 400
+        single_pass = data.get('single_pass', False)
         
         if not import_containers and not export_containers:
             return jsonify({
@@ -9341,6 +10801,8 @@ def get_info_bulk():
         operations = EModalBusinessOperations(browser_session)
         operations.screens_enabled = debug_mode
         operations.screens_label = username
+        if debug_mode:
+            operations.start_debug_bundle(browser_session_id)
         
         # Ensure we're on containers page
         print("🕒 Ensuring app context is fully loaded...")
@@ -9374,185 +10836,66 @@ def get_info_bulk():
             }
         }
         
-        # Process IMPORT containers (get Pregate status)
-        if import_containers:
-            print(f"\n📦 Processing {len(import_containers)} IMPORT containers for Pregate status...")
-            
-            for idx, container_id in enumerate(import_containers, 1):
-                print(f"\n[{idx}/{len(import_containers)}] Processing IMPORT: {container_id}")
-                
-                try:
-                    # Set current container for screenshots
-                    operations.current_container_id = container_id
-                    
-                    # Search and expand
-                    search_result = operations.search_container_with_scrolling(container_id)
-                    if not search_result.get("success"):
-                        results["import_results"].append({
-                            "container_id": container_id,
-                            "success": False,
-                            "error": f"Container not found: {search_result.get('error')}",
-                            "pregate_status": None
-                        })
-                        results["summary"]["import_failed"] += 1
-                        continue
-                    
-                    expand_result = operations.expand_container_row(container_id)
-                    if not expand_result.get("success"):
-                        results["import_results"].append({
-                            "container_id": container_id,
-                            "success": False,
-                            "error": f"Failed to expand: {expand_result.get('error')}",
-                            "pregate_status": None,
-                            "timeline": [],
-                            "milestone_count": 0
-                        })
-                        results["summary"]["import_failed"] += 1
-                        continue
-                    
-                    # Extract full timeline
-                    timeline_result = operations.extract_full_timeline()
-                    timeline_data = []
-                    milestone_count = 0
-                    
-                    if timeline_result.get("success"):
-                        timeline_data = timeline_result.get("timeline", [])
-                        milestone_count = timeline_result.get("milestone_count", 0)
-                        print(f"  ✅ Extracted {milestone_count} milestones")
-                    else:
-                        print(f"  ⚠️ Timeline extraction failed: {timeline_result.get('error')}")
-                    
-                    # Get Pregate status
-                    pregate_result = operations.check_pregate_status()
-                    
-                    if pregate_result.get("success"):
-                        results["import_results"].append({
-                            "container_id": container_id,
-                            "success": True,
-                            "pregate_status": pregate_result.get("passed_pregate"),
-                            "pregate_details": pregate_result.get("message"),
-                            "timeline": timeline_data,
-                            "milestone_count": milestone_count
-                        })
-                        results["summary"]["import_success"] += 1
-                        print(f"  ✅ Pregate: {pregate_result.get('passed_pregate')}")
-                    else:
-                        results["import_results"].append({
-                            "container_id": container_id,
-                            "success": False,
-                            "error": pregate_result.get("error"),
-                            "pregate_status": None,
-                            "timeline": timeline_data,
-                            "milestone_count": milestone_count
-                        })
-                        results["summary"]["import_failed"] += 1
-                        print(f"  ❌ Failed: {pregate_result.get('error')}")
-                    
-                    # Collapse the container row before moving to next
-                    print(f"  🔽 Collapsing container row...")
-                    collapse_result = operations.collapse_container_row(container_id)
-                    if collapse_result.get("success"):
-                        print(f"  ✅ Container collapsed")
+        # Work items in input order: (kind, index, container_id)
+        items = [("import", i, cid) for i, cid in enumerate(import_containers)]
+        items += [("export", i, cid) for i, cid in enumerate(export_containers)]
+        
+        # Shard across extra sessions for the same credentials (needs credentials to log in);
+        # workers only use free slots so other users' sessions are never evicted
+        free_slots = max(0, MAX_CONCURRENT_SESSIONS - session_registry.count())
+        shard_count = max(1, min(shards, 1 + free_slots, len(items)))
+        if shards > 1 + free_slots:
+            print(f"⚠️ Requested {shards} shards, using {shard_count} ({free_slots} free session slots)")
+        credentials = {k: data.get(k) for k in ('username', 'password', 'captcha_api_key')}
+        if shard_count > 1 and not all(credentials.values()):
+            print("⚠️ Sharding requires username/password/captcha_api_key - running on a single session")
+            shard_count = 1
+        
+        # Contiguous chunks keep each shard's work in grid order; shard 0 runs on this request's session
+        chunk_size = -(-len(items) // shard_count)
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+        
+        processed = []
+        unstarted_shards = 0
+        if len(chunks) > 1:
+            print(f"\n⚡ Sharding {len(items)} containers across {len(chunks)} sessions")
+            with ThreadPoolExecutor(max_workers=len(chunks) - 1) as pool:
+                futures = [
+                    pool.submit(_run_bulk_shard, chunk, shard_index, credentials, debug_mode, request_id, single_pass)
+                    for shard_index, chunk in enumerate(chunks[1:], 1)
+                ]
+                processed.extend(_run_bulk_items(operations, chunks[0], shard_label="[shard 0] ", single_pass=single_pass))
+                fallback = []
+                for chunk, future in zip(chunks[1:], futures):
+                    shard_result = future.result()
+                    if shard_result is None:
+                        unstarted_shards += 1
+                        fallback.extend(chunk)
                     else:
-                        print(f"  ⚠️ Collapse warning: {collapse_result.get('error')}")
-                    
-                except Exception as e:
-                    logger.error(f"Error processing import container {container_id}: {e}")
-                    results["import_results"].append({
-                        "container_id": container_id,
-                        "success": False,
-                        "error": str(e),
-                        "pregate_status": None,
-                        "timeline": [],
-                        "milestone_count": 0
-                    })
-                    results["summary"]["import_failed"] += 1
-                    
-                # Small delay between containers to avoid overwhelming the system
-                if idx < len(import_containers):
-                    time.sleep(0.5)
+                        processed.extend(shard_result)
+            if fallback:
+                # Worker sessions that could not start: finish their items on this request's session
+                print(f"⚠️ {len(fallback)} containers from unstarted shards - processing on the primary session")
+                processed.extend(_run_bulk_items(operations, fallback, shard_label="[shard 0] ", single_pass=single_pass))
+        else:
+            processed = _run_bulk_items(operations, items, single_pass=single_pass)
+        
+        # Merge in input order and rebuild summary counters
+        import_results = [None] * len(import_containers)
+        export_results = [None] * len(export_containers)
+        for kind, index, entry in processed:
+            if kind == "import":
+                import_results[index] = entry
+            else:
+                export_results[index] = entry
         
-        # Process EXPORT containers (get Booking number)
-        if export_containers:
-            print(f"\n📦 Processing {len(export_containers)} EXPORT containers for Booking numbers...")
-            
-            for idx, container_id in enumerate(export_containers, 1):
-                print(f"\n[{idx}/{len(export_containers)}] Processing EXPORT: {container_id}")
-                
-                try:
-                    # Set current container for screenshots
-                    operations.current_container_id = container_id
-                    
-                    # Search and expand
-                    search_result = operations.search_container_with_scrolling(container_id)
-                    if not search_result.get("success"):
-                        results["export_results"].append({
-                            "container_id": container_id,
-                            "success": False,
-                            "error": f"Container not found: {search_result.get('error')}",
-                            "booking_number": None
-                        })
-                        results["summary"]["export_failed"] += 1
-                        continue
-                    
-                    expand_result = operations.expand_container_row(container_id)
-                    if not expand_result.get("success"):
-                        results["export_results"].append({
-                            "container_id": container_id,
-                            "success": False,
-                            "error": f"Failed to expand: {expand_result.get('error')}",
-                            "booking_number": None
-                        })
-                        results["summary"]["export_failed"] += 1
-                        continue
-                    
-                    # Get Booking number
-                    booking_result = operations.get_booking_number(container_id)
-                    
-                    if booking_result.get("success"):
-                        booking_number = booking_result.get("booking_number")
-                        results["export_results"].append({
-                            "container_id": container_id,
-                            "success": True,
-                            "booking_number": booking_number
-                        })
-                        if booking_number:
-                            results["summary"]["export_success"] += 1
-                            print(f"  ✅ Booking: {booking_number}")
-                        else:
-                            results["summary"]["export_success"] += 1
-                            print(f"  ⚠️ Booking: Not available")
-                    else:
-                        results["export_results"].append({
-                            "container_id": container_id,
-                            "success": False,
-                            "error": booking_result.get("error"),
-                            "booking_number": None
-                        })
-                        results["summary"]["export_failed"] += 1
-                        print(f"  ❌ Failed: {booking_result.get('error')}")
-                    
-                    # Collapse the container row before moving to next
-                    print(f"  🔽 Collapsing container row...")
-                    collapse_result = operations.collapse_container_row(container_id)
-                    if collapse_result.get("success"):
-                        print(f"  ✅ Container collapsed")
-                    else:
-                        print(f"  ⚠️ Collapse warning: {collapse_result.get('error')}")
-                    
-                except Exception as e:
-                    logger.error(f"Error processing export container {container_id}: {e}")
-                    results["export_results"].append({
-                        "container_id": container_id,
-                        "success": False,
-                        "error": str(e),
-                        "booking_number": None
-                    })
-                    results["summary"]["export_failed"] += 1
-                    
-                # Small delay between containers to avoid overwhelming the system
-                if idx < len(export_containers):
-                    time.sleep(0.5)
+        results["import_results"] = import_results
+        results["export_results"] = export_results
+        results["summary"]["import_success"] = sum(1 for r in import_results if r.get("success"))
+        results["summary"]["import_failed"] = len(import_results) - results["summary"]["import_success"]
+        results["summary"]["export_success"] = sum(1 for r in export_results if r.get("success"))
+        results["summary"]["export_failed"] = len(export_results) - results["summary"]["export_success"]
+        results["summary"]["shards"] = len(chunks) - unstarted_shards
         
         print(f"\n✅ Bulk processing completed!")
         print(f"   Import: {results['summary']['import_success']}/{results['summary']['total_import']} successful")
@@ -9570,11 +10913,9 @@ def get_info_bulk():
         # Add debug bundle if requested
         if debug_mode:
             try:
-                debug_bundle_path = operations.create_debug_bundle()
-                if debug_bundle_path:
-                    bundle_filename = os.path.basename(debug_bundle_path)
-                    debug_url = f"{request.host_url}debug_bundles/{bundle_filename}"
-                    response_data["debug_bundle_url"] = debug_url
+                bundle_filename = create_debug_bundle(operations, browser_session_id, request_id, suffix="BULK")
+                if bundle_filename:
+                    response_data["debug_bundle_url"] = f"http://{request.host}/files/{bundle_filename}"
             except Exception as debug_error:
                 logger.warning(f"Failed to create debug bundle: {debug_error}")
         
@@ -9596,39 +10937,75 @@ def get_info_bulk():
         }), 500
 
 
+@app.route('/debug_bundle/<session_id>', methods=['GET'])
+def stream_debug_bundle(session_id):
+    """Stream a session's screenshots and downloads as a ZIP built on the fly (no temp file)"""
+    if not re.fullmatch(r'[\w\-.]+', session_id) or session_id.startswith('.'):
+        return jsonify({"success": False, "error": "Invalid session_id"}), 400
+    
+    screens_dir = os.path.join(SCREENSHOTS_DIR, session_id)
+    session_dl_dir = os.path.join(DOWNLOADS_DIR, session_id)
+    if not os.path.isdir(screens_dir) and not os.path.isdir(session_dl_dir):
+        return jsonify({"success": False, "error": "No files for this session"}), 404
+    
+    def entries():
+        for fp, arcname in iter_directory(screens_dir, f"{session_id}/screenshots"):
+            yield arcname, fp
+        for fp, arcname in iter_directory(session_dl_dir, f"{session_id}/downloads"):
+            yield arcname, fp
+    
+    ts = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return app.response_class(
+        stream_bundle(entries()),
+        mimetype="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{session_id}_{ts}_DEBUG.zip"'}
+    )
+
+
 @app.route('/files/<path:filename>', methods=['GET'])
 def serve_download(filename):
-    """Serve downloaded Excel files from the downloads directory"""
-    # First try the main downloads directory
-    safe_path = os.path.join(DOWNLOADS_DIR, filename)
-    if not os.path.abspath(safe_path).startswith(os.path.abspath(DOWNLOADS_DIR)):
-        return jsonify({"success": False, "error": "Invalid path"}), 400
-    
-    if os.path.exists(safe_path):
-        return send_file(safe_path, as_attachment=True)
-    
-    # If not found in main directory, search in session subdirectories
-    # Look for files that match the pattern: session_id_timestamp_appointments.xlsx
-    if filename.endswith('_appointments.xlsx') and '_' in filename:
-        # Extract session_id from filename (everything before the last two underscores)
-        parts = filename.split('_')
-        if len(parts) >= 3:
-            session_id = '_'.join(parts[:-2])  # Everything except last two parts (timestamp and appointments.xlsx)
-            session_dir = os.path.join(DOWNLOADS_DIR, session_id)
-            
-            if os.path.exists(session_dir):
-                session_file_path = os.path.join(session_dir, filename)
-                if os.path.exists(session_file_path):
-                    return send_file(session_file_path, as_attachment=True)
-    
-    # If still not found, search all subdirectories for the file
-    for root, dirs, files in os.walk(DOWNLOADS_DIR):
-        if filename in files:
-            file_path = os.path.join(root, filename)
-            if os.path.abspath(file_path).startswith(os.path.abspath(DOWNLOADS_DIR)):
-                return send_file(file_path, as_attachment=True)
-    
-    return jsonify({"success": False, "error": "File not found"}), 404
+    """
+    Serve produced files under downloads/ (Excel, debug bundles, published screenshot
+    copies) by URL path or bare file name; screenshots/ itself is not exposed.
+    
+    Resolved through the file registry (no directory walks); responses carry an ETag and
+    Last-Modified and honour If-None-Match / Range (resumable downloads).
+    """
+    record = file_registry.lookup(filename)
+    
+    if record is None:
+        # Direct path under downloads/ (file written outside the registry)
+        safe_path = os.path.join(DOWNLOADS_DIR, filename)
+        if not os.path.abspath(safe_path).startswith(os.path.abspath(DOWNLOADS_DIR) + os.sep):
+            return jsonify({"success": False, "error": "Invalid path"}), 400
+        if os.path.isfile(safe_path):
+            record = file_registry.register(safe_path)
+    
+    if record is None and not _files_indexed.is_set():
+        # Files from before this process started: index them once, then retry
+        index_existing_files()
+        record = file_registry.lookup(filename)
+    
+    if record is None:
+        return jsonify({"success": False, "error": "File not found"}), 404
+    
+    return send_file(
+        record.path,
+        as_attachment=True,
+        conditional=True,
+        etag=record.etag,
+        last_modified=record.mtime
+    )
+
+
+def index_existing_files() -> None:
+    """Register files already on disk (startup); later files are registered as they are written"""
+    if _files_indexed.is_set():
+        return
+    started = time.time()
+    count = file_registry.index_directory(DOWNLOADS_DIR) + file_registry.index_directory(SCREENSHOTS_DIR)
+    _files_indexed.set()
+    print(f"🗂️ Indexed {count} existing files in {time.time() - started:.2f}s")
 
 
 if __name__ == '__main__':
@@ -9644,11 +11021,14 @@ if __name__ == '__main__':
     print("  POST /get_containers - Extract and download container data")
     print("  GET /sessions - List active browser sessions")
     print("  DELETE /sessions/<id> - Close specific session")
-    print("  POST /cleanup - Manually trigger file cleanup (24h+)")
+    print("  GET /debug_bundle/<session_id> - Stream session screenshots/downloads as ZIP")
+    print("  POST /cleanup - Manually trigger file cleanup (expired files)")
+    print("  GET /jobs/<id> - Background job status (send \"async\": true to long endpoints)")
     print("  GET /health - Health check")
     print("=" * 50)
     print("🔗 Starting server on http://0.0.0.0:5010")
-    print("🗑️ Starting background cleanup task (runs every hour)")
+    print(f"🗑️ Starting background cleanup task (expired files every {FILE_CLEANUP_INTERVAL // 60} min, "
+          f"sessions/jobs hourly, full file scan every {FILE_RECONCILE_INTERVAL // 3600}h)")
     print("🔄 Starting session refresh task (checks every minute)")
     
     # Start background cleanup thread
@@ -9659,10 +11039,24 @@ if __name__ == '__main__':
     refresh_thread = threading.Thread(target=periodic_session_refresh, daemon=True)
     refresh_thread.start()
     
+    # Start warm browser pool refill thread
+    if WARM_POOL_SIZE > 0:
+        print(f"♨️ Starting warm browser pool (size {WARM_POOL_SIZE})")
+        warm_pool_thread = threading.Thread(target=warm_driver_pool.run, daemon=True)
+        warm_pool_thread.start()
+    
     # Run initial cleanup on startup
     print("🗑️ Running initial cleanup...")
     cleanup_old_files()
     
+    # Decode screenshot overlays and fonts once (media workers preload their own copy)
+    screenshot_annotator.preload_assets()
+    
+    # Probe Tesseract once; booking number OCR reuses the cached answer
+    ocr_ok, ocr_error = booking_ocr.tesseract_available()
+    if not ocr_ok:
+        print(f"⚠️ Tesseract OCR not available (image-based booking lookup disabled): {ocr_error}")
+    
     print("=" * 50)
     
     app.run(
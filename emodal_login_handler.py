@@ -50,6 +50,7 @@ except ImportError:
     uc = None
 
 from recaptcha_handler import RecaptchaHandler, RecaptchaError
+from step_metrics import metrics
 
 # Linux Xvfb support for non-GUI servers
 try:
@@ -113,6 +114,7 @@ class EModalLoginHandler:
         self.wait = None
         self.recaptcha_handler = None
         self.display = None  # Xvfb display for Linux
+        self.prewarmed = False  # Driver already launched with login page loaded
         
         # Proxy configuration with authentication
         self.proxy_username = "mo3li_moQef"
@@ -236,6 +238,7 @@ chrome.webRequest.onAuthRequired.addListener(
             print(f"⚠️  Failed to create proxy extension: {e}")
             return None
     
+    @metrics.timed("login_setup_driver")
     def _setup_driver(self) -> None:
         """Setup Chrome WebDriver with optimal configuration and Xvfb support for Linux"""
         
@@ -504,6 +507,7 @@ chrome.webRequest.onAuthRequired.addListener(
         self.recaptcha_handler = RecaptchaHandler(self.captcha_api_key, self.timeout)
         self.recaptcha_handler.set_driver(self.driver)
     
+    @metrics.timed("login_dismiss_popups")
     def _dismiss_all_popups(self) -> None:
         """Dismiss all possible popups, alerts, and notifications"""
         try:
@@ -588,6 +592,7 @@ chrome.webRequest.onAuthRequired.addListener(
         except Exception as e:
             print(f"⚠️ Error in popup dismissal: {e}")
     
+    @metrics.timed("login_vpn_check")
     def _check_vpn_status(self) -> LoginResult:
         """Check if VPN is working (no 403 errors)"""
         try:
@@ -617,6 +622,7 @@ chrome.webRequest.onAuthRequired.addListener(
                 error_message=f"Network error during page load: {str(e)}"
             )
     
+    @metrics.timed("login_fill_credentials")
     def _fill_credentials(self, username: str, password: str) -> LoginResult:
         """Fill username and password fields"""
         try:
@@ -657,6 +663,7 @@ chrome.webRequest.onAuthRequired.addListener(
                 error_message=f"Error filling credentials: {str(e)}"
             )
     
+    @metrics.timed("login_locate_button")
     def _locate_login_button(self) -> tuple:
         """
         Locate LOGIN button before starting reCAPTCHA to prevent timeouts
@@ -717,6 +724,7 @@ chrome.webRequest.onAuthRequired.addListener(
             print(f"❌ LOGIN button search failed with exception: {str(e)}")
             return False, f"LOGIN button search error: {str(e)}"
     
+    @metrics.timed("captcha_solve")
     def _handle_recaptcha(self) -> LoginResult:
         """Handle reCAPTCHA challenge with comprehensive error handling"""
         try:
@@ -748,6 +756,7 @@ chrome.webRequest.onAuthRequired.addListener(
                 error_message=f"Unexpected reCAPTCHA error: {str(e)}"
             )
     
+    @metrics.timed("login_click")
     def _click_login_button(self, login_button) -> LoginResult:
         """Click the pre-located LOGIN button"""
         try:
@@ -784,6 +793,7 @@ chrome.webRequest.onAuthRequired.addListener(
             # No alert present
             pass
     
+    @metrics.timed("login_analyze_result")
     def _analyze_final_result(self) -> LoginResult:
         """Analyze final page to determine login success/failure"""
         try:
@@ -902,6 +912,36 @@ chrome.webRequest.onAuthRequired.addListener(
                 error_message=f"Error analyzing result: {str(e)}"
             )
     
+    @metrics.timed("login_prewarm")
+    def prewarm(self) -> LoginResult:
+        """
+        Launch the browser and load the login page without authenticating.
+        
+        A later call to login() reuses this driver and skips the browser
+        setup and VPN check steps.
+        
+        Returns:
+            LoginResult: success if the login page loaded without restrictions
+        """
+        try:
+            self._setup_driver()
+            vpn_result = self._check_vpn_status()
+            self.prewarmed = vpn_result.success
+            return vpn_result
+        except Exception as e:
+            return LoginResult(
+                success=False,
+                error_type=LoginErrorType.UNKNOWN_ERROR,
+                error_message=f"Error pre-warming browser: {str(e)}"
+            )
+    
+    def set_captcha_api_key(self, captcha_api_key: str) -> None:
+        """Update the 2captcha API key (used when a pre-warmed driver is handed to a user)"""
+        self.captcha_api_key = captcha_api_key
+        if self.recaptcha_handler:
+            self.recaptcha_handler.api_key = captcha_api_key
+    
+    @metrics.timed("login_total")
     def login(self, username: str, password: str) -> LoginResult:
         """
         Main login function - API entry point
@@ -916,16 +956,24 @@ chrome.webRequest.onAuthRequired.addListener(
         try:
             print(f"🚀 Starting E-Modal login for user: {username}")
             
-            # Step 1: Setup WebDriver
-            print("🌐 Initializing browser...")
-            self._setup_driver()
-            
-            # Step 2: Check VPN/Access
-            print("🔍 Checking VPN status...")
-            vpn_result = self._check_vpn_status()
-            if not vpn_result.success:
-                return vpn_result
-            print("✅ VPN/Access OK")
+            if self.prewarmed and self.driver:
+                # Steps 1-2 already done by prewarm(); reload only if we drifted off the login page
+                print("♨️ Using pre-warmed browser")
+                if "login" not in (self.driver.current_url or "").lower():
+                    vpn_result = self._check_vpn_status()
+                    if not vpn_result.success:
+                        return vpn_result
+            else:
+                # Step 1: Setup WebDriver
+                print("🌐 Initializing browser...")
+                self._setup_driver()
+                
+                # Step 2: Check VPN/Access
+                print("🔍 Checking VPN status...")
+                vpn_result = self._check_vpn_status()
+                if not vpn_result.success:
+                    return vpn_result
+                print("✅ VPN/Access OK")
             
             # Step 3: Fill credentials
             print("📝 Filling credentials...")
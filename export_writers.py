@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Export Writers
+==============
+
+Streaming writers for scraped container rows (no pandas):
+- xlsx: openpyxl write-only mode (rows go straight to the sheet XML, no cell
+  objects kept); column widths computed in the same pass that reads the rows
+- csv: UTF-8 with BOM so Excel opens it with the right encoding
+- jsonl: one JSON object per row, keys in column order
+- parquet: all-string columns written in row-group batches (needs pyarrow)
+- Format picked explicitly or from the file extension
+"""
+
+import os
+import csv
+import json
+import itertools
+from typing import Iterable, List, Optional
+
+
+EXPORT_FORMATS = ("xlsx", "csv", "jsonl", "parquet")
+
+MIMETYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+MAX_COLUMN_WIDTH = 50
+PARQUET_BATCH_ROWS = 5000
+
+
+def normalize_format(fmt: Optional[str], default: str = "xlsx") -> str:
+    """
+    Canonical export format name ("excel" -> "xlsx", "ndjson" -> "jsonl").
+
+    Raises:
+        ValueError: If the format is not supported
+    """
+    fmt = (fmt or default).strip().lower().lstrip(".")
+    fmt = {"excel": "xlsx", "ndjson": "jsonl", "json_lines": "jsonl"}.get(fmt, fmt)
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format '{fmt}' (use one of: {', '.join(EXPORT_FORMATS)})")
+    return fmt
+
+
+def ensure_available(fmt: str) -> None:
+    """
+    Check that the libraries a format needs are installed.
+
+    Raises:
+        ValueError: If they are not (e.g. parquet without pyarrow)
+    """
+    if normalize_format(fmt) == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ValueError("Parquet export requires pyarrow (pip install pyarrow)")
+
+
+def format_for_path(path: str) -> str:
+    """Export format from a file extension"""
+    return normalize_format(os.path.splitext(path)[1])
+
+
+def _values(row: dict, columns: List[str]) -> List[str]:
+    return [str(row.get(col, '') or '') for col in columns]
+
+
+def write_xlsx(rows: Iterable[dict], path: str, columns: List[str]) -> int:
+    """
+    Write rows to a formatted Excel sheet in openpyxl write-only mode.
+
+    Write-only sheets need column widths before the first row, so the single pass over
+    `rows` keeps only compact value lists and widths; the sheet is then streamed out
+    without building cell objects.
+
+    Returns:
+        Number of data rows written
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, Alignment, PatternFill
+    from openpyxl.utils import get_column_letter
+
+    widths = [len(col) for col in columns]
+    values_list = []
+    for row in rows:
+        values = _values(row, columns)
+        for idx, value in enumerate(values):
+            if len(value) > widths[idx]:
+                widths[idx] = len(value)
+        values_list.append(values)
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(title='Containers')
+    for idx, width in enumerate(widths, 1):
+        worksheet.column_dimensions[get_column_letter(idx)].width = min(width + 2, MAX_COLUMN_WIDTH)
+
+    header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
+    header_font = Font(color='FFFFFF', bold=True)
+    header_alignment = Alignment(horizontal='center', vertical='center')
+    header = []
+    for col in columns:
+        cell = WriteOnlyCell(worksheet, value=col)
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.alignment = header_alignment
+        header.append(cell)
+    worksheet.append(header)
+
+    for values in values_list:
+        worksheet.append(values)
+    workbook.save(path)
+    return len(values_list)
+
+
+def write_csv(rows: Iterable[dict], path: str, columns: List[str]) -> int:
+    """Write rows as CSV with a header row; returns the number of data rows"""
+    count = 0
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow(_values(row, columns))
+            count += 1
+    return count
+
+
+def write_jsonl(rows: Iterable[dict], path: str, columns: List[str]) -> int:
+    """Write rows as JSON lines (one object per row); returns the number of rows"""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(dict(zip(columns, _values(row, columns))), ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def write_parquet(rows: Iterable[dict], path: str, columns: List[str],
+                  batch_rows: int = PARQUET_BATCH_ROWS) -> int:
+    """
+    Write rows as Parquet (string columns), one row group per batch_rows rows.
+
+    Raises:
+        RuntimeError: If pyarrow is not installed
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+
+    schema = pa.schema([(col, pa.string()) for col in columns])
+    count = 0
+    rows = iter(rows)
+    with pq.ParquetWriter(path, schema) as writer:
+        while True:
+            batch = list(itertools.islice(rows, batch_rows))
+            if not batch and count:
+                break
+            data = {col: [] for col in columns}
+            for row in batch:
+                for col, value in zip(columns, _values(row, columns)):
+                    data[col].append(value)
+            writer.write_table(pa.table(data, schema=schema))
+            count += len(batch)
+            if len(batch) < batch_rows:
+                break
+    return count
+
+
+WRITERS = {
+    "xlsx": write_xlsx,
+    "csv": write_csv,
+    "jsonl": write_jsonl,
+    "parquet": write_parquet,
+}
+
+
+def write_rows(rows: Iterable[dict], path: str, columns: List[str], fmt: Optional[str] = None) -> int:
+    """
+    Write container rows in the requested format.
+
+    Args:
+        rows: Iterable of row dicts (consumed once)
+        path: Destination file
+        columns: Column order
+        fmt: Export format (default: from the file extension)
+
+    Returns:
+        Number of data rows written
+    """
+    fmt = normalize_format(fmt) if fmt else format_for_path(path)
+    return WRITERS[fmt](rows, path, columns)
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+File Registry
+=============
+
+In-memory index of every artifact the API produces (Excel exports, debug
+bundles, screenshots, debug text dumps):
+- Records path, size, mtime, category, owner session and expiry at write time
+- O(1) lookup by /files URL path ("<session_id>/<file>") or by bare file name;
+  only files under the first root (downloads/) are served, later roots
+  (screenshots/) are tracked for retention and quotas under their own key
+  namespace ("screenshots:<session_id>/<file>")
+- Strong ETag from size + mtime for conditional and Range requests
+- Per-category TTLs and a time-ordered expiry heap (cleanup pops what expired)
+- Running byte totals overall, per session and per user (no directory walks)
+- Last-access tracking for least-recently-used eviction
+- One directory scan at startup picks up files written before a restart
+"""
+
+import os
+import time
+import heapq
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Optional, Dict, List, Tuple
+
+
+DEFAULT_TTL_SECONDS = 24 * 60 * 60  # Matches the 24h retention rule
+
+# Files never registered (in-progress writes)
+SKIPPED_SUFFIXES = ('.tmp', '.part', '.crdownload')
+
+
+def category_for(path: str) -> str:
+    """Artifact category from the file name"""
+    name = os.path.basename(path).lower()
+    if name.endswith('.zip'):
+        return "bundle"
+    if name.endswith(('.xlsx', '.xls', '.csv', '.jsonl', '.parquet')):
+        return "export"
+    if name.endswith(('.png', '.jpg', '.jpeg')):
+        return "screenshot"
+    if name.endswith(('.txt', '.log', '.gz')):
+        return "debug"
+    return "download"
+
+
+@dataclass
+class FileRecord:
+    """Registered artifact"""
+    key: str                  # URL path under /files, e.g. "<session_id>/containers.xlsx"
+                              # ("<root name>:<relative path>" for files outside the served root)
+    path: str                 # Absolute file path
+    size: int
+    mtime: float
+    category: str
+    session_id: Optional[str]
+    expires_at: float
+    user: Optional[str] = None
+    last_access: float = 0.0  # Registration or last /files download
+
+    @property
+    def etag(self) -> str:
+        """Unquoted strong ETag (changes whenever the file is rewritten)"""
+        return f"{int(self.mtime * 1000):x}-{self.size:x}"
+
+
+class FileRegistry:
+    """
+    Thread-safe artifact index keyed by URL path and file name.
+    """
+
+    def __init__(self, roots: List[str], ttl_seconds: int = DEFAULT_TTL_SECONDS,
+                 category_ttls: Dict[str, int] = None):
+        """
+        Initialize file registry
+
+        Args:
+            roots (list): Directories artifacts live under; keys are paths relative to these.
+                The first root is the one /files serves; keys under later roots are
+                prefixed with "<root name>:" so equal relative paths never collide
+            ttl_seconds (int): Default lifetime of a registered file
+            category_ttls (dict): Lifetime per category (overrides ttl_seconds)
+        """
+        self.roots = [os.path.abspath(r) for r in roots]
+        self.ttl_seconds = ttl_seconds
+        self.category_ttls = dict(category_ttls or {})
+        self._by_key: Dict[str, FileRecord] = {}
+        self._by_name: Dict[str, FileRecord] = {}
+        self._heap: List[Tuple[float, str]] = []  # (expires_at, key); stale entries skipped on pop
+        self._total_bytes = 0
+        self._session_bytes: Dict[str, int] = defaultdict(int)
+        self._user_bytes: Dict[str, int] = defaultdict(int)
+        self._session_users: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def ttl_for(self, category: str) -> int:
+        """Lifetime in seconds for a category"""
+        return self.category_ttls.get(category, self.ttl_seconds)
+
+    def _locate(self, path: str) -> Tuple[Optional[int], Optional[str]]:
+        # (root index, path relative to that root)
+        for index, root in enumerate(self.roots):
+            if path == root or not path.startswith(root + os.sep):
+                continue
+            return index, os.path.relpath(path, root).replace(os.sep, "/")
+        return None, None
+
+    def _key_for(self, path: str) -> Optional[str]:
+        index, relative = self._locate(path)
+        if relative is None:
+            return None
+        if index == 0:
+            return relative
+        return f"{os.path.basename(self.roots[index])}:{relative}"
+
+    def is_served(self, record: FileRecord) -> bool:
+        """True if the record lives under the served (first) root"""
+        return record.path.startswith(self.roots[0] + os.sep)
+
+    def register(self, path: str, session_id: str = None, category: str = None,
+                 ttl_seconds: int = None) -> Optional[FileRecord]:
+        """
+        Record a freshly written file (re-registering refreshes size, mtime and expiry).
+
+        Args:
+            path: File path (must be under one of the registry roots)
+            session_id: Owning browser session (default: first path component)
+            category: Artifact category (default: derived from the extension)
+            ttl_seconds: Lifetime (default: registry TTL)
+
+        Returns:
+            FileRecord, or None if the file is missing or outside the roots
+        """
+        path = os.path.abspath(path)
+        key = self._key_for(path)
+        if key is None or path.endswith(SKIPPED_SUFFIXES):
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        relative = self._locate(path)[1]
+        if session_id is None and "/" in relative:
+            session_id = relative.split("/", 1)[0]
+        category = category or category_for(path)
+        ttl = self.ttl_for(category) if ttl_seconds is None else ttl_seconds
+        record = FileRecord(
+            key=key,
+            path=path,
+            size=st.st_size,
+            mtime=st.st_mtime,
+            category=category,
+            session_id=session_id,
+            expires_at=st.st_mtime + ttl
+        )
+        with self._lock:
+            previous = self._by_key.get(key)
+            if previous is not None:
+                self._account(previous, -1)
+            record.user = self._session_users.get(session_id) if session_id else None
+            record.last_access = time.time()
+            self._by_key[key] = record
+            if self.is_served(record):
+                self._by_name[os.path.basename(path)] = record
+            self._account(record, 1)
+            self._schedule(record)
+        return record
+
+    def _account(self, record: FileRecord, sign: int) -> None:
+        # Caller holds the lock
+        self._total_bytes += sign * record.size
+        for totals, owner in ((self._session_bytes, record.session_id), (self._user_bytes, record.user)):
+            if owner:
+                totals[owner] += sign * record.size
+                if totals[owner] <= 0:
+                    del totals[owner]
+
+    def set_session_owner(self, session_id: str, user: str) -> None:
+        """Attribute a session's files (existing and future) to a user"""
+        if not session_id or not user:
+            return
+        with self._lock:
+            if self._session_users.get(session_id) == user:
+                return
+            self._session_users[session_id] = user
+            for record in self._by_key.values():
+                if record.session_id == session_id and record.user != user:
+                    self._account(record, -1)
+                    record.user = user
+                    self._account(record, 1)
+
+    def _schedule(self, record: FileRecord) -> None:
+        # Caller holds the lock
+        heapq.heappush(self._heap, (record.expires_at, record.key))
+        if len(self._heap) > 2 * len(self._by_key) + 1024:
+            # Too many stale entries from re-registrations: rebuild
+            self._heap = [(r.expires_at, r.key) for r in self._by_key.values()]
+            heapq.heapify(self._heap)
+
+    def unregister(self, path: str) -> Optional[FileRecord]:
+        """Forget a file (call after deleting it)"""
+        key = self._key_for(os.path.abspath(path))
+        if key is None:
+            return None
+        with self._lock:
+            record = self._by_key.pop(key, None)
+            if record is not None:
+                self._account(record, -1)
+                if self._by_name.get(os.path.basename(record.path)) is record:
+                    del self._by_name[os.path.basename(record.path)]
+        return record
+
+    def expired(self, now: float, limit: int) -> List[FileRecord]:
+        """
+        Pop up to `limit` records whose expiry has passed, oldest expiry first.
+
+        Popped records stay registered until unregister(); use defer() if deleting fails.
+        """
+        due = []
+        with self._lock:
+            while self._heap and len(due) < limit and self._heap[0][0] <= now:
+                expires_at, key = heapq.heappop(self._heap)
+                record = self._by_key.get(key)
+                if record is not None and record.expires_at == expires_at:
+                    due.append(record)
+        return due
+
+    def defer(self, record: FileRecord, seconds: float, now: float) -> None:
+        """Retry expiry of a record later (e.g. its file could not be deleted)"""
+        with self._lock:
+            if self._by_key.get(record.key) is record:
+                record.expires_at = now + seconds
+                self._schedule(record)
+
+    def least_recently_used(self, limit: int, session_id: str = None, user: str = None,
+                            exclude: set = None) -> List[FileRecord]:
+        """
+        Up to `limit` records, least recently used first (quota eviction order).
+
+        Args:
+            session_id: Only this session's files
+            user: Only this user's files
+            exclude: Keys never returned (e.g. the file just written)
+        """
+        candidates = [
+            r for r in self.records()
+            if (session_id is None or r.session_id == session_id)
+            and (user is None or r.user == user)
+            and not (exclude and r.key in exclude)
+        ]
+        return heapq.nsmallest(limit, candidates, key=lambda r: r.last_access)
+
+    def total_bytes(self, session_id: str = None, user: str = None) -> int:
+        """Bytes of all registered files, or of one session's / user's files"""
+        with self._lock:
+            if session_id is not None:
+                return self._session_bytes.get(session_id, 0)
+            if user is not None:
+                return self._user_bytes.get(user, 0)
+            return self._total_bytes
+
+    def top_owners(self, limit: int = 10) -> Dict[str, Dict[str, int]]:
+        """Largest sessions and users by bytes"""
+        with self._lock:
+            sessions = sorted(self._session_bytes.items(), key=lambda kv: kv[1], reverse=True)[:limit]
+            users = sorted(self._user_bytes.items(), key=lambda kv: kv[1], reverse=True)[:limit]
+        return {"sessions": dict(sessions), "users": dict(users)}
+
+    def lookup(self, name: str) -> Optional[FileRecord]:
+        """
+        Resolve a /files path: exact URL path first, then bare file name.
+
+        Only files under the served root are returned. Records whose file has
+        disappeared or changed on disk are dropped or refreshed.
+        """
+        name = name.replace("\\", "/").strip("/")
+        with self._lock:
+            record = self._by_key.get(name)
+            if record is None and "/" not in name:
+                record = self._by_name.get(name)
+        if record is None or not self.is_served(record):
+            return None
+        try:
+            st = os.stat(record.path)
+        except OSError:
+            self.unregister(record.path)
+            return None
+        if st.st_size != record.size or st.st_mtime != record.mtime:
+            return self.register(record.path, record.session_id, record.category,
+                                 int(record.expires_at - record.mtime))
+        record.last_access = time.time()
+        return record
+
+    def index_directory(self, root: str) -> int:
+        """Register every file below a directory (startup scan); returns the number indexed"""
+        count = 0
+        for dirpath, _, files in os.walk(root):
+            for f in files:
+                if self.register(os.path.join(dirpath, f)) is not None:
+                    count += 1
+        return count
+
+    def index_unknown(self, root: str) -> int:
+        """Register files below a directory that are not in the registry yet; returns the number added"""
+        with self._lock:
+            known = {r.path for r in self._by_key.values()}
+        count = 0
+        for dirpath, _, files in os.walk(root):
+            for f in files:
+                path = os.path.abspath(os.path.join(dirpath, f))
+                if path not in known and self.register(path) is not None:
+                    count += 1
+        return count
+
+    def records(self) -> List[FileRecord]:
+        """Snapshot of all records"""
+        with self._lock:
+            return list(self._by_key.values())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._by_key)
+
+    def stats(self) -> Dict[str, int]:
+        """File count and bytes per category"""
+        summary: Dict[str, int] = {"files": 0, "bytes": 0}
+        for record in self.records():
+            summary["files"] += 1
+            summary["bytes"] += record.size
+            summary[f"{record.category}_bytes"] = summary.get(f"{record.category}_bytes", 0) + record.size
+        return summary
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Background Job Manager
+======================
+
+Local job store for long-running API operations with:
+- Bounded worker pool (no external queue required)
+- In-memory job records with progress updates
+- Thread-local progress reporting from deep inside operations (jobs or listeners)
+- Automatic expiry of finished jobs
+"""
+
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional, Dict, Any, Callable
+
+
+class JobStatus:
+    """Job lifecycle states"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+@dataclass
+class Job:
+    """A single background operation"""
+    job_id: str
+    endpoint: str
+    status: str = JobStatus.QUEUED
+    created_at: datetime = field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    progress: Dict[str, Any] = field(default_factory=dict)
+    result: Optional[Dict[str, Any]] = None
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+
+    def is_finished(self) -> bool:
+        """Check if the job has completed or failed"""
+        return self.status in (JobStatus.COMPLETED, JobStatus.FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable view of the job"""
+        return {
+            "job_id": self.job_id,
+            "endpoint": self.endpoint,
+            "status": self.status,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "progress": dict(self.progress),
+            "result": self.result,
+            "status_code": self.status_code,
+            "error": self.error
+        }
+
+
+# Job bound to the current worker thread (used by report_progress)
+_current = threading.local()
+
+
+def current_job() -> Optional[Job]:
+    """Job running on this thread, or None for regular synchronous requests"""
+    return getattr(_current, 'job', None)
+
+
+def set_progress_listener(listener: Optional[Callable[[Dict[str, Any]], None]]) -> None:
+    """Also pass this thread's progress updates to listener (e.g. a streamed response); None removes it"""
+    _current.listener = listener
+
+
+def report_progress(**fields) -> None:
+    """
+    Merge progress fields into the job running on this thread.
+
+    Safe to call from anywhere: does nothing outside a background job
+    (or without a progress listener).
+
+    Example:
+        report_progress(phase="scrolling", scroll_cycles=12, containers_loaded=340)
+    """
+    job = current_job()
+    if job is not None:
+        job.progress.update(fields)
+        job.progress["updated_at"] = datetime.now().isoformat()
+    listener = getattr(_current, 'listener', None)
+    if listener is not None:
+        try:
+            listener(fields)
+        except Exception:
+            pass
+
+
+class JobManager:
+    """
+    Runs callables on a bounded thread pool and tracks their state.
+    """
+
+    def __init__(self, max_workers: int, job_ttl: int = 3600):
+        """
+        Initialize job manager
+
+        Args:
+            max_workers (int): Maximum jobs running at once (others wait queued)
+            job_ttl (int): Seconds to keep finished jobs before expiring them
+        """
+        self.max_workers = max_workers
+        self.job_ttl = job_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, endpoint: str, func: Callable[[], tuple]) -> Job:
+        """
+        Queue a job.
+
+        Args:
+            endpoint (str): Name of the operation (for reporting)
+            func: Callable returning (result_dict, status_code)
+
+        Returns:
+            Job: The queued job record
+        """
+        job = Job(job_id=f"job_{uuid.uuid4().hex[:16]}", endpoint=endpoint)
+        with self._lock:
+            self._jobs[job.job_id] = job
+        self._executor.submit(self._run, job, func)
+        return job
+
+    def try_submit(self, endpoint: str, func: Callable[[], tuple], max_active: int = None) -> Optional[Job]:
+        """
+        Queue a job only if fewer than max_active jobs are queued or running.
+
+        Args:
+            endpoint (str): Name of the operation (for reporting)
+            func: Callable returning (result_dict, status_code)
+            max_active (int): Limit on unfinished jobs (default: max_workers, i.e. never queue)
+
+        Returns:
+            Job, or None if the pool is full (caller should answer 503)
+        """
+        limit = self.max_workers if max_active is None else max_active
+        job = Job(job_id=f"job_{uuid.uuid4().hex[:16]}", endpoint=endpoint)
+        with self._lock:
+            active = sum(1 for j in self._jobs.values() if not j.is_finished())
+            if active >= limit:
+                return None
+            self._jobs[job.job_id] = job
+        self._executor.submit(self._run, job, func)
+        return job
+
+    def _run(self, job: Job, func: Callable[[], tuple]) -> None:
+        """Worker body: execute func with the job bound to this thread"""
+        _current.job = job
+        job.status = JobStatus.RUNNING
+        job.started_at = datetime.now()
+        try:
+            result, status_code = func()
+            job.result = result
+            job.status_code = status_code
+            job.status = JobStatus.COMPLETED if status_code < 400 else JobStatus.FAILED
+            if job.status == JobStatus.FAILED and isinstance(result, dict):
+                job.error = result.get("error")
+        except Exception as e:
+            job.status = JobStatus.FAILED
+            job.status_code = 500
+            job.error = str(e)
+        finally:
+            job.finished_at = datetime.now()
+            _current.job = None
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job by ID"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self) -> list:
+        """Snapshot of all known jobs"""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def active_count(self) -> int:
+        """Number of queued or running jobs"""
+        return sum(1 for job in self.list_jobs() if not job.is_finished())
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status"""
+        counts = {}
+        for job in self.list_jobs():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+
+    def cleanup_expired(self) -> int:
+        """
+        Forget finished jobs older than job_ttl.
+
+        Returns:
+            int: Number of jobs removed
+        """
+        now = datetime.now()
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.is_finished() and job.finished_at
+                and (now - job.finished_at).total_seconds() > self.job_ttl
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+        return len(expired)
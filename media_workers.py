@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Media Worker Pool
+=================
+
+Shared process pool for CPU-bound image work (screenshot annotation, OCR) with:
+- Futures so browser automation continues while images are processed
+- Bounded number of in-flight tasks (submit blocks when full = backpressure)
+- Lazy start with the "spawn" start method (safe next to Selenium threads)
+- Inline fallback when workers are disabled (size 0) or the pool cannot start
+"""
+
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional, Callable
+
+
+class MediaWorkerPool:
+    """
+    Bounded process pool returning futures.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int = 32, initializer: Optional[Callable] = None):
+        """
+        Initialize media worker pool
+
+        Args:
+            max_workers (int): Worker processes (0 runs tasks inline on the caller's thread)
+            max_pending (int): Tasks queued or running before submit() blocks
+            initializer: Optional picklable callable run once in each worker (e.g. asset preloading)
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.initializer = initializer
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.max_workers <= 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                try:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=self.initializer
+                    )
+                except Exception as e:
+                    print(f"⚠️ Media worker pool unavailable, processing inline: {e}")
+                    self.max_workers = 0
+            return self._executor
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """
+        Run func(*args, **kwargs) in a worker process (func and arguments must be picklable).
+
+        Blocks while max_pending tasks are already in flight.
+
+        Returns:
+            Future with the function result
+        """
+        executor = self._get_executor()
+        if executor is None:
+            return self._run_inline(func, *args, **kwargs)
+
+        self._slots.acquire()
+        with self._lock:
+            self._pending += 1
+        try:
+            future = executor.submit(func, *args, **kwargs)
+        except Exception:
+            self._release_slot()
+            return self._run_inline(func, *args, **kwargs)
+        future.add_done_callback(lambda _: self._release_slot())
+        return future
+
+    def _release_slot(self) -> None:
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    @staticmethod
+    def _run_inline(func: Callable, *args, **kwargs) -> Future:
+        future = Future()
+        try:
+            future.set_result(func(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def pending(self) -> int:
+        """Tasks queued or running"""
+        with self._lock:
+            return self._pending
+
+    def shutdown(self) -> None:
+        """Stop worker processes (pending tasks finish first)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True)
@@ -22,6 +22,8 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import urllib.request
 
+from step_metrics import metrics
+
 
 class RecaptchaError(Exception):
     """Custom exception for reCAPTCHA-related errors"""
@@ -51,6 +53,7 @@ class RecaptchaHandler:
         self.driver = driver
         self.wait = WebDriverWait(driver, self.timeout)
     
+    @metrics.timed("captcha_2captcha_audio")
     def solve_audio_with_2captcha(self, audio_url):
         """
         Solve audio reCAPTCHA using 2captcha service
@@ -144,6 +147,7 @@ class RecaptchaHandler:
         except Exception as e:
             raise RecaptchaError(f"Audio solving failed: {str(e)}")
     
+    @metrics.timed("captcha_challenge")
     def handle_recaptcha_challenge(self):
         """
         Handle complete reCAPTCHA challenge flow with fallback
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Retention Manager
+=================
+
+Deletes expired artifacts from the file registry's expiry index:
+- Per-category TTLs (exports, bundles, screenshots, debug dumps)
+- Small delete batches with a pause between them (no long I/O bursts)
+- Optional disk quota: evicts least recently used files until usage is back under target
+  (overall, or scoped to one session / user)
+- Cost follows what expires, not how many files exist; a rare reconcile walk
+  picks up files written outside the registry and stale in-progress files
+"""
+
+import os
+import time
+from typing import Dict, Optional
+
+from file_registry import FileRegistry, FileRecord, SKIPPED_SUFFIXES
+
+
+class RetentionManager:
+    """
+    Incremental, index-driven file cleanup.
+    """
+
+    def __init__(self, registry: FileRegistry, batch_size: int = 200, batch_pause: float = 0.05,
+                 quota_bytes: int = 0, quota_target: float = 0.9, retry_seconds: int = 3600):
+        """
+        Initialize retention manager
+
+        Args:
+            registry (FileRegistry): Artifact index (its roots are the managed directories)
+            batch_size (int): Files deleted per batch
+            batch_pause (float): Seconds to sleep between batches
+            quota_bytes (int): Maximum bytes across all roots (0 = no quota)
+            quota_target (float): Fraction of the quota to evict down to once it is exceeded
+            retry_seconds (int): Delay before retrying a file that could not be deleted
+        """
+        self.registry = registry
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.quota_bytes = quota_bytes
+        self.quota_target = quota_target
+        self.retry_seconds = retry_seconds
+
+    def _delete(self, record: FileRecord, now: float, touched_dirs: set) -> bool:
+        try:
+            os.remove(record.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"⚠️ Failed to delete {record.path}: {e}")
+            self.registry.defer(record, self.retry_seconds, now)
+            return False
+        self.registry.unregister(record.path)
+        touched_dirs.add(os.path.dirname(record.path))
+        return True
+
+    def _remove_empty_dirs(self, dirs: set) -> None:
+        roots = set(self.registry.roots)
+        for d in sorted(dirs, key=len, reverse=True):
+            if d in roots:
+                continue
+            try:
+                if not os.listdir(d):
+                    os.rmdir(d)
+            except OSError:
+                pass
+
+    def run_once(self, now: Optional[float] = None) -> Dict[str, int]:
+        """
+        Delete everything that has expired, then enforce the quota.
+
+        Returns:
+            Dict with deleted (expired), evicted (quota) and bytes_freed
+        """
+        now = time.time() if now is None else now
+        result = {"deleted": 0, "evicted": 0, "bytes_freed": 0}
+        touched_dirs: set = set()
+
+        while True:
+            batch = self.registry.expired(now, self.batch_size)
+            for record in batch:
+                if self._delete(record, now, touched_dirs):
+                    result["deleted"] += 1
+                    result["bytes_freed"] += record.size
+            if len(batch) < self.batch_size:
+                break
+            time.sleep(self.batch_pause)
+
+        if self.quota_bytes:
+            evicted, freed = self.evict_to(int(self.quota_bytes * self.quota_target), now, touched_dirs,
+                                           only_if_over=self.quota_bytes)
+            result["evicted"] += evicted
+            result["bytes_freed"] += freed
+
+        self._remove_empty_dirs(touched_dirs)
+        return result
+
+    def evict_to(self, target_bytes: int, now: Optional[float] = None, touched_dirs: set = None,
+                 only_if_over: int = None, session_id: str = None, user: str = None, exclude: set = None):
+        """
+        Delete least recently used files until registered usage is at most target_bytes.
+
+        Args:
+            target_bytes: Usage to evict down to
+            only_if_over: Do nothing unless usage exceeds this (default: target_bytes)
+            session_id: Measure and evict only this session's files
+            user: Measure and evict only this user's files
+            exclude: Registry keys never evicted (e.g. the file just written)
+
+        Returns:
+            (files evicted, bytes freed)
+        """
+        now = time.time() if now is None else now
+        own_dirs = touched_dirs is None
+        touched_dirs = set() if touched_dirs is None else touched_dirs
+        threshold = target_bytes if only_if_over is None else only_if_over
+
+        def usage() -> int:
+            return self.registry.total_bytes(session_id=session_id, user=user)
+
+        if usage() <= threshold:
+            return 0, 0
+
+        evicted = freed = 0
+        while usage() > target_bytes:
+            batch = self.registry.least_recently_used(self.batch_size, session_id=session_id, user=user,
+                                                      exclude=exclude)
+            if not batch:
+                break
+            deleted_before = evicted
+            for record in batch:
+                if usage() <= target_bytes:
+                    break
+                if self._delete(record, now, touched_dirs):
+                    evicted += 1
+                    freed += record.size
+            if evicted == deleted_before:
+                break  # Nothing deletable left
+            time.sleep(self.batch_pause)
+
+        if evicted:
+            scope = f"session {session_id}" if session_id else f"user {user}" if user else "all files"
+            print(f"🗑️ Quota ({scope}): evicted {evicted} least recently used files ({freed / (1024 * 1024):.2f} MB)")
+        if own_dirs:
+            self._remove_empty_dirs(touched_dirs)
+        return evicted, freed
+
+    def reconcile(self, stale_seconds: Optional[int] = None) -> Dict[str, int]:
+        """
+        Full walk of the managed roots (run rarely): register files written outside the
+        registry and remove abandoned in-progress files (.tmp/.part) older than stale_seconds.
+
+        Returns:
+            Dict with registered and stale_removed counts
+        """
+        stale_seconds = self.registry.ttl_seconds if stale_seconds is None else stale_seconds
+        cutoff = time.time() - stale_seconds
+        result = {"registered": 0, "stale_removed": 0}
+        for root in self.registry.roots:
+            result["registered"] += self.registry.index_unknown(root)
+            for dirpath, _, files in os.walk(root):
+                for f in files:
+                    if not f.endswith(SKIPPED_SUFFIXES):
+                        continue
+                    fp = os.path.join(dirpath, f)
+                    try:
+                        if os.path.getmtime(fp) < cutoff:
+                            os.remove(fp)
+                            result["stale_removed"] += 1
+                    except OSError:
+                        pass
+        return result
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Row Stream
+==========
+
+NDJSON streaming of scraped rows to an HTTP client while the operation runs:
+- The endpoint runs on a worker thread; the response generator drains a queue
+- Event lines: {"type": "progress", ...}, {"type": "row", "row": {...}},
+  then exactly one {"type": "result", "status_code": ..., ...} line
+- Rows are forwarded the moment they are parsed (StreamingRowSink), once per
+  container ID; parsing starts after scrolling has finished, so until then the
+  stream carries only progress and heartbeat lines
+- Queued lines are coalesced into one chunk; heartbeat lines keep idle
+  connections (login, scrolling) from timing out
+- A disconnected client stops receiving; the operation still completes
+"""
+
+import json
+import queue
+import threading
+from typing import Any, Dict, Iterator, Optional
+
+
+_current = threading.local()
+
+
+def current_stream() -> Optional["RowStream"]:
+    """Row stream for the operation running on this thread, or None"""
+    return getattr(_current, 'stream', None)
+
+
+def set_current_stream(stream: Optional["RowStream"]) -> None:
+    """Attach a row stream to this thread (None detaches)"""
+    _current.stream = stream
+
+
+class RowStream:
+    """
+    Thread-safe queue of NDJSON events from an operation to a streamed response.
+    """
+
+    def __init__(self, heartbeat_seconds: float = 15, max_lines_per_chunk: int = 500):
+        """
+        Initialize row stream
+
+        Args:
+            heartbeat_seconds (float): Idle time before a heartbeat line is sent
+            max_lines_per_chunk (int): Queued lines joined into one response chunk
+        """
+        self.heartbeat_seconds = heartbeat_seconds
+        self.max_lines_per_chunk = max_lines_per_chunk
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self.closed = False
+        self.rows_sent = 0
+
+    def _put(self, event: Dict[str, Any]) -> None:
+        if not self.closed:
+            self._queue.put(event)
+
+    def put_row(self, row: Dict[str, Any]) -> None:
+        self.rows_sent += 1
+        self._put({"type": "row", "row": row})
+
+    def put_progress(self, fields: Dict[str, Any]) -> None:
+        self._put({"type": "progress", **fields})
+
+    def finish(self, result: Dict[str, Any], status_code: int = 200) -> None:
+        """Send the final result line (ends the response)"""
+        self._put({"type": "result", "status_code": status_code, **result})
+
+    @staticmethod
+    def _encode(event: Dict[str, Any]) -> str:
+        return json.dumps(event, ensure_ascii=False, default=str) + "\n"
+
+    def events(self) -> Iterator[bytes]:
+        """
+        Response body: NDJSON chunks until the result line has been sent.
+
+        Closing the generator (client disconnected) stops further queuing.
+        """
+        try:
+            while True:
+                try:
+                    event = self._queue.get(timeout=self.heartbeat_seconds)
+                except queue.Empty:
+                    yield self._encode({"type": "heartbeat"}).encode('utf-8')
+                    continue
+                lines = [self._encode(event)]
+                done = event["type"] == "result"
+                while not done and len(lines) < self.max_lines_per_chunk:
+                    try:
+                        event = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    lines.append(self._encode(event))
+                    done = event["type"] == "result"
+                yield "".join(lines).encode('utf-8')
+                if done:
+                    return
+        finally:
+            self.closed = True
+
+
+class StreamingRowSink(dict):
+    """
+    row_sink dict (container ID -> row) that also forwards each row to the row
+    stream of the thread that created it, if any.
+
+    The first row stored under a container ID wins: repeats are ignored, so each
+    container is streamed once and the streamed rows match the dict's contents
+    (and the rows_returned count).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stream = current_stream()
+
+    @property
+    def streaming(self) -> bool:
+        """True if rows are being sent to a streamed response"""
+        return self.stream is not None
+
+    def __setitem__(self, key, row) -> None:
+        if key in self:
+            return
+        super().__setitem__(key, row)
+        if self.stream is not None:
+            self.stream.put_row(row)
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Screenshot Annotator
+====================
+
+Pure-function screenshot compositing (safe to run in worker processes):
+- URL bar on top, taskbar at the bottom (overlay assets resized to width)
+- Label block (username, platform, container, date/time, VM email) on the left
+- Clock and date drawn on the taskbar
+- Works on raw PNG bytes in, annotated PNG bytes out
+- Decoded, pre-resized overlays cached per (asset, width); fonts loaded once
+"""
+
+import io
+import os
+import functools
+import threading
+from datetime import datetime
+from typing import Optional, List, Dict, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+
+OVERLAY_DIRS = [
+    "",
+    "test_new_screenshots",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_new_screenshots"),
+]
+URL_BAR_ASSET = "url_bar_appointment.png"
+TASKBAR_ASSET = "taskbar_appointment.png"
+
+# Screenshots narrower than this are centered on a canvas of this width
+MIN_COMPOSITE_WIDTH = 2074
+
+# (asset, target width) -> decoded, resized overlay (read-only once cached)
+_overlay_cache: Dict[Tuple[str, int], Image.Image] = {}
+_overlay_lock = threading.Lock()
+overlay_cache_enabled = True
+
+
+def set_overlay_cache(enabled: bool) -> None:
+    """Turn the overlay cache on or off (off also clears it; used by benchmarks)"""
+    global overlay_cache_enabled
+    overlay_cache_enabled = enabled
+    if not enabled:
+        clear_overlay_cache()
+
+
+def clear_overlay_cache() -> None:
+    """Drop all cached overlays"""
+    with _overlay_lock:
+        _overlay_cache.clear()
+
+
+def load_overlay(asset: str, target_width: int) -> Optional[Image.Image]:
+    """
+    Overlay asset (URL bar / taskbar) resized to the target width, from the cache when possible.
+
+    The returned image is shared: paste it, never draw on it.
+
+    Returns:
+        PIL image, or None if the asset file is missing or unreadable
+    """
+    key = (asset, target_width)
+    if overlay_cache_enabled:
+        with _overlay_lock:
+            cached = _overlay_cache.get(key)
+        if cached is not None:
+            return cached
+
+    overlay = _read_overlay(asset, target_width)
+    if overlay is not None and overlay_cache_enabled:
+        with _overlay_lock:
+            _overlay_cache[key] = overlay
+    return overlay
+
+
+def _read_overlay(asset: str, target_width: int) -> Optional[Image.Image]:
+    """Decode an overlay asset from disk and resize it to the target width"""
+    try:
+        path = None
+        for folder in OVERLAY_DIRS:
+            candidate = os.path.join(folder, asset) if folder else asset
+            if os.path.exists(candidate):
+                path = candidate
+                break
+
+        if not path:
+            print(f"⚠️ Overlay {asset} not found in any location")
+            return None
+
+        overlay = Image.open(path)
+        overlay.load()  # Decode now (and close the file) so cached copies are ready to paste
+        original_width, original_height = overlay.size
+
+        # Resize to target width (stretch if needed)
+        if target_width != original_width:
+            overlay = overlay.resize((target_width, original_height), Image.Resampling.LANCZOS)
+        return overlay
+
+    except Exception as e:
+        print(f"⚠️ Error loading overlay {asset}: {e}")
+        return None
+
+
+def _truetype(candidates: List[str], size: int):
+    """First font from the list that loads, else PIL's default font"""
+    for name in candidates:
+        try:
+            return ImageFont.truetype(name, size)
+        except Exception:
+            continue
+    return ImageFont.load_default()
+
+
+@functools.lru_cache(maxsize=None)
+def label_font():
+    """Font for the label block (36px)"""
+    return _truetype(["arial.ttf", "DejaVuSans.ttf"], 36)
+
+
+@functools.lru_cache(maxsize=None)
+def taskbar_font(bold: bool = False):
+    """Font for the taskbar clock (24px)"""
+    if bold:
+        return _truetype(["segoeuib.ttf", "arialbd.ttf", "DejaVuSans-Bold.ttf"], 24)
+    return _truetype(["segoeui.ttf", "arial.ttf", "DejaVuSans.ttf"], 24)
+
+
+def preload_assets(widths: Tuple[int, ...] = (MIN_COMPOSITE_WIDTH,)) -> None:
+    """
+    Warm the overlay cache and fonts (process start / media worker initializer).
+
+    Args:
+        widths: Composite widths to pre-resize the overlays for
+    """
+    label_font()
+    taskbar_font(bold=False)
+    for width in widths:
+        load_overlay(URL_BAR_ASSET, width)
+        load_overlay(TASKBAR_ASSET, width)
+
+
+def annotate_screenshot(png_bytes: bytes, label_lines: List[str], captured_at: datetime) -> Optional[bytes]:
+    """
+    Composite URL bar + screenshot + taskbar and draw the labels.
+
+    Args:
+        png_bytes: Raw browser screenshot (PNG)
+        label_lines: Text lines for the label block
+        captured_at: Capture time (drawn on the taskbar clock)
+
+    Returns:
+        Annotated PNG bytes, or None if the overlays are unavailable (keep the raw image)
+    """
+    # Load original screenshot
+    img = Image.open(io.BytesIO(png_bytes)).convert("RGBA")
+    original_width, original_height = img.size
+
+    # Load and resize URL bar and taskbar
+    final_width = max(MIN_COMPOSITE_WIDTH, original_width)
+    url_bar = load_overlay(URL_BAR_ASSET, final_width)
+    taskbar = load_overlay(TASKBAR_ASSET, final_width)
+
+    if url_bar is None or taskbar is None:
+        return None
+
+    url_bar_height = url_bar.size[1]
+    taskbar_height = taskbar.size[1]
+
+    # Create composite image: URL bar + screenshot + taskbar
+    composite_height = url_bar_height + original_height + taskbar_height
+    composite = Image.new('RGB', (final_width, composite_height), color=(255, 255, 255))
+
+    # Paste URL bar at top
+    composite.paste(url_bar, (0, 0))
+
+    # Paste original screenshot in middle (center if narrower)
+    x_offset = (final_width - original_width) // 2 if original_width < final_width else 0
+    composite.paste(img, (x_offset, url_bar_height), img)
+
+    # Paste taskbar at bottom
+    composite.paste(taskbar, (0, url_bar_height + original_height))
+
+    # Add labels on LEFT side, just above taskbar
+    draw = ImageDraw.Draw(composite)
+    font = label_font()
+
+    # Calculate label dimensions
+    line_height = 45
+    max_label_width = 0
+    for line in label_lines:
+        try:
+            bbox = draw.textbbox((0, 0), line, font=font)
+            line_width = bbox[2] - bbox[0]
+        except Exception:
+            line_width = draw.textlength(line, font=font)
+        max_label_width = max(max_label_width, line_width)
+
+    total_label_height = len(label_lines) * line_height
+    padding = 20
+
+    label_x = padding
+    label_y = url_bar_height + original_height - total_label_height - padding
+
+    # Draw background rectangle for labels
+    bg_padding = 15
+    draw.rectangle([
+        label_x - bg_padding,
+        label_y - bg_padding,
+        label_x + max_label_width + bg_padding,
+        label_y + total_label_height + bg_padding
+    ], fill=(0, 0, 0, 200))  # Semi-transparent black background
+
+    # Draw each label line (yellow)
+    current_y = label_y
+    for line in label_lines:
+        draw.text((label_x, current_y), line, font=font, fill=(255, 255, 0))
+        current_y += line_height
+
+    # Date and time on the taskbar (offsets from the right edge / taskbar top)
+    taskbar_start_y = url_bar_height + original_height
+    clock_font = taskbar_font(bold=False)
+    time_text = captured_at.strftime("%I:%M %p").lstrip('0')  # e.g., "6:12 PM"
+    date_text = captured_at.strftime("%m/%d/%Y")              # e.g., "10/28/2025"
+    draw.text((final_width - 200, taskbar_start_y + 5), time_text, font=clock_font, fill=(255, 255, 255))
+    draw.text((final_width - 216, taskbar_start_y + 40), date_text, font=clock_font, fill=(255, 255, 255))
+
+    out = io.BytesIO()
+    composite.save(out, format="PNG")
+    return out.getvalue()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Step Latency Metrics
+====================
+
+In-process latency instrumentation for API operations with:
+- Histograms per (endpoint, step)
+- span() context manager and timed() decorator
+- Whole-class instrumentation (every method becomes a span)
+- Endpoint resolved per thread (Flask request, background job or worker)
+- Prometheus text exposition format
+"""
+
+import time
+import inspect
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Callable, Iterable, Tuple
+
+
+# Seconds; browser steps range from sub-second clicks to multi-minute scrolls
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram (Prometheus semantics)"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record one duration in seconds"""
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self) -> list:
+        """(upper bound, cumulative count) pairs, without +Inf"""
+        total = 0
+        out = []
+        for bound, n in zip(self.buckets, self.counts):
+            total += n
+            out.append((bound, total))
+        return out
+
+
+class StepMetrics:
+    """
+    Thread-safe registry of step histograms keyed by (endpoint, step).
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Initialize metrics registry
+
+        Args:
+            buckets: Histogram bucket upper bounds in seconds
+        """
+        self.buckets = buckets
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._lock = threading.Lock()
+        self._endpoint_resolver: Optional[Callable[[], Optional[str]]] = None
+        self._local = threading.local()
+
+    def set_endpoint_resolver(self, resolver: Callable[[], Optional[str]]) -> None:
+        """Set the callable that names the endpoint for the current thread (e.g. Flask request.endpoint)"""
+        self._endpoint_resolver = resolver
+
+    @contextmanager
+    def endpoint(self, name: str):
+        """Attribute spans on this thread to the given endpoint (for worker threads outside a request)"""
+        previous = getattr(self._local, 'endpoint', None)
+        self._local.endpoint = name
+        try:
+            yield
+        finally:
+            self._local.endpoint = previous
+
+    def current_endpoint(self) -> str:
+        """Endpoint label for spans recorded on this thread"""
+        name = getattr(self._local, 'endpoint', None)
+        if not name and self._endpoint_resolver:
+            try:
+                name = self._endpoint_resolver()
+            except Exception:
+                name = None
+        return name or "background"
+
+    def observe(self, step: str, seconds: float, endpoint: Optional[str] = None) -> None:
+        """Record a step duration"""
+        key = (endpoint or self.current_endpoint(), step)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    @contextmanager
+    def span(self, step: str):
+        """
+        Time a block of code as a step.
+
+        Example:
+            with metrics.span("excel_write"):
+                write_containers_excel(rows, path)
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(step, time.perf_counter() - started)
+
+    def timed(self, step: Optional[str] = None):
+        """Decorator timing every call of a function as a step (defaults to the function name)"""
+        def decorator(func):
+            name = step or func.__name__.lstrip('_')
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - started)
+            return wrapper
+        return decorator
+
+    def instrument_class(self, cls, exclude: Iterable[str] = (), aliases: Optional[Dict[str, str]] = None):
+        """
+        Wrap every method defined on a class so each call is recorded as a span.
+
+        Args:
+            cls: Class to instrument in place
+            exclude: Method names to leave untouched
+            aliases: Optional method name -> step name overrides
+
+        Returns:
+            The same class (usable as a decorator)
+        """
+        excluded = set(exclude)
+        aliases = aliases or {}
+        for name, member in list(vars(cls).items()):
+            if name.startswith('__') or name in excluded or not inspect.isfunction(member):
+                continue
+            setattr(cls, name, self.timed(aliases.get(name))(member))
+        return cls
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """JSON-friendly summary: endpoint -> step -> count / total / average seconds"""
+        with self._lock:
+            items = [(key, h.count, h.sum) for key, h in self._histograms.items()]
+        out: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for (endpoint, step), count, total in sorted(items):
+            out.setdefault(endpoint, {})[step] = {
+                "count": count,
+                "total_seconds": round(total, 3),
+                "avg_seconds": round(total / count, 3) if count else 0.0
+            }
+        return out
+
+    def render_prometheus(self, gauges: Optional[Dict[str, tuple]] = None,
+                          prefix: str = "emodal") -> str:
+        """
+        Render histograms (and optional gauges) in Prometheus text exposition format.
+
+        Args:
+            gauges: name -> (help text, value) or (help text, value, label name), where
+                    value is a number or a dict of label value -> number
+            prefix: Metric name prefix
+
+        Returns:
+            str: Exposition text
+        """
+        lines = []
+        metric = f"{prefix}_step_duration_seconds"
+        lines.append(f"# HELP {metric} Duration of operation steps per endpoint")
+        lines.append(f"# TYPE {metric} histogram")
+        with self._lock:
+            items = [(key, h.cumulative(), h.count, h.sum) for key, h in self._histograms.items()]
+        for (endpoint, step), buckets, count, total in sorted(items):
+            labels = f'endpoint="{_escape(endpoint)}",step="{_escape(step)}"'
+            for bound, cumulative in buckets:
+                lines.append(f'{metric}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{metric}_sum{{{labels}}} {total:.6f}")
+            lines.append(f"{metric}_count{{{labels}}} {count}")
+
+        for name, gauge in (gauges or {}).items():
+            help_text, value = gauge[0], gauge[1]
+            label_name = gauge[2] if len(gauge) > 2 else "state"
+            full_name = f"{prefix}_{name}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} gauge")
+            if isinstance(value, dict):
+                for label, number in sorted(value.items()):
+                    lines.append(f'{full_name}{{{label_name}="{_escape(str(label))}"}} {number}')
+            else:
+                lines.append(f"{full_name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    """Escape a Prometheus label value"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Shared registry used by the API, login handler and reCAPTCHA handler
+metrics = StepMetrics()
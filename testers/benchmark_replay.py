@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Offline Replay Benchmark
+========================
+
+Replays recorded page artifacts through the scraping code, no E-Modal login needed:
+- Container grid text parser (iter_container_rows) on copied_text.txt dumps
+  (or synthetic grid text when no dump is given)
+- Export writers (write_containers_excel, write_containers_export for csv/jsonl)
+- DOM grid extraction and extract_full_timeline on saved HTML snapshots,
+  served from a local static server to headless Chrome (optional)
+
+Reports throughput (rows/sec) and peak Python memory at 100, 1k and 10k containers.
+
+Usage:
+    python testers/benchmark_replay.py
+    python testers/benchmark_replay.py --copied-text downloads/<session_id>/copied_text.txt.gz
+    python testers/benchmark_replay.py --html-dir snapshots/ --sizes 100 1000
+
+HTML snapshot directory layout (save driver.page_source or "Save page as"):
+    containers_grid.html   - containers page with the grid loaded
+    timeline.html          - containers page with one row expanded (timeline visible)
+"""
+
+import os
+import sys
+import time
+import gzip
+import argparse
+import itertools
+import tempfile
+import threading
+import tracemalloc
+import http.server
+import functools
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from emodal_business_api import (  # noqa: E402
+    iter_container_rows, write_containers_excel, write_containers_export, CONTAINER_COLUMNS,
+    EModalBusinessOperations, BrowserSession
+)
+
+
+DEFAULT_SIZES = [100, 1000, 10000]
+
+
+def synthetic_grid_text(rows: int) -> str:
+    """Newline-separated grid text in the same shape as the select-all copy"""
+    lines = ["Container #", "Trade Type", "Status"]  # Header noise (never matches an ID)
+    for i in range(rows):
+        lines.append(f"MSCU{i:07d}")
+        lines.extend([
+            "IMPORT", "ON VESSEL", "NO", f"P{i:08d}", "N/A", "IN",
+            "YARD A", "DEST B", "BLOCK 12", "MSC", "MSC ANNA", "MANN",
+            f"{i % 900:03d}W", "45GP", "$0.00", "10/28/2025", "TAG"
+        ])
+    return "\n".join(lines) + "\n"
+
+
+def load_grid_text(copied_text_path: str, rows: int) -> str:
+    """Repeat a recorded copied_text.txt(.gz) dump until it holds at least `rows` containers"""
+    opener = gzip.open if copied_text_path.endswith('.gz') else open
+    with opener(copied_text_path, 'rt', encoding='utf-8') as f:
+        recorded = f.read()
+    recorded_rows = sum(1 for _ in iter_container_rows(recorded.splitlines()))
+    if recorded_rows == 0:
+        raise ValueError(f"No container rows found in {copied_text_path}")
+    repeats = -(-rows // recorded_rows)  # ceil
+    return recorded * repeats
+
+
+def measure(func):
+    """Run func once; return (result, seconds, peak traced memory in bytes)"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = func()
+    finally:
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def report(name: str, size: int, rows: int, seconds: float, peak: int):
+    rate = rows / seconds if seconds > 0 else float('inf')
+    print(f"  {name:<22} {size:>7}  {rows:>7} rows  {seconds:>8.3f}s  {rate:>10.0f} rows/s  {peak / 1024 / 1024:>8.2f} MB peak")
+
+
+def bench_parser_and_writer(sizes, copied_text_path=None):
+    """Benchmark the grid text parser and the Excel writer"""
+    print("\n📊 Grid text parser / export writers")
+    print(f"  source: {copied_text_path or 'synthetic'}")
+    for size in sizes:
+        text = load_grid_text(copied_text_path, size) if copied_text_path else synthetic_grid_text(size)
+
+        def parse():
+            return list(itertools.islice(iter_container_rows(text.splitlines()), size))
+
+        rows, seconds, peak = measure(parse)
+        report("iter_container_rows", size, len(rows), seconds, peak)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            excel_path = os.path.join(tmp, "containers.xlsx")
+            written, seconds, peak = measure(lambda: write_containers_excel(iter(rows), excel_path, CONTAINER_COLUMNS))
+            report("write_containers_excel", size, written, seconds, peak)
+            for fmt in ("csv", "jsonl"):
+                export_path = os.path.join(tmp, f"containers.{fmt}")
+                written, seconds, peak = measure(lambda: write_containers_export(iter(rows), export_path, CONTAINER_COLUMNS))
+                report(f"export ({fmt})", size, written, seconds, peak)
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_directory(directory: str):
+    """Serve a directory on a random local port; returns (server, base_url)"""
+    handler = functools.partial(_QuietHandler, directory=directory)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def create_headless_operations():
+    """EModalBusinessOperations on a headless Chrome with a stand-in session"""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+    options = Options()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--window-size=1920,1080")
+    driver = webdriver.Chrome(options=options)
+    session = BrowserSession(
+        session_id=f"bench_{int(time.time())}",
+        driver=driver,
+        username="benchmark",
+        created_at=datetime.now(),
+        last_used=datetime.now()
+    )
+    return EModalBusinessOperations(session), driver
+
+
+# Clone the first grid body row until the table holds arguments[0] rows
+GROW_GRID_JS = """
+    var target = arguments[0];
+    var body = document.querySelector('table tbody') || document.querySelector('tbody');
+    if (!body) { return 0; }
+    var rows = body.querySelectorAll('tr');
+    if (!rows.length) { return 0; }
+    var template = rows[0];
+    while (body.rows.length > target) { body.deleteRow(body.rows.length - 1); }
+    var fragment = document.createDocumentFragment();
+    for (var i = body.rows.length; i < target; i++) {
+        fragment.appendChild(template.cloneNode(true));
+    }
+    body.appendChild(fragment);
+    return body.rows.length;
+"""
+
+
+def bench_html_snapshots(sizes, html_dir: str, timeline_runs: int):
+    """Benchmark DOM grid extraction and extract_full_timeline against saved HTML pages"""
+    print("\n🌐 HTML snapshots (headless Chrome)")
+    server, base_url = serve_directory(html_dir)
+    driver = None
+    try:
+        operations, driver = create_headless_operations()
+
+        grid_page = os.path.join(html_dir, "containers_grid.html")
+        if os.path.exists(grid_page):
+            for size in sizes:
+                driver.get(f"{base_url}/containers_grid.html")
+                loaded = driver.execute_script(GROW_GRID_JS, size)
+                if not loaded:
+                    print("  ⚠️ containers_grid.html has no table body rows - skipping DOM extraction")
+                    break
+                result, seconds, peak = measure(operations.extract_container_rows_dom)
+                report("extract_container_rows_dom", size, len(result.get("rows") or []), seconds, peak)
+        else:
+            print("  ⚠️ containers_grid.html not found - skipping DOM extraction")
+
+        timeline_page = os.path.join(html_dir, "timeline.html")
+        if os.path.exists(timeline_page):
+            driver.get(f"{base_url}/timeline.html")
+            for size in sizes:
+                # One extraction per container; sample at most timeline_runs calls
+                calls = min(size, timeline_runs)
+
+                def extract_many():
+                    ok = 0
+                    for _ in range(calls):
+                        if operations.extract_full_timeline().get("success"):
+                            ok += 1
+                    return ok
+
+                ok, seconds, peak = measure(extract_many)
+                report("extract_full_timeline", size, calls, seconds, peak)
+                if ok < calls:
+                    print(f"    ⚠️ {calls - ok}/{calls} timeline extractions failed")
+        else:
+            print("  ⚠️ timeline.html not found - skipping timeline extraction")
+    except Exception as e:
+        print(f"  ❌ HTML snapshot benchmark unavailable: {e}")
+    finally:
+        if driver:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline replay benchmark for parsing and extraction")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Container counts to benchmark")
+    parser.add_argument("--copied-text", help="Recorded copied_text.txt dump (default: synthetic grid text)")
+    parser.add_argument("--html-dir", help="Directory with saved HTML snapshots (enables browser benchmarks)")
+    parser.add_argument("--timeline-runs", type=int, default=200,
+                        help="Maximum extract_full_timeline calls sampled per size")
+    args = parser.parse_args()
+
+    print("🚀 E-Modal Offline Replay Benchmark")
+    print("=" * 50)
+    bench_parser_and_writer(args.sizes, args.copied_text)
+    if args.html_dir:
+        bench_html_snapshots(args.sizes, args.html_dir, args.timeline_runs)
+    print("\n✅ Benchmark complete")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Screenshot Capture Micro-Benchmark
+==================================
+
+Measures _capture_screenshot throughput (capture + annotation + write) with and
+without the overlay/font cache. Uses a stand-in driver that returns a fixed PNG,
+so no browser or E-Modal login is needed. Annotation runs inline
+(EMODAL_MEDIA_WORKERS=0) so the numbers are pure per-screenshot CPU + I/O cost.
+
+Usage:
+    python testers/benchmark_screenshots.py
+    python testers/benchmark_screenshots.py --count 50 --width 1920 --height 1080
+"""
+
+import io
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from datetime import datetime
+
+os.environ.setdefault('EMODAL_MEDIA_WORKERS', '0')
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PIL import Image, ImageDraw  # noqa: E402
+
+import screenshot_annotator  # noqa: E402
+from emodal_business_api import EModalBusinessOperations, BrowserSession  # noqa: E402
+
+
+class ReplayDriver:
+    """Minimal stand-in for the Chrome driver: every screenshot is the same recorded PNG"""
+
+    def __init__(self, png_bytes: bytes):
+        self.png_bytes = png_bytes
+
+    def get_screenshot_as_png(self) -> bytes:
+        return self.png_bytes
+
+
+def sample_png(width: int, height: int) -> bytes:
+    """Synthetic page-like screenshot"""
+    img = Image.new('RGB', (width, height), color=(245, 245, 245))
+    draw = ImageDraw.Draw(img)
+    for y in range(80, height, 40):
+        draw.rectangle([40, y, width - 40, y + 30], fill=(255, 255, 255), outline=(220, 220, 220))
+        draw.text((60, y + 8), f"MSCU{y:07d}  IMPORT  ON VESSEL  10/28/2025", fill=(30, 30, 30))
+    out = io.BytesIO()
+    img.save(out, format="PNG")
+    return out.getvalue()
+
+
+def run(count: int, png_bytes: bytes, cached: bool) -> float:
+    """Capture `count` screenshots; returns screenshots/sec"""
+    screenshot_annotator.set_overlay_cache(cached)
+    if cached:
+        screenshot_annotator.preload_assets()
+    else:
+        screenshot_annotator.label_font.cache_clear()
+        screenshot_annotator.taskbar_font.cache_clear()
+
+    session = BrowserSession(
+        session_id=f"bench_screens_{int(time.time() * 1000)}",
+        driver=ReplayDriver(png_bytes),
+        username="benchmark",
+        created_at=datetime.now(),
+        last_used=datetime.now()
+    )
+    operations = EModalBusinessOperations(session)
+    operations.screens_enabled = True
+    operations.screens_label = "benchmark"
+    default_dir = operations.screens_dir  # Created by the constructor; removed below
+    operations.screens_dir = tempfile.mkdtemp(prefix="bench_screens_")
+
+    try:
+        started = time.perf_counter()
+        for i in range(count):
+            if not cached:
+                # Without the cache every screenshot re-decodes overlays and reloads fonts
+                screenshot_annotator.label_font.cache_clear()
+                screenshot_annotator.taskbar_font.cache_clear()
+            operations._capture_screenshot(f"bench_{i}")
+        operations.wait_for_screenshots()
+        elapsed = time.perf_counter() - started
+    finally:
+        shutil.rmtree(operations.screens_dir, ignore_errors=True)
+        try:
+            os.rmdir(default_dir)
+        except Exception:
+            pass
+    return count / elapsed if elapsed > 0 else float('inf')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="_capture_screenshot throughput with/without overlay cache")
+    parser.add_argument("--count", type=int, default=30, help="Screenshots per run")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    args = parser.parse_args()
+
+    print("📸 _capture_screenshot micro-benchmark")
+    print("=" * 50)
+    png_bytes = sample_png(args.width, args.height)
+    print(f"  Screenshot: {args.width}x{args.height} ({len(png_bytes) / 1024:.0f} KB), {args.count} per run")
+
+    uncached = run(args.count, png_bytes, cached=False)
+    cached = run(args.count, png_bytes, cached=True)
+    screenshot_annotator.set_overlay_cache(True)
+
+    print(f"  Without cache: {uncached:8.2f} screenshots/s  ({1000 / uncached:7.1f} ms each)")
+    print(f"  With cache:    {cached:8.2f} screenshots/s  ({1000 / cached:7.1f} ms each)")
+    print(f"  Speedup:       {cached / uncached:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()